@@ -19,6 +19,13 @@ export default function LeadsPage() {
     }
 
     fetchLeads();
+
+    // Prepend new leads as they arrive instead of re-fetching the list
+    return apiClient.subscribeToSubmissions((event) => {
+      if (event.type !== 'lead') return;
+      const { type, ...lead } = event;
+      setLeads((current) => current.some((l) => l.id === lead.id) ? current : [lead, ...current]);
+    });
   }, [router]);
 
   const fetchLeads = async () => {
@@ -29,18 +29,17 @@ export default function Dashboard() {
     // Fetch dashboard stats
     const fetchStats = async () => {
       try {
-        const [leads, rfqs, manufacturers, documents] = await Promise.all([
-          apiClient.getLeads(),
-          apiClient.getRFQSubmissions(),
-          apiClient.getManufacturers(),
-          apiClient.getDocuments(),
+        const [summary, manufacturers, documents] = await Promise.all([
+          apiClient.getStats(),
+          apiClient.getManufacturerCount(),
+          apiClient.getDocumentCount(),
         ]);
 
         setStats({
-          leads: leads.length,
-          rfqs: rfqs.length,
-          manufacturers: manufacturers.length,
-          documents: documents.length,
+          leads: summary.totals.leads.total || 0,
+          rfqs: summary.totals.rfqs,
+          manufacturers,
+          documents,
         });
       } catch (error) {
         console.error('Error fetching stats:', error);
@@ -19,6 +19,13 @@ export default function RFQsPage() {
     }
 
     fetchRfqs();
+
+    // Prepend new RFQs as they arrive instead of re-fetching the list
+    return apiClient.subscribeToSubmissions((event) => {
+      if (event.type !== 'rfq') return;
+      const { type, has_attachment, ...rfq } = event;
+      setRfqs((current) => current.some((r) => r.id === rfq.id) ? current : [rfq, ...current]);
+    });
   }, [router]);
 
   const fetchRfqs = async () => {
@@ -61,6 +61,41 @@ export interface ContentBlock {
   created_at?: string;
 }
 
+export interface ExportJob {
+  id: string;
+  resource: 'leads' | 'rfqs';
+  format: 'csv' | 'csv_gz' | 'parquet' | 'xlsx';
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  row_count?: number | null;
+  error?: string;
+  download_url?: string | null;
+  created_at?: string;
+  completed_at?: string | null;
+}
+
+export interface StatsCounts {
+  leads: Record<string, number>;
+  rfqs: number;
+  investor_requests: number;
+  investor_downloads: number;
+  // Spam-filtered form submissions by reason, plus "total"
+  blocked: Record<string, number>;
+  // Uploads stopped by the size/type limits by reason, plus "total"
+  rejected_uploads: Record<string, number>;
+  upload_bytes_skipped: number;
+}
+
+export interface Stats {
+  start: string;
+  end: string;
+  totals: StatsCounts;
+  daily: (StatsCounts & { date: string })[];
+}
+
+export type SubmissionEvent =
+  | ({ type: 'lead' } & Lead & { id: string; created_at: string })
+  | ({ type: 'rfq'; has_attachment: boolean } & Omit<RFQSubmission, 'attachment' | 'attachment_url'> & { id: string; created_at: string });
+
 class ApiClient {
   private baseUrl: string;
   private token: string | null = null;
@@ -241,6 +276,12 @@ class ApiClient {
     return data.results || [];
   }
 
+  async getManufacturerCount(): Promise<number> {
+    // Only ids are needed to count; ?fields= keeps the payload and query small
+    const data = await this.request<{ count: number }>('/manufacturers/?fields=id');
+    return data.count;
+  }
+
   async getManufacturer(id: string): Promise<Manufacturer> {
     return this.request(`/manufacturers/${id}/`);
   }
@@ -272,6 +313,11 @@ class ApiClient {
     return data.results || [];
   }
 
+  async getDocumentCount(): Promise<number> {
+    const data = await this.request<{ count: number }>('/documents/?fields=id');
+    return data.count;
+  }
+
   async getDocument(id: string): Promise<Document> {
     return this.request(`/documents/${id}/`);
   }
@@ -364,6 +410,73 @@ class ApiClient {
     return data.results || [];
   }
 
+  // Live submission events (server-sent events)
+  subscribeToSubmissions(onEvent: (event: SubmissionEvent) => void): () => void {
+    if (typeof window === 'undefined' || typeof EventSource === 'undefined') {
+      return () => {};
+    }
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    const reconnect = () => {
+      if (!closed) retry = setTimeout(connect, 5000);
+    };
+
+    // EventSource cannot send an Authorization header, so connect with a
+    // short-lived single-use ticket and fetch a new one for every reconnect
+    const connect = async () => {
+      try {
+        const { ticket } = await this.request<{ ticket: string }>('/events/ticket/', { method: 'POST' });
+        if (closed) return;
+        source = new EventSource(`${this.baseUrl}/events/?ticket=${encodeURIComponent(ticket)}`);
+        source.addEventListener('submission', (message) => {
+          try {
+            onEvent(JSON.parse((message as MessageEvent).data));
+          } catch (error) {
+            console.error('Invalid submission event:', error);
+          }
+        });
+        source.onerror = () => {
+          // The browser would retry with the spent ticket
+          source?.close();
+          reconnect();
+        };
+      } catch (error) {
+        console.error('Could not open submission events:', error);
+        reconnect();
+      }
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    };
+  }
+
+  // Dashboard stats (daily rollups)
+  async getStats(start?: string, end?: string): Promise<Stats> {
+    const params = new URLSearchParams();
+    if (start) params.set('start', start);
+    if (end) params.set('end', end);
+    const query = params.toString() ? `?${params.toString()}` : '';
+    return this.request(`/stats/${query}`);
+  }
+
+  // Background exports
+  async createExport(resource: ExportJob['resource'], format: ExportJob['format'] = 'csv'): Promise<ExportJob> {
+    return this.request('/exports/', {
+      method: 'POST',
+      body: JSON.stringify({ resource, format }),
+    });
+  }
+
+  async getExport(id: string): Promise<ExportJob> {
+    return this.request(`/exports/${id}/`);
+  }
+
   // CSV Export
   async exportLeadsCSV(): Promise<Blob> {
     let token = typeof window !== 'undefined' ? localStorage.getItem('token') : null;
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Bulk import throughput (rows/s) for manufacturers and leads, CSV and NDJSON,
+on the configured database.
+
+    python bench_bulk_import.py [rows]
+
+Each run imports generated rows through the import code path (parsing,
+validation, chunked insert) inside a transaction that is rolled back, so
+nothing is kept. Peak memory is measured with tracemalloc in a second,
+untimed run.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'no_dry_starts.settings')
+django.setup()
+
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+from no_dry_starts.bulk_import import run_import
+from inquiries.imports import LeadImporter
+from manufacturers.imports import ManufacturerImporter
+
+
+def manufacturer(i):
+    return {
+        'name': f'Partner {i}', 'description': 'Machining and assembly', 'address': f'{i} Main St',
+        'phone': '+1 555 0100', 'email': f'partner{i}@example.com', 'website': 'https://example.com',
+        'active': 'true',
+    }
+
+
+def lead(i):
+    return {
+        'full_name': f'Lead {i}', 'email': f'lead{i % 5000}@example.com', 'phone': '',
+        'message': 'Interested in a quote', 'inquiry_type': 'contact',
+        'created_at': f'2024-{i % 12 + 1:02d}-15T10:00:00Z',
+    }
+
+
+def encode(make_row, rows, input_format):
+    if input_format == 'ndjson':
+        return ''.join(json.dumps(make_row(i)) + '\n' for i in range(rows)).encode()
+    header = list(make_row(0))
+    lines = [','.join(header)]
+    lines += [','.join(str(make_row(i)[name]) for name in header) for i in range(rows)]
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def run(importer_class, body, content_type, trace=False):
+    request = Request(RequestFactory().post('/', data=body, content_type=content_type))
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with transaction.atomic():
+        response = run_import(request, importer_class())
+        transaction.set_rollback(True)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return response.data['created'], elapsed, peak
+
+
+if __name__ == '__main__':
+    from django.db import connection
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'{connection.vendor}, {rows:,} rows')
+    for name, importer_class, make_row in (
+        ('manufacturers', ManufacturerImporter, manufacturer),
+        ('leads', LeadImporter, lead),
+    ):
+        for input_format in ('csv', 'ndjson'):
+            content_type = 'text/csv' if input_format == 'csv' else 'application/x-ndjson'
+            body = encode(make_row, rows, input_format)
+            created, elapsed, _ = run(importer_class, body, content_type)
+            assert created == rows, created
+            _, _, peak = run(importer_class, body, content_type, trace=True)
+            print(f'{name} {input_format}: {rows / elapsed:,.0f} rows/s, peak {peak / 2**20:.1f} MiB')
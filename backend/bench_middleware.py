@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Per-request cost of the middleware stack on /api/ routes: the stock Django
+middleware versus the path-scoped versions in no_dry_starts.middleware.
+
+    python bench_middleware.py [iterations]
+
+Requests go straight into the WSGI handler (no server, no network) for a
+hello-world list view and for the real manufacturers list. The two stacks
+alternate over several rounds and the fastest round of each is reported.
+"""
+import os
+import sys
+import time
+import logging
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'no_dry_starts.settings')
+django.setup()
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import JsonResponse
+from django.test.utils import override_settings
+from django.urls import include, path
+from wsgiref.util import setup_testing_defaults
+
+
+def hello(request):
+    return JsonResponse([], safe=False)
+
+
+urlpatterns = [
+    path('api/hello/', hello),
+    path('', include(settings.ROOT_URLCONF)),
+]
+
+STOCK_MIDDLEWARE = [
+    'no_dry_starts.middleware.RequestLogMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+def time_requests(middleware, url, iterations):
+    with override_settings(MIDDLEWARE=middleware, ROOT_URLCONF=__name__):
+        handler = WSGIHandler()
+        path_info, _, query = url.partition('?')
+
+        def request():
+            environ = {'PATH_INFO': path_info, 'QUERY_STRING': query}
+            setup_testing_defaults(environ)
+            # A browser-like request that carries session and CSRF cookies
+            environ['HTTP_COOKIE'] = 'sessionid=abc123; csrftoken=' + 'x' * 32
+            response = handler(environ, lambda status, headers: None)
+            b''.join(response)
+            response.close()
+
+        for _ in range(min(iterations, 200)):
+            request()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            request()
+        return (time.perf_counter() - started) / iterations * 1e6
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = 5
+    logging.getLogger('no_dry_starts.requests').setLevel(logging.ERROR)
+    for url in ('/api/hello/', '/api/manufacturers/'):
+        stock = scoped = float('inf')
+        for _ in range(rounds):
+            stock = min(stock, time_requests(STOCK_MIDDLEWARE, url, iterations))
+            scoped = min(scoped, time_requests(settings.MIDDLEWARE, url, iterations))
+        print(f"{url}: stock {stock:.1f} us, path-scoped {scoped:.1f} us, "
+              f"saved {stock - scoped:.1f} us/request ({(stock - scoped) / stock:.0%})")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Nearest-partner lookup cost as the partner list grows: k-d tree build time
+and query latency against a linear scan, over random points on the globe.
+Runs in process; no database needed.
+
+    python bench_nearest.py [queries]
+"""
+import math
+import os
+import random
+import sys
+import time
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'no_dry_starts.settings')
+django.setup()
+
+from manufacturers.spatial import KDTree, to_xyz
+
+SIZES = (100, 1_000, 10_000, 100_000)
+K = 5
+
+
+def random_point(rng):
+    # Uniform on the sphere, not bunched at the poles
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+
+def scan(points, query, k):
+    return sorted(
+        range(len(points)),
+        key=lambda i: sum((a - b) ** 2 for a, b in zip(query, points[i])),
+    )[:k]
+
+
+if __name__ == '__main__':
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(0)
+    targets = [to_xyz(*random_point(rng)) for _ in range(queries)]
+    for size in SIZES:
+        points = [to_xyz(*random_point(rng)) for _ in range(size)]
+
+        started = time.perf_counter()
+        tree = KDTree(points, range(size))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for query in targets:
+            tree.nearest(query, K)
+        tree_us = (time.perf_counter() - started) / queries * 1e6
+
+        sample = targets[:max(1, min(queries, 200_000 // size))]
+        started = time.perf_counter()
+        for query in sample:
+            scan(points, query, K)
+        scan_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+        print(f'{size:>7,} partners: build {build_ms:8.1f} ms, k-d tree {tree_us:7.1f} us/query, '
+              f'scan {scan_us:10.1f} us/query ({scan_us / tree_us:,.0f}x)')
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Insert throughput and primary key index size with random (v4) versus
+time-ordered (v7) UUID keys, on the configured database (PostgreSQL or
+SQLite).
+
+    python bench_uuid_keys.py [rows]
+
+Each variant gets a scratch table shaped like the app's tables (UUID primary
+key, created_at, a short text column), filled in batches of 10,000 rows in
+key-generation order, then dropped.
+"""
+import os
+import sys
+import time
+import uuid
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'no_dry_starts.settings')
+django.setup()
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+from no_dry_starts.ids import uuid7
+
+BATCH_SIZE = 10_000
+
+DDL = {
+    'postgresql': 'CREATE TABLE {table} (id uuid PRIMARY KEY, created_at timestamptz NOT NULL, email varchar(254) NOT NULL)',
+    'sqlite': 'CREATE TABLE {table} (id char(32) NOT NULL PRIMARY KEY, created_at datetime NOT NULL, email varchar(254) NOT NULL)',
+}
+
+# (primary key index bytes, table bytes)
+SIZES = {
+    'postgresql': "SELECT pg_relation_size('{table}_pkey'), pg_relation_size('{table}')",
+    'sqlite': (
+        "SELECT (SELECT SUM(pgsize) FROM dbstat WHERE name = 'sqlite_autoindex_{table}_1'), "
+        "(SELECT SUM(pgsize) FROM dbstat WHERE name = '{table}')"
+    ),
+}
+
+
+def run(name, make_key, rows):
+    table = f'bench_uuid_{name}'
+    field = models.UUIDField()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        cursor.execute(DDL[connection.vendor].format(table=table))
+        insert = f'INSERT INTO {table} (id, created_at, email) VALUES (%s, %s, %s)'
+
+        started = time.perf_counter()
+        for offset in range(0, rows, BATCH_SIZE):
+            now = timezone.now()
+            batch = [
+                (field.get_db_prep_value(make_key(), connection), now, f'user{offset + i}@example.com')
+                for i in range(min(BATCH_SIZE, rows - offset))
+            ]
+            with transaction.atomic():
+                cursor.executemany(insert, batch)
+        elapsed = time.perf_counter() - started
+
+        cursor.execute(SIZES[connection.vendor].format(table=table))
+        index_bytes, table_bytes = cursor.fetchone()
+        cursor.execute(f'DROP TABLE {table}')
+    return rows / elapsed, index_bytes, table_bytes
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    print(f'{connection.vendor}, {rows:,} rows')
+    results = {}
+    for name, make_key in (('v4', uuid.uuid4), ('v7', uuid7)):
+        results[name] = run(name, make_key, rows)
+        rate, index_bytes, table_bytes = results[name]
+        print(f'{name}: {rate:,.0f} rows/s, pk index {index_bytes / 2**20:.1f} MiB, '
+              f'table {table_bytes / 2**20:.1f} MiB')
+    (v4_rate, v4_index, _), (v7_rate, v7_index, _) = results['v4'], results['v7']
+    print(f'v7 vs v4: {v7_rate / v4_rate:.2f}x insert rate, pk index {v7_index / v4_index:.0%} of the size')
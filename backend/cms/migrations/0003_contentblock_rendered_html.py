@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+from ._0003_html import compress_html, render_html
+
+
+def render_existing_blocks(apps, schema_editor):
+    ContentBlock = apps.get_model('cms', 'ContentBlock')
+    for block in ContentBlock.objects.all().iterator():
+        block.rendered_html = render_html(block.html_content)
+        block.rendered_html_gzip = (
+            compress_html(block.rendered_html) if settings.CMS_PRECOMPRESS_HTML else None
+        )
+        block.save(update_fields=['rendered_html', 'rendered_html_gzip'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0002_alter_contentblock_options_contentblock_order_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentblock',
+            name='rendered_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='contentblock',
+            name='rendered_html_gzip',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(render_existing_blocks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0003_contentblock_rendered_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedPath',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100)),
+                ('path', models.CharField(max_length=500)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', 'last_seen'], name='cms_cachedp_key_f6d857_idx')],
+                'constraints': [models.UniqueConstraint(fields=('key', 'path'), name='unique_cached_path')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """CachedPath moves to no_dry_starts; its table and rows are kept"""
+
+    dependencies = [
+        ('cms', '0004_cachedpath'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterModelTable(name='cachedpath', table='no_dry_starts_cachedpath'),
+                migrations.RenameIndex(
+                    model_name='cachedpath',
+                    new_name='no_dry_star_key_67c3d9_idx',
+                    old_name='cms_cachedp_key_f6d857_idx',
+                ),
+            ],
+            state_operations=[
+                migrations.DeleteModel(name='CachedPath'),
+            ],
+        ),
+    ]
@@ -0,0 +1,156 @@
+"""
+Frozen copy of ``cms.html`` as it was when migration 0003 was written, so
+the data migration keeps rendering the same way after the live sanitizer
+changes. Do not edit; the migration loader skips modules starting with ``_``.
+"""
+
+import gzip
+import re
+from html import escape
+from html.parser import HTMLParser
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'article', 'aside', 'b', 'blockquote', 'br', 'caption', 'cite',
+    'code', 'dd', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure', 'footer',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'i', 'img', 'li', 'mark',
+    'ol', 'p', 'pre', 's', 'section', 'small', 'span', 'strong', 'sub', 'sup',
+    'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+
+# Tags removed together with everything inside them
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript'}
+
+VOID_TAGS = {'br', 'hr', 'img'}
+
+# Tags inside which whitespace is significant
+PRESERVE_WHITESPACE_TAGS = {'pre', 'code'}
+
+# Tags around which whitespace-only text can be dropped
+BLOCK_TAGS = {
+    'article', 'aside', 'blockquote', 'br', 'caption', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header',
+    'hr', 'li', 'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th',
+    'thead', 'tr', 'ul',
+}
+
+GLOBAL_ATTRIBUTES = {'class', 'id', 'title', 'style'}
+TAG_ATTRIBUTES = {
+    'a': {'href', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height', 'loading'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto', 'tel'}
+
+UNSAFE_STYLE = re.compile(r'expression\s*\(|javascript:|url\s*\(', re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+
+
+def is_safe_url(value):
+    url = WHITESPACE.sub('', value).lower()
+    if ':' not in url.split('/', 1)[0].split('?', 1)[0].split('#', 1)[0]:
+        return True  # relative URL or fragment
+    return url.split(':', 1)[0] in ALLOWED_URL_SCHEMES
+
+
+class HTMLRenderer(HTMLParser):
+    """Single-pass sanitizer that produces a list of output tokens."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Tokens are (kind, tag, text) with kind in {'start', 'end', 'text'}
+        self.tokens = []
+        self.open_tags = []
+        self.drop_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth += 1
+            return
+        if self.drop_depth or tag not in ALLOWED_TAGS:
+            return
+
+        allowed = GLOBAL_ATTRIBUTES | TAG_ATTRIBUTES.get(tag, set())
+        parts = [tag]
+        for name, value in attrs:
+            if name not in allowed:
+                continue
+            value = value or ''
+            if name in URL_ATTRIBUTES and not is_safe_url(value):
+                continue
+            if name == 'style' and UNSAFE_STYLE.search(value):
+                continue
+            if name == 'style' or name == 'class':
+                value = WHITESPACE.sub(' ', value).strip()
+            parts.append(f'{name}="{escape(value, quote=True)}"')
+
+        self.tokens.append(('start', tag, f"<{' '.join(parts)}>"))
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth = max(self.drop_depth - 1, 0)
+            return
+        if self.drop_depth or tag not in self.open_tags:
+            return
+        # Close any tags left open inside this one
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.tokens.append(('end', open_tag, f'</{open_tag}>'))
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.drop_depth:
+            return
+        text = escape(data, quote=False)
+        # Merge with preceding text (e.g. around a dropped comment or script)
+        if self.tokens and self.tokens[-1][0] == 'text':
+            text = self.tokens.pop()[2] + text
+        if not any(tag in PRESERVE_WHITESPACE_TAGS for tag in self.open_tags):
+            text = WHITESPACE.sub(' ', text)
+        self.tokens.append(('text', None, text))
+
+    def handle_comment(self, data):
+        pass
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            tag = self.open_tags.pop()
+            self.tokens.append(('end', tag, f'</{tag}>'))
+
+
+def render_html(source):
+    """Return a sanitized, whitespace-minified copy of ``source``."""
+    renderer = HTMLRenderer()
+    renderer.feed(source or '')
+    renderer.close()
+    tokens = renderer.tokens
+
+    output = []
+    for index, (kind, tag, text) in enumerate(tokens):
+        if kind == 'text' and text == ' ':
+            previous = tokens[index - 1] if index > 0 else None
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+            # Whitespace next to a block-level boundary never renders
+            if (
+                previous is None or following is None
+                or previous[1] in BLOCK_TAGS or following[1] in BLOCK_TAGS
+            ):
+                continue
+        output.append(text)
+    return ''.join(output).strip()
+
+
+def compress_html(rendered):
+    """Gzip rendered HTML deterministically (fixed mtime) for direct serving."""
+    return gzip.compress(rendered.encode('utf-8'), compresslevel=9, mtime=0)
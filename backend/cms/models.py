@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.db import models
 import uuid
+from .html import render_html, compress_html
 
 
 class ContentBlock(models.Model):
@@ -8,6 +10,9 @@ class ContentBlock(models.Model):
     slug = models.SlugField(max_length=255, unique=True)
     title = models.CharField(max_length=255)
     html_content = models.TextField()
+    # Sanitized, minified rendering of html_content, computed on save
+    rendered_html = models.TextField(blank=True, editable=False)
+    rendered_html_gzip = models.BinaryField(blank=True, null=True, editable=False)
     order = models.IntegerField(default=0, help_text="Display order (lower numbers first)")
     page = models.CharField(max_length=100, default='home', help_text="Page where this block appears")
     updated_at = models.DateTimeField(auto_now=True)
@@ -19,5 +24,21 @@ class ContentBlock(models.Model):
             models.Index(fields=['page', 'order']),
         ]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'html_content' in update_fields:
+            self.render()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'rendered_html', 'rendered_html_gzip'}
+        super().save(*args, **kwargs)
+
+    def render(self):
+        """Precompute the public rendering of html_content"""
+        self.rendered_html = render_html(self.html_content)
+        self.rendered_html_gzip = (
+            compress_html(self.rendered_html) if settings.CMS_PRECOMPRESS_HTML else None
+        )
+
     def __str__(self):
         return f"{self.page} - {self.title} ({self.order})"
+
@@ -7,3 +7,12 @@ class ContentBlockSerializer(serializers.ModelSerializer):
         model = ContentBlock
         fields = ['id', 'slug', 'title', 'html_content', 'order', 'page', 'updated_at', 'created_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class PublicContentBlockSerializer(serializers.ModelSerializer):
+    """Public read serializer serving the precomputed, sanitized HTML"""
+    html_content = serializers.CharField(source='rendered_html', read_only=True)
+
+    class Meta:
+        model = ContentBlock
+        fields = ['id', 'slug', 'title', 'html_content', 'order', 'page', 'updated_at', 'created_at']
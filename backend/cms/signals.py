@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from no_dry_starts.http_cache import schedule_purge
+
+from .models import ContentBlock
+
+
+@receiver([post_save, post_delete], sender=ContentBlock)
+def purge_content_block(sender, instance, **kwargs):
+    schedule_purge('content', f'content:{instance.slug}')
@@ -1,3 +1,70 @@
-from django.test import TestCase
+import gzip
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .html import render_html
+from .models import ContentBlock
+from .views import accepts_gzip
+
+
+class RenderHTMLTests(TestCase):
+    def test_drops_scripts_handlers_and_unsafe_urls(self):
+        cases = [
+            ('<p>Hi<script>alert(1)</script></p>', '<p>Hi</p>'),
+            ('<p onclick="steal()">Hi</p>', '<p>Hi</p>'),
+            ('<a href="javascript:alert(1)">x</a>', '<a>x</a>'),
+            ('<a href=" JaVa\nScript:alert(1)">x</a>', '<a>x</a>'),
+            ('<a href="/about#team">x</a>', '<a href="/about#team">x</a>'),
+            ('<img src="data:image/png;base64,AAAA" alt="x">', '<img alt="x">'),
+            ('<p style="background: url(https://evil.example)">x</p>', '<p>x</p>'),
+            ('<iframe src="https://evil.example"><p>inside</p></iframe><p>after</p>', '<p>after</p>'),
+            ('<marquee>kept text</marquee>', 'kept text'),
+            ('<p>a<!-- note -->b</p>', '<p>ab</p>'),
+            ('<p>1 &lt; 2 &amp; "q"</p>', '<p>1 &lt; 2 &amp; "q"</p>'),
+            ('<p title="&quot;><script>">x</p>', '<p title="&quot;&gt;&lt;script&gt;">x</p>'),
+        ]
+        for source, rendered in cases:
+            with self.subTest(source=source):
+                self.assertEqual(render_html(source), rendered)
+
+    def test_minifies_whitespace_outside_pre(self):
+        source = '<div>\n  <p>Two   words\n here</p>\n  <pre>  keep\n   this</pre>\n</div>'
+        self.assertEqual(render_html(source), '<div><p>Two words here</p><pre>  keep\n   this</pre></div>')
+
+    def test_keeps_inline_spacing(self):
+        self.assertEqual(render_html('<p><b>bold</b> <i>text</i></p>'), '<p><b>bold</b> <i>text</i></p>')
+
+    def test_closes_unclosed_tags(self):
+        self.assertEqual(render_html('<div><b>bold</div><p>open'), '<div><b>bold</b></div><p>open</p>')
+
+
+@override_settings(CMS_PRECOMPRESS_HTML=True)
+class ContentHTMLTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.block = ContentBlock.objects.create(slug='hero', title='Hero', html_content='<p>Hello<script>x</script></p>')
+
+    def get(self, accept_encoding):
+        return APIClient().get('/api/content/hero/html/', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_gzip_served_when_accepted(self):
+        response = self.get('br, gzip;q=0.8')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), b'<p>Hello</p>')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_refused_with_zero_quality(self):
+        for header in ('gzip;q=0', 'gzip; q=0.0, identity', '*;q=0', 'identity', ''):
+            with self.subTest(header=header):
+                response = self.get(header)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, b'<p>Hello</p>')
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip('deflate, GZIP'))
+        self.assertTrue(accepts_gzip('*'))
+        self.assertTrue(accepts_gzip('gzip;q=0.5, *;q=0'))
+        self.assertFalse(accepts_gzip('gzip;q=0, *'))
+        self.assertFalse(accepts_gzip('x-gzip'))
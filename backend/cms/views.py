@@ -1,8 +1,30 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from no_dry_starts.http_cache import PublicCacheMixin, schedule_purge
+from no_dry_starts.sparse_fields import SparseFieldsMixin
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from .models import ContentBlock
-from .serializers import ContentBlockSerializer
+from .serializers import ContentBlockSerializer, PublicContentBlockSerializer
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip; ``gzip;q=0`` refuses it"""
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        name, *params = coding.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -16,17 +38,50 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return False
 
 
-class ContentBlockViewSet(viewsets.ModelViewSet):
+class ContentBlockViewSet(PublicCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for content blocks.
     Public can read.
     Admin can CRUD.
+    Reads accept ?fields= / ?omit= to return only some fields.
+    Anonymous reads are cached by nginx under the 'content' surrogate key.
     """
     queryset = ContentBlock.objects.all()
     serializer_class = ContentBlockSerializer
     permission_classes = [IsAdminOrReadOnly]
+    surrogate_key = 'content'
     lookup_field = 'slug'
-    
+
+    def is_staff_request(self):
+        return bool(self.request.user and self.request.user.is_staff)
+
+    def get_serializer_class(self):
+        # Staff edit the raw source; everyone else gets the precomputed rendering
+        if self.is_staff_request():
+            return ContentBlockSerializer
+        return PublicContentBlockSerializer
+
+    def get_queryset(self):
+        queryset = ContentBlock.objects.defer('rendered_html_gzip')
+        if not self.is_staff_request():
+            queryset = queryset.defer('html_content')
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def html(self, request, slug=None):
+        """Serve the rendered HTML of a block directly, pre-gzipped when accepted"""
+        block = ContentBlock.objects.only('rendered_html', 'rendered_html_gzip').filter(slug=slug).first()
+        if block is None:
+            return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if block.rendered_html_gzip and accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response = HttpResponse(bytes(block.rendered_html_gzip), content_type='text/html; charset=utf-8')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(block.rendered_html, content_type='text/html; charset=utf-8')
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def reorder(self, request):
         """
@@ -41,23 +96,27 @@ class ContentBlockViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Update order for each block
-        updated_count = 0
+        orders = {}
         for block_data in blocks_data:
             slug = block_data.get('slug')
             order = block_data.get('order')
-            
+
             if slug is None or order is None:
                 continue
-            
-            try:
-                block = ContentBlock.objects.get(slug=slug)
-                block.order = order
-                block.save()
-                updated_count += 1
-            except ContentBlock.DoesNotExist:
-                pass
-        
+            orders[slug] = order
+
+        # One SELECT and one UPDATE for all blocks; the order doesn't affect
+        # the rendered HTML, so save() and its re-render are skipped
+        blocks = list(ContentBlock.objects.filter(slug__in=orders).only('id', 'slug'))
+        now = timezone.now()
+        for block in blocks:
+            block.order = orders[block.slug]
+            block.updated_at = now
+        ContentBlock.objects.bulk_update(blocks, ['order', 'updated_at'])
+        if blocks:
+            schedule_purge('content', *(f'content:{block.slug}' for block in blocks))
+        updated_count = len(blocks)
+
         return Response({
             'message': f'Successfully updated order for {updated_count} blocks',
             'updated_count': updated_count
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from no_dry_starts.search import EstimatedCountPaginator
 from .models import Document
 
 
@@ -7,3 +8,7 @@ class DocumentAdmin(admin.ModelAdmin):
     list_display = ['file_name', 'category', 'created_at']
     list_filter = ['category', 'created_at']
     search_fields = ['file_name', 'description']
+    readonly_fields = ['file_size', 'sha256', 'mime_type', 'page_count']
+    # Searches use the trigram indexes; counts are estimated on large tables
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,194 @@
+"""
+File metadata (size, SHA-256, MIME type, PDF page count) computed once at upload.
+
+The metadata is gathered chunk by chunk while the upload streams in, so the
+file never has to be re-read, stat'ed or HEAD-requested from storage later.
+
+The PDF page count is best-effort: it counts ``/Type /Page`` objects in the
+raw bytes, which finds every page of a classic PDF but none stored inside
+compressed object streams (PDF 1.5+). When no page object is found the count
+is left unknown (None) rather than reported as 0.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+
+# Magic byte signatures checked against the start of the file.
+# Ordered so that more specific signatures win over generic ones.
+MAGIC_SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'RIFF', 'image/webp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'ISO-10303-21', 'model/step'),
+    (b'AC10', 'image/vnd.dwg'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\x1f\x8b', 'application/gzip'),
+]
+
+# Containers whose real type is better described by the file extension
+# (e.g. .docx/.xlsx/.pptx are zip files, .doc/.xls are OLE files).
+GENERIC_CONTAINER_TYPES = {'application/zip', 'application/x-ole-storage'}
+
+SNIFF_LENGTH = 512
+
+# Matches page objects ("/Type /Page") but not the page tree ("/Type /Pages").
+PDF_PAGE_PATTERN = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+PDF_PAGE_TAIL = 32
+
+
+# Formats stored in a generic container, and the container's type
+CONTAINER_FORMATS = {
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'application/zip',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'application/zip',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'application/zip',
+    'application/msword': 'application/x-ole-storage',
+    'application/vnd.ms-excel': 'application/x-ole-storage',
+    'application/vnd.ms-powerpoint': 'application/x-ole-storage',
+}
+
+SIGNED_TYPES = {mime_type for _, mime_type in MAGIC_SIGNATURES}
+
+# Text formats without a signature; binary data in them gives them away
+TEXT_TYPES = {'image/vnd.dxf'}
+
+# Types of the accepted upload formats that are told apart by their
+# extension. Registered here because the host's mime.types may not list
+# them (python:3.11-slim knows neither .docx nor .dxf)
+EXTENSION_TYPES = {
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.ppt': 'application/vnd.ms-powerpoint',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.dwg': 'image/vnd.dwg',
+    '.dxf': 'image/vnd.dxf',
+    '.step': 'model/step',
+    '.stp': 'model/step',
+    '.csv': 'text/csv',
+    '.txt': 'text/plain',
+}
+
+
+def signature_mime_type(header):
+    """The MIME type whose magic bytes ``header`` starts with, or None."""
+    for signature, mime_type in MAGIC_SIGNATURES:
+        if header.startswith(signature):
+            if mime_type == 'image/webp' and header[8:12] != b'WEBP':
+                continue
+            return mime_type
+    return None
+
+
+def guess_mime_type(file_name):
+    """The MIME type for ``file_name``'s extension, or None."""
+    extension = os.path.splitext(file_name or '')[1].lower()
+    if extension in EXTENSION_TYPES:
+        return EXTENSION_TYPES[extension]
+    return mimetypes.guess_type(file_name or '')[0]
+
+
+def sniff_mime_type(header, file_name=''):
+    """Guess a MIME type from the leading bytes of a file, falling back to its name."""
+    guessed = guess_mime_type(file_name)
+    mime_type = signature_mime_type(header)
+    if mime_type is None:
+        return guessed or 'application/octet-stream'
+    if mime_type in GENERIC_CONTAINER_TYPES and guessed:
+        return guessed
+    return mime_type
+
+
+def content_matches(header, mime_type):
+    """
+    False if ``header`` cannot be the start of a ``mime_type`` file: the type
+    has magic bytes that are missing (e.g. a ``.pdf`` not starting with
+    ``%PDF-``), or it is a text format and the header has NUL bytes.
+    """
+    expected = CONTAINER_FORMATS.get(mime_type, mime_type)
+    if expected in SIGNED_TYPES:
+        return signature_mime_type(header) == expected
+    if mime_type.startswith('text/') or mime_type in TEXT_TYPES:
+        return b'\x00' not in header
+    return True
+
+
+class FileMetadataBuilder:
+    """Accumulates file metadata from a stream of chunks."""
+
+    def __init__(self, file_name=''):
+        self.file_name = file_name or ''
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.header = b''
+        self.is_pdf = None
+        self.page_count = 0
+        self._pdf_tail = b''
+
+    def update(self, chunk):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        self.hasher.update(chunk)
+
+        if len(self.header) < SNIFF_LENGTH:
+            self.header += chunk[:SNIFF_LENGTH - len(self.header)]
+        if self.is_pdf is None and len(self.header) >= 5:
+            self.is_pdf = self.header.startswith(b'%PDF-')
+
+        if self.is_pdf is not False:
+            # Keep a small tail so markers split across chunks are still counted
+            data = self._pdf_tail + chunk
+            self.page_count += len(PDF_PAGE_PATTERN.findall(data))
+            tail = data[-PDF_PAGE_TAIL:]
+            # Don't count a marker twice if it ends inside the retained tail
+            self.page_count -= len(PDF_PAGE_PATTERN.findall(tail))
+            self._pdf_tail = tail
+
+    def finish(self):
+        """Return the collected metadata as a dict."""
+        if self.is_pdf is not False and self._pdf_tail:
+            self.page_count += len(PDF_PAGE_PATTERN.findall(self._pdf_tail))
+            self._pdf_tail = b''
+        mime_type = sniff_mime_type(self.header, self.file_name)
+        return {
+            'size': self.size,
+            'sha256': self.hasher.hexdigest(),
+            'mime_type': mime_type,
+            # Zero found means the pages are compressed, not that there are none
+            'page_count': (
+                (self.page_count or None) if mime_type == 'application/pdf' else None
+            ),
+        }
+
+
+def compute_file_metadata(file):
+    """Compute metadata by reading a file object once, chunk by chunk."""
+    builder = FileMetadataBuilder(getattr(file, 'name', ''))
+    for chunk in file.chunks():
+        builder.update(chunk)
+    return builder.finish()
+
+
+def get_upload_metadata(field_file):
+    """
+    Return metadata for a not-yet-committed FieldFile.
+
+    Uses the metadata recorded by the upload handlers when the file came in
+    through a multipart request, otherwise reads the file once to compute it.
+    """
+    uploaded = field_file.file
+    metadata = getattr(uploaded, 'metadata', None)
+    if metadata is None:
+        metadata = compute_file_metadata(uploaded)
+        # Keep it on the file so storage backends can reuse it
+        uploaded.metadata = metadata
+    return metadata
@@ -0,0 +1,27 @@
+from django.core.exceptions import ValidationError
+
+from no_dry_starts.bulk_import import Importer
+from no_dry_starts.http_cache import schedule_purge
+from .models import Document
+from .storage import BLOB_PREFIX
+
+
+class DocumentImporter(Importer):
+    """
+    Document records for files already copied into storage (e.g. with
+    ``aws s3 sync``); ``file`` is the storage path. Blobs are reference
+    counted, so paths under ``blobs/`` are refused.
+    """
+    model = Document
+    fields = (
+        'file_name', 'file', 'category', 'description',
+        'file_size', 'sha256', 'mime_type', 'page_count',
+    )
+
+    def clean(self, values):
+        path = values['file']
+        if path.startswith('/') or '..' in path.split('/') or path.startswith(f'{BLOB_PREFIX}/'):
+            raise ValidationError({'file': [f"Must be a relative storage path outside {BLOB_PREFIX}/"]})
+
+    def finish(self):
+        schedule_purge('documents')
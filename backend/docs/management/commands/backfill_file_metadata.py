@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from docs.file_metadata import compute_file_metadata
+from docs.models import Document
+from inquiries.models import RFQSubmission
+
+
+class Command(BaseCommand):
+    help = "Compute size, SHA-256, MIME type and page count for files uploaded before metadata was tracked"
+
+    def handle(self, *args, **options):
+        updated = 0
+
+        for document in Document.objects.filter(sha256='').exclude(file=''):
+            with document.file.open('rb') as f:
+                metadata = compute_file_metadata(f)
+            Document.objects.filter(pk=document.pk).update(
+                file_size=metadata['size'],
+                sha256=metadata['sha256'],
+                mime_type=metadata['mime_type'],
+                page_count=metadata['page_count'],
+            )
+            updated += 1
+
+        rfqs = RFQSubmission.objects.filter(attachment_sha256='').exclude(attachment='').exclude(attachment=None)
+        for rfq in rfqs:
+            with rfq.attachment.open('rb') as f:
+                metadata = compute_file_metadata(f)
+            RFQSubmission.objects.filter(pk=rfq.pk).update(
+                attachment_size=metadata['size'],
+                attachment_sha256=metadata['sha256'],
+                attachment_mime_type=metadata['mime_type'],
+                attachment_page_count=metadata['page_count'],
+            )
+            updated += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled metadata for {updated} files"))
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from docs.media_gc import MEDIA_PREFIXES, collect_orphans
+
+
+class Command(BaseCommand):
+    help = "Delete media files that are no longer referenced by documents, RFQs or blobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report orphaned files and reclaimable bytes without deleting anything",
+        )
+        parser.add_argument(
+            '--prefix', action='append', dest='prefixes',
+            help=f"Storage prefix to scan (repeatable, default: {', '.join(MEDIA_PREFIXES)})",
+        )
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help="Skip files modified more recently than this (default: 24)",
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=1000,
+            help="Files listed and checked against the database per page (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        stats = collect_orphans(
+            prefixes=options['prefixes'],
+            dry_run=options['dry_run'],
+            min_age=timedelta(hours=options['min_age_hours']),
+            page_size=options['page_size'],
+            on_orphan=lambda name, size: self.stdout.write(f"{name} ({size} bytes)"),
+        )
+
+        verb = "Would reclaim" if options['dry_run'] else "Reclaimed"
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['scanned']} files, {stats['orphans']} orphaned. "
+            f"{verb} {stats['reclaimed_bytes']} bytes."
+        ))
+        if stats['failed']:
+            self.stderr.write(self.style.WARNING(
+                f"{stats['failed']} orphaned files could not be deleted; a later run retries them."
+            ))
@@ -0,0 +1,198 @@
+"""
+Garbage collection of media files no longer referenced by any database row.
+
+The storage listing is streamed page by page and each page is checked against
+the database with a single ``IN`` query per model, so memory stays bounded by
+the page size no matter how many files or rows exist.
+
+Orphaned blobs are claimed with a placeholder ``FileBlob`` row (no
+references) before their bytes go, and the page is checked again inside that
+transaction. An upload of the same content takes the same row in
+``ContentAddressedStorage._save``, so it either waits and then writes the
+bytes again, or got there first and keeps the blob.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from django.core.files.storage import storages
+from django.db import transaction
+
+from inquiries.models import RFQSubmission
+from .models import Document, FileBlob
+from .storage import blob_name_for
+
+logger = logging.getLogger(__name__)
+
+# Prefixes under which uploaded files are stored
+MEDIA_PREFIXES = ['documents/', 'rfq_attachments/', 'blobs/']
+
+# S3 DeleteObjects accepts at most 1000 keys per call
+S3_DELETE_BATCH_SIZE = 1000
+
+
+def is_s3_storage(storage):
+    return hasattr(storage, 'bucket') and hasattr(storage, 'location')
+
+
+def iter_storage_pages(storage, prefix, page_size=1000):
+    """Yield lists of (name, size, modified) for files under ``prefix``."""
+    if is_s3_storage(storage):
+        yield from _iter_s3_pages(storage, prefix, page_size)
+    else:
+        yield from _iter_filesystem_pages(storage, prefix, page_size)
+
+
+def _iter_s3_pages(storage, prefix, page_size):
+    location = storage.location.strip('/')
+    key_prefix = f"{location}/{prefix}" if location else prefix
+    paginator = storage.connection.meta.client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=storage.bucket_name,
+        Prefix=key_prefix,
+        PaginationConfig={'PageSize': page_size},
+    )
+    for page in pages:
+        entries = []
+        for obj in page.get('Contents', []):
+            name = obj['Key'][len(location) + 1:] if location else obj['Key']
+            entries.append((name, obj['Size'], obj['LastModified']))
+        if entries:
+            yield entries
+
+
+def _iter_filesystem_pages(storage, prefix, page_size):
+    root = storage.path('')
+    top = os.path.join(root, prefix)
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(top):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(full_path)
+            except FileNotFoundError:
+                continue
+            name = os.path.relpath(full_path, root).replace(os.sep, '/')
+            modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+            entries.append((name, stat.st_size, modified))
+            if len(entries) >= page_size:
+                yield entries
+                entries = []
+    if entries:
+        yield entries
+
+
+def referenced_names(names):
+    """Return the subset of ``names`` still referenced by a database row."""
+    referenced = set(
+        Document.objects.filter(file__in=names).values_list('file', flat=True)
+    )
+    referenced.update(
+        RFQSubmission.objects.filter(attachment__in=names).values_list('attachment', flat=True)
+    )
+    # Placeholders claimed by reclaim() hold no references
+    referenced.update(
+        FileBlob.objects.filter(name__in=names, ref_count__gt=0).values_list('name', flat=True)
+    )
+    return referenced
+
+
+def delete_files(storage, names):
+    """
+    Delete files, batching into S3 DeleteObjects calls where possible.
+    Returns the names that could not be deleted; each is logged.
+    """
+    failed = set()
+    if is_s3_storage(storage):
+        client = storage.connection.meta.client
+        for start in range(0, len(names), S3_DELETE_BATCH_SIZE):
+            batch = names[start:start + S3_DELETE_BATCH_SIZE]
+            keys = {storage._normalize_name(name): name for name in batch}
+            response = client.delete_objects(
+                Bucket=storage.bucket_name,
+                Delete={
+                    'Objects': [{'Key': key} for key in keys],
+                    'Quiet': True,
+                },
+            )
+            for error in response.get('Errors', []):
+                name = keys.get(error.get('Key'), error.get('Key'))
+                failed.add(name)
+                logger.warning(
+                    "Could not delete media file",
+                    extra={'file_name': name, 'error': error.get('Code'), 'detail': error.get('Message')},
+                )
+    else:
+        for name in names:
+            try:
+                storage.delete(name)
+            except OSError as error:
+                failed.add(name)
+                logger.warning("Could not delete media file", extra={'file_name': name, 'error': str(error)})
+    return failed
+
+
+def reclaim(storage, orphans):
+    """
+    Delete ``orphans`` ((name, size) pairs) that are still unreferenced once
+    their blob rows are claimed. Returns the pairs deleted and the names that
+    could not be.
+    """
+    blobs = []
+    for name, size in orphans:
+        digest = os.path.splitext(os.path.basename(name))[0]
+        # Only names _save() could write are at risk of being reused
+        if len(digest) <= 64 and blob_name_for(digest, name) == name:
+            blobs.append(FileBlob(sha256=digest, name=name, size=size, ref_count=0))
+    with transaction.atomic():
+        # Waits for an upload of the same content that is creating its row
+        FileBlob.objects.bulk_create(blobs, ignore_conflicts=True)
+        referenced = referenced_names([name for name, _ in orphans])
+        orphans = [(name, size) for name, size in orphans if name not in referenced]
+        failed = delete_files(storage, [name for name, _ in orphans])
+        FileBlob.objects.filter(name__in=[blob.name for blob in blobs], ref_count=0).delete()
+    return [(name, size) for name, size in orphans if name not in failed], failed
+
+
+def collect_orphans(storage=None, prefixes=None, dry_run=True, min_age=timedelta(hours=24),
+                    page_size=1000, on_orphan=None):
+    """
+    Find and (unless ``dry_run``) delete unreferenced media files.
+
+    Files younger than ``min_age`` are skipped so uploads whose row has not
+    been committed yet are never collected. ``on_orphan`` is called with
+    ``(name, size)`` for every orphan found.
+
+    Returns a dict with the number of files scanned, orphans found, orphans
+    that could not be deleted and bytes reclaimed (or reclaimable, in
+    dry-run mode). Orphans referenced again by the time they are deleted are
+    kept and count as neither.
+    """
+    storage = storage or storages['default']
+    prefixes = prefixes or MEDIA_PREFIXES
+    cutoff = datetime.now(timezone.utc) - min_age
+    stats = {'scanned': 0, 'orphans': 0, 'failed': 0, 'reclaimed_bytes': 0}
+
+    for prefix in prefixes:
+        for page in iter_storage_pages(storage, prefix, page_size):
+            stats['scanned'] += len(page)
+            referenced = referenced_names([name for name, _, _ in page])
+            orphans = [
+                (name, size) for name, size, modified in page
+                if name not in referenced and modified < cutoff
+            ]
+            if not orphans:
+                continue
+            stats['orphans'] += len(orphans)
+            if on_orphan:
+                for name, size in orphans:
+                    on_orphan(name, size)
+            if dry_run:
+                stats['reclaimed_bytes'] += sum(size for _, size in orphans)
+                continue
+            deleted, failed = reclaim(storage, orphans)
+            stats['failed'] += len(failed)
+            stats['reclaimed_bytes'] += sum(size for _, size in deleted)
+
+    return stats
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:09
+
+import no_dry_starts.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """New rows get UUIDv7 keys; existing keys are public and kept"""
+
+    dependencies = [
+        ('docs', '0003_fileblob_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='id',
+            field=models.UUIDField(default=no_dry_starts.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
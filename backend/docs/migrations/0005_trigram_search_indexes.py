@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from no_dry_starts.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docs', '0004_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        trigram_indexes('docs_document', ['file_name', 'description']),
+    ]
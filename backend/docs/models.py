@@ -1,5 +1,7 @@
-from django.db import models
-import uuid
+from django.db import models, transaction
+from no_dry_starts.ids import uuid7
+from .file_metadata import get_upload_metadata
+from .storage import blob_storage
 
 
 class Document(models.Model):
@@ -12,15 +14,46 @@ class Document(models.Model):
         ('other', 'Other'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     file_name = models.CharField(max_length=255)
-    file = models.FileField(upload_to='documents/%Y/%m/')
+    file = models.FileField(upload_to='documents/%Y/%m/', storage=blob_storage)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     description = models.TextField(blank=True, null=True)
+    # File metadata, computed once at upload
+    file_size = models.BigIntegerField(blank=True, null=True, editable=False)
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    mime_type = models.CharField(max_length=100, blank=True, editable=False)
+    page_count = models.PositiveIntegerField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # Keys from before UUIDv7 are random, so order by time, not key
         ordering = ['-created_at']
 
+    def save(self, *args, **kwargs):
+        if self.file and not self.file._committed:
+            metadata = get_upload_metadata(self.file)
+            self.file_size = metadata['size']
+            self.sha256 = metadata['sha256']
+            self.mime_type = metadata['mime_type']
+            self.page_count = metadata['page_count']
+            # Storing the file takes a blob reference; roll it back if the save fails
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.file_name
+
+
+class FileBlob(models.Model):
+    """A deduplicated file stored once per content digest"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
@@ -0,0 +1,165 @@
+"""
+HTTP byte-range serving (RFC 9110) for stored files.
+
+``requested_ranges`` reads ``Range`` and ``If-Range`` from a request and
+``file_response`` answers with the whole file (200), one range (206) or
+several (206, ``multipart/byteranges``). Only the requested bytes are read:
+local files are seeked, S3 objects are fetched with a ranged GET instead of
+being downloaded whole.
+"""
+
+import secrets
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+CHUNK_SIZE = 64 * 1024
+
+# More ranges than this in one request are ignored and the whole file is sent
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header, size):
+    """
+    Return a list of inclusive (start, end) byte ranges, or None when the
+    header is absent or malformed (serve the whole file). Raises
+    RangeNotSatisfiable when no range overlaps the file.
+    """
+    unit, _, specs = (header or '').partition('=')
+    if unit.strip().lower() != 'bytes' or not specs:
+        return None
+    specs = [spec.strip() for spec in specs.split(',') if spec.strip()]
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        first, dash, last = spec.partition('-')
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and end < start:
+                    return None
+            else:
+                suffix = int(last)  # bytes=-500: the last 500 bytes
+                if suffix == 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+        except ValueError:
+            return None
+        if start < 0 or start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    return ranges
+
+
+def requested_ranges(request, size, etag=None):
+    """Ranges to serve for ``request``, honouring If-Range against ``etag``."""
+    header = request.META.get('HTTP_RANGE')
+    if not header:
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # Only a strong ETag match may resume; dates and weak tags get the whole file
+    if if_range is not None and (not etag or if_range.strip() != etag):
+        return None
+    return parse_range_header(header, size)
+
+
+def read_range(file, start, end):
+    """Yield bytes ``start``..``end`` (inclusive) of an open storage file."""
+    s3_object = getattr(file, 'obj', None)
+    if s3_object is not None:
+        body = s3_object.get(Range=f'bytes={start}-{end}')['Body']
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+        return
+
+    file.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = file.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+def file_response(field_file, ranges, size, filename, content_type=None, etag=None):
+    """
+    Stream ``field_file`` as an attachment: whole when ``ranges`` is None,
+    otherwise the given (start, end) ranges as a 206 Partial Content.
+    """
+    content_type = content_type or 'application/octet-stream'
+    field_file.open('rb')
+    storage_file = field_file.file
+
+    if ranges is None:
+        response = FileResponse(
+            field_file, as_attachment=True, filename=filename, content_type=content_type
+        )
+        response['Content-Length'] = size
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            closing_iterator(read_range(storage_file, start, end), field_file),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    else:
+        boundary = secrets.token_hex(16)
+        parts = [
+            (
+                (
+                    f'\r\n--{boundary}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+                ).encode(),
+                start,
+                end,
+            )
+            for start, end in ranges
+        ]
+        closing = f'\r\n--{boundary}--\r\n'.encode()
+
+        def stream():
+            for header, start, end in parts:
+                yield header
+                yield from read_range(storage_file, start, end)
+            yield closing
+
+        response = StreamingHttpResponse(
+            closing_iterator(stream(), field_file),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = len(closing) + sum(
+            len(header) + end - start + 1 for header, start, end in parts
+        )
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+def closing_iterator(chunks, file):
+    try:
+        yield from chunks
+    finally:
+        file.close()
@@ -7,8 +7,11 @@ class DocumentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Document
-        fields = ['id', 'file_name', 'file', 'file_url', 'category', 'description', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = [
+            'id', 'file_name', 'file', 'file_url', 'category', 'description',
+            'file_size', 'sha256', 'mime_type', 'page_count', 'created_at',
+        ]
+        read_only_fields = ['id', 'file_size', 'sha256', 'mime_type', 'page_count', 'created_at']
 
     def get_file_url(self, obj):
         request = self.context.get('request')
@@ -23,7 +26,7 @@ class DocumentListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Document
-        fields = ['id', 'file_name', 'file_url', 'category', 'description']
+        fields = ['id', 'file_name', 'file_url', 'category', 'description', 'file_size', 'mime_type', 'page_count']
 
     def get_file_url(self, obj):
         request = self.context.get('request')
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from no_dry_starts.http_cache import schedule_purge
+
+from .models import Document
+
+
+def release_file(storage, name):
+    """Drop one storage reference to ``name`` once the transaction commits."""
+    if name:
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_delete, sender=Document)
+def release_document_file(sender, instance, **kwargs):
+    release_file(instance.file.storage, instance.file.name)
+
+
+@receiver(pre_save, sender=Document)
+def release_replaced_document_file(sender, instance, **kwargs):
+    # Only an update that assigns a new upload replaces the stored file
+    if instance._state.adding or not instance.file or instance.file._committed:
+        return
+    old_name = Document.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+    if old_name:
+        release_file(instance.file.storage, old_name)
+
+
+@receiver([post_save, post_delete], sender=Document)
+def purge_document(sender, instance, **kwargs):
+    schedule_purge('documents', f'documents:{instance.pk}')
@@ -0,0 +1,126 @@
+"""
+Content-addressed, deduplicating storage for uploaded documents and attachments.
+
+Uploads are stored once per SHA-256 digest under ``blobs/``. Each FileField
+value that points at a blob holds a reference tracked by a ``FileBlob`` row;
+a duplicate upload only bumps the reference count and skips the write to the
+underlying storage (no S3 PUT). The blob is removed once the last reference
+is released.
+
+Files stored before this backend was introduced keep their original names and
+are read and deleted through the underlying storage unchanged.
+"""
+
+import os
+
+from django.core.files.storage import Storage, storages
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+from .file_metadata import compute_file_metadata
+
+BLOB_PREFIX = 'blobs'
+
+
+def blob_storage():
+    """Storage callable used by FileFields that should be deduplicated."""
+    return storages['blobs']
+
+
+def blob_name_for(digest, original_name=''):
+    """Storage path for a digest, fanned out to keep directory listings small."""
+    extension = os.path.splitext(original_name)[1].lower()
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """Deduplicating wrapper around another configured storage backend."""
+
+    def __init__(self, backend='default'):
+        self.backend_alias = backend
+
+    @cached_property
+    def backend(self):
+        return storages[self.backend_alias]
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content digest in _save(), so
+        # skip the exists() probe (a HEAD request on S3) for the upload name.
+        return name
+
+    def _save(self, name, content):
+        from .models import FileBlob
+
+        metadata = getattr(content, 'metadata', None)
+        if metadata is None:
+            metadata = compute_file_metadata(content)
+        digest = metadata['sha256']
+
+        blob_name = blob_name_for(digest, name)
+        # The row stays locked (or, when new, unseen) until this transaction
+        # ends, so a concurrent upload of the same content waits for the bytes
+        # to be written and a failed write leaves no row behind. The model
+        # save around this already holds a savepoint.
+        with transaction.atomic(savepoint=False):
+            if FileBlob.objects.filter(sha256=digest).update(ref_count=F('ref_count') + 1):
+                return FileBlob.objects.values_list('name', flat=True).get(sha256=digest)
+            try:
+                with transaction.atomic():
+                    FileBlob.objects.create(sha256=digest, name=blob_name, size=metadata['size'])
+            except IntegrityError:
+                # A concurrent upload of the same content created the blob first
+                FileBlob.objects.filter(sha256=digest).update(ref_count=F('ref_count') + 1)
+                return FileBlob.objects.values_list('name', flat=True).get(sha256=digest)
+            # Bytes left by an earlier failed save are reused as they are
+            if not self.backend.exists(blob_name):
+                self.backend.save(blob_name, content)
+        return blob_name
+
+    def delete(self, name):
+        """Release one reference; remove the blob when none remain."""
+        from .models import FileBlob
+
+        if not name:
+            return
+        if not name.startswith(f"{BLOB_PREFIX}/"):
+            self.backend.delete(name)
+            return
+
+        # The bytes go while the row is still locked, so an upload of the same
+        # content waits and then writes them again; if the delete fails the
+        # reference is restored.
+        with transaction.atomic():
+            FileBlob.objects.filter(name=name).update(ref_count=F('ref_count') - 1)
+            removed, _ = FileBlob.objects.filter(name=name, ref_count__lte=0).delete()
+            if removed:
+                self.backend.delete(name)
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
@@ -1,3 +1,352 @@
-from django.test import TestCase
+import hashlib
+import io
+import mimetypes
+import os
+import shutil
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from rest_framework_simplejwt.tokens import AccessToken
+
+from inquiries.models import DailyStat, RFQSubmission
+from no_dry_starts.testing import TemporaryStorageMixin
+
+from . import media_gc
+from .file_metadata import FileMetadataBuilder, content_matches, sniff_mime_type
+from .media_gc import collect_orphans
+from .models import Document, FileBlob
+from .ranges import RangeNotSatisfiable, parse_range_header
+
+
+class CountingStream(io.BytesIO):
+    """Request body that remembers how much of it was read"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class UploadLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='password', is_staff=True)
+
+    def upload(self, name, content, content_length=None):
+        """POST a document through the WSGI handler; (status, body bytes read)"""
+        body = encode_multipart(BOUNDARY, {
+            'file_name': 'Upload', 'category': 'other', 'file': SimpleUploadedFile(name, content),
+        })
+        stream = CountingStream(body)
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': '/api/documents/',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_TYPE': MULTIPART_CONTENT,
+            'CONTENT_LENGTH': str(content_length or len(body)),
+            'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.staff)}',
+            'wsgi.input': stream,
+            'wsgi.url_scheme': 'http',
+        }
+        status = []
+        response = WSGIHandler()(environ, lambda line, headers: status.append(int(line.split()[0])))
+        b''.join(response)
+        response.close()
+        return status[0], stream.bytes_read
+
+    def rejected(self, reason):
+        return DailyStat.objects.get(metric='rejected_upload', key=reason).count
+
+    def test_wrong_type_stops_after_first_chunk(self):
+        status, bytes_read = self.upload('deck.pdf', b'\x00' * 5_000_000)
+        self.assertEqual(status, 415)
+        self.assertLessEqual(bytes_read, 128 * 1024)
+        self.assertFalse(Document.objects.exists())
+        self.assertEqual(self.rejected('file_type'), 1)
+        skipped = DailyStat.objects.get(metric='upload_bytes_skipped', key='file_type').count
+        self.assertGreater(skipped, 4_800_000)
+
+    @override_settings(UPLOAD_LIMITS=((r'^/api/documents/$', 1024, ('application/pdf',)),))
+    def test_declared_length_over_limit_is_not_read(self):
+        status, bytes_read = self.upload('deck.pdf', b'%PDF-1.4', content_length=2 * 1024 ** 3)
+        self.assertEqual(status, 413)
+        self.assertEqual(bytes_read, 0)
+        self.assertEqual(self.rejected('too_large'), 1)
+
+    @override_settings(UPLOAD_LIMITS=((r'^/api/documents/$', 200_000, ('application/pdf',)),))
+    def test_file_over_limit_stops_mid_stream(self):
+        status, bytes_read = self.upload('deck.pdf', b'%PDF-1.4\n' + b'0' * 600_000)
+        self.assertEqual(status, 413)
+        self.assertLess(bytes_read, 400_000)
+
+    def test_content_matches_type(self):
+        cases = [
+            (b'%PDF-1.7', 'deck.pdf', True),
+            (b'MZ\x90\x00', 'deck.pdf', False),
+            (b'PK\x03\x04', 'quote.docx', True),
+            (b'PK\x03\x04', 'deck.pdf', False),
+            (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'quote.doc', True),
+            (b'  0\nSECTION\n', 'part.dxf', True),
+            (b'\x00\x01\x02', 'part.dxf', False),
+        ]
+        for header, name, matches in cases:
+            with self.subTest(name=name, header=header):
+                self.assertEqual(content_matches(header, sniff_mime_type(header, name)), matches)
+
+    def test_types_do_not_depend_on_host_mime_types(self):
+        cases = [
+            (b'PK\x03\x04', 'quote.docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+            (b'PK\x03\x04', 'BOM.XLSX', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+            (b'  0\nSECTION\n', 'part.dxf', 'image/vnd.dxf'),
+            (b'ISO-10303-21;\n', 'part.step', 'model/step'),
+            (b'ISO-10303-21;\n', 'part.stp', 'model/step'),
+        ]
+        # Only Python's built-in table, as on a slim image without /etc/mime.types
+        with mock.patch('docs.file_metadata.mimetypes', mimetypes.MimeTypes(filenames=())):
+            for header, name, mime_type in cases:
+                with self.subTest(name=name):
+                    self.assertEqual(sniff_mime_type(header, name), mime_type)
+                    self.assertIn(mime_type, settings.DOCUMENT_TYPES)
+                    self.assertTrue(content_matches(header, mime_type))
+
+
+def build_metadata(name, chunks):
+    builder = FileMetadataBuilder(name)
+    for chunk in chunks:
+        builder.update(chunk)
+    return builder.finish()
+
+
+class FileMetadataTests(TestCase):
+    PDF = (
+        b'%PDF-1.4\n1 0 obj << /Type /Pages /Count 3 >> endobj\n'
+        b'2 0 obj << /Type /Page >> endobj\n3 0 obj << /Type/Page >> endobj\n'
+        b'4 0 obj << /Type /Page /Parent 1 0 R >> endobj\n%%EOF'
+    )
+
+    def test_size_and_sha256(self):
+        metadata = build_metadata('deck.pdf', [self.PDF])
+        self.assertEqual(metadata['size'], len(self.PDF))
+        self.assertEqual(metadata['sha256'], hashlib.sha256(self.PDF).hexdigest())
+        self.assertEqual(metadata['mime_type'], 'application/pdf')
+
+    def test_pages_counted_across_chunk_boundaries(self):
+        for size in (1, 3, 7, 16, 64, len(self.PDF)):
+            chunks = [self.PDF[i:i + size] for i in range(0, len(self.PDF), size)]
+            with self.subTest(chunk_size=size):
+                self.assertEqual(build_metadata('deck.pdf', chunks)['page_count'], 3)
+
+    def test_compressed_pdf_page_count_is_unknown(self):
+        pdf = b'%PDF-1.7\n5 0 obj << /Type /ObjStm /Filter /FlateDecode >> stream\nx\x9c\nendstream\n%%EOF'
+        self.assertIsNone(build_metadata('deck.pdf', [pdf])['page_count'])
+
+    def test_page_count_only_for_pdfs(self):
+        text = b'notes about /Type /Page objects'
+        metadata = build_metadata('notes.txt', [text])
+        self.assertEqual(metadata['mime_type'], 'text/plain')
+        self.assertIsNone(metadata['page_count'])
+
+
+class BackfillFileMetadataTests(TemporaryStorageMixin, TestCase):
+    def test_fills_missing_metadata_only(self):
+        pdf = FileMetadataTests.PDF
+        missing = Document.objects.create(file_name='Deck', category='investor', file=ContentFile(pdf, 'deck.pdf'))
+        known = Document.objects.create(file_name='Other', category='other', file=ContentFile(b'plain', 'a.txt'))
+        Document.objects.filter(pk=missing.pk).update(file_size=None, sha256='', mime_type='', page_count=None)
+        Document.objects.filter(pk=known.pk).update(mime_type='kept/as-is')
+        rfq = RFQSubmission.objects.create(
+            full_name='Buyer', email='buyer@example.com', company='Acme', phone='555', message='Quote',
+            attachment=ContentFile(pdf, 'drawing.pdf'),
+        )
+        RFQSubmission.objects.filter(pk=rfq.pk).update(attachment_sha256='', attachment_page_count=None)
+
+        out = io.StringIO()
+        call_command('backfill_file_metadata', stdout=out)
+
+        self.assertIn('Backfilled metadata for 2 files', out.getvalue())
+        missing.refresh_from_db()
+        self.assertEqual(missing.file_size, len(pdf))
+        self.assertEqual(missing.sha256, hashlib.sha256(pdf).hexdigest())
+        self.assertEqual(missing.mime_type, 'application/pdf')
+        self.assertEqual(missing.page_count, 3)
+        known.refresh_from_db()
+        self.assertEqual(known.mime_type, 'kept/as-is')
+        rfq.refresh_from_db()
+        self.assertEqual(rfq.attachment_sha256, hashlib.sha256(pdf).hexdigest())
+        self.assertEqual(rfq.attachment_page_count, 3)
+
+
+class BlobReferenceTests(TemporaryStorageMixin, TestCase):
+    def upload(self, content, name='deck.pdf'):
+        return Document.objects.create(file_name=name, category='other', file=ContentFile(content, name))
+
+    def blob(self, content):
+        return FileBlob.objects.filter(sha256=hashlib.sha256(content).hexdigest()).first()
+
+    def test_duplicates_share_one_blob_until_the_last_is_deleted(self):
+        first, second = self.upload(b'%PDF-1.4 same'), self.upload(b'%PDF-1.4 same')
+        blob = self.blob(b'%PDF-1.4 same')
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(first.file.name, second.file.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.blob(b'%PDF-1.4 same').ref_count, 1)
+        self.assertTrue(second.file.storage.exists(blob.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertIsNone(self.blob(b'%PDF-1.4 same'))
+        self.assertFalse(second.file.storage.exists(blob.name))
+
+    def test_replaced_files_are_released(self):
+        document = self.upload(b'%PDF-1.4 old')
+        rfq = RFQSubmission.objects.create(
+            full_name='Buyer', email='buyer@example.com', phone='555', message='Quote',
+            attachment=ContentFile(b'%PDF-1.4 old', 'drawing.pdf'),
+        )
+        self.assertEqual(self.blob(b'%PDF-1.4 old').ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            document.file = ContentFile(b'%PDF-1.4 new', 'deck.pdf')
+            document.save()
+        self.assertEqual(self.blob(b'%PDF-1.4 old').ref_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            rfq.attachment = ContentFile(b'%PDF-1.4 new', 'drawing.pdf')
+            rfq.save()
+        self.assertIsNone(self.blob(b'%PDF-1.4 old'))
+        self.assertEqual(self.blob(b'%PDF-1.4 new').ref_count, 2)
+
+    def test_failed_write_leaves_no_blob(self):
+        backend = Document._meta.get_field('file').storage.backend
+        with mock.patch.object(backend, 'save', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.upload(b'%PDF-1.4 lost')
+        self.assertIsNone(self.blob(b'%PDF-1.4 lost'))
+
+    def test_failed_save_releases_the_reference(self):
+        self.upload(b'%PDF-1.4 kept')
+        with mock.patch('docs.signals.schedule_purge', side_effect=RuntimeError('purge failed')):
+            with self.assertRaises(RuntimeError):
+                self.upload(b'%PDF-1.4 kept')
+        self.assertEqual(Document.objects.count(), 1)
+        self.assertEqual(self.blob(b'%PDF-1.4 kept').ref_count, 1)
+
+
+class MediaGCTests(TemporaryStorageMixin, TestCase):
+    def setUp(self):
+        self.storage = storages['default']
+        for prefix in ('documents', 'blobs'):
+            self.addCleanup(shutil.rmtree, self.storage.path(prefix), ignore_errors=True)
+        day_ago = time.time() - 2 * 86400
+        for name in ('documents/orphan.pdf', 'documents/kept.pdf', 'blobs/ab/cd/abcd.pdf'):
+            self.storage.save(name, ContentFile(b'x' * 10))
+            os.utime(self.storage.path(name), (day_ago, day_ago))
+        self.storage.save('documents/fresh.pdf', ContentFile(b'x' * 5))
+        Document.objects.create(file_name='Kept', category='other', file='documents/kept.pdf')
+        FileBlob.objects.create(sha256='abcd', name='blobs/ab/cd/abcd.pdf', size=10)
+
+    def test_dry_run_reports_without_deleting(self):
+        out = io.StringIO()
+        call_command('gc_media', '--dry-run', stdout=out)
+        self.assertIn('documents/orphan.pdf (10 bytes)', out.getvalue())
+        self.assertIn('Scanned 4 files, 1 orphaned. Would reclaim 10 bytes.', out.getvalue())
+        self.assertTrue(self.storage.exists('documents/orphan.pdf'))
+
+    def test_deletes_only_old_unreferenced_files(self):
+        stats = collect_orphans(dry_run=False)
+        self.assertEqual(stats, {'scanned': 4, 'orphans': 1, 'failed': 0, 'reclaimed_bytes': 10})
+        self.assertFalse(self.storage.exists('documents/orphan.pdf'))
+        for name in ('documents/kept.pdf', 'documents/fresh.pdf', 'blobs/ab/cd/abcd.pdf'):
+            self.assertTrue(self.storage.exists(name), name)
+
+    def test_min_age_guards_fresh_uploads(self):
+        stats = collect_orphans(dry_run=False, min_age=timedelta(0), page_size=1)
+        self.assertEqual(stats['orphans'], 2)
+        self.assertFalse(self.storage.exists('documents/fresh.pdf'))
+
+    def test_failed_deletes_are_logged_and_not_counted(self):
+        delete = self.storage.delete
+
+        def flaky_delete(name):
+            if name == 'documents/orphan.pdf':
+                raise PermissionError('read-only')
+            delete(name)
+
+        with mock.patch.object(self.storage, 'delete', side_effect=flaky_delete), \
+                self.assertLogs('docs.media_gc', 'WARNING') as logs:
+            stats = collect_orphans(dry_run=False, min_age=timedelta(0))
+        self.assertEqual(stats, {'scanned': 4, 'orphans': 2, 'failed': 1, 'reclaimed_bytes': 5})
+        self.assertIn('Could not delete media file', logs.output[0])
+        self.assertTrue(self.storage.exists('documents/orphan.pdf'))
+
+    def test_blob_reused_before_delete_is_kept(self):
+        digest = 'ef' * 32
+        name = f'blobs/ef/ef/{digest}.pdf'
+        self.storage.save(name, ContentFile(b'y' * 7))
+        check = media_gc.referenced_names
+
+        def upload_meanwhile(names):
+            # The scan finds the blob orphaned; an upload of the same content
+            # then claims its bytes before the page is deleted
+            referenced = check(names)
+            if not FileBlob.objects.filter(sha256=digest).exists():
+                FileBlob.objects.create(sha256=digest, name=name, size=7)
+            return referenced
+
+        with mock.patch('docs.media_gc.referenced_names', side_effect=upload_meanwhile):
+            stats = collect_orphans(dry_run=False, min_age=timedelta(0), prefixes=['blobs/'])
+        self.assertEqual(stats['reclaimed_bytes'], 0)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_orphaned_blob_leaves_no_row(self):
+        digest = 'ef' * 32
+        name = f'blobs/ef/ef/{digest}.pdf'
+        self.storage.save(name, ContentFile(b'y' * 7))
+        stats = collect_orphans(dry_run=False, min_age=timedelta(0), prefixes=['blobs/'])
+        self.assertEqual(stats['reclaimed_bytes'], 7)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(FileBlob.objects.filter(sha256=digest).exists())
+
+
+class RangeHeaderTests(TestCase):
+    def test_parses_ranges(self):
+        cases = [
+            ('bytes=0-99', [(0, 99)]),
+            ('bytes=900-', [(900, 999)]),
+            ('bytes=-100', [(900, 999)]),
+            ('bytes=-5000', [(0, 999)]),
+            ('bytes=950-2000', [(950, 999)]),
+            ('bytes=0-0, 10-19, 2000-', [(0, 0), (10, 19)]),
+            (' Bytes = 5-9 ', [(5, 9)]),
+        ]
+        for header, ranges in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range_header(header, 1000), ranges)
+
+    def test_malformed_headers_serve_the_whole_file(self):
+        too_many = 'bytes=' + ','.join(f'{n}-{n}' for n in range(17))
+        for header in (None, '', 'items=0-9', 'bytes=', 'bytes=9-0', 'bytes=a-b', 'bytes=5', too_many):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range_header(header, 1000))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=1000-', 'bytes=-0', 'bytes=2000-3000, -0'):
+            with self.subTest(header=header), self.assertRaises(RangeNotSatisfiable):
+                parse_range_header(header, 1000)
@@ -0,0 +1,202 @@
+"""
+Upload handlers that check and record file metadata while the upload streams in.
+
+Configured through ``FILE_UPLOAD_HANDLERS`` in place of Django's defaults.
+``UploadLimitHandler`` runs first and stops an upload to one of
+``UPLOAD_LIMITS`` as soon as it is known to be too large or of the wrong
+type, before the remaining handlers have stored it and without reading the
+rest of the body. The finished upload carries a ``metadata`` dict that
+models read on save.
+"""
+
+import logging
+import re
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.http import JsonResponse
+from django.http.multipartparser import MultiPartParserError
+from django.template.defaultfilters import filesizeformat
+
+from inquiries.stats import record_stat
+from no_dry_starts.log import request_context
+
+from .file_metadata import SNIFF_LENGTH, FileMetadataBuilder, content_matches, sniff_mime_type
+
+logger = logging.getLogger(__name__)
+
+# Allowance for the other form fields and multipart framing when comparing
+# the request's Content-Length with the file size limit
+FORM_OVERHEAD = 1024 * 1024
+
+LIMITED_METHODS = ('POST', 'PUT', 'PATCH')
+
+
+def upload_limit(request):
+    """(max file size, allowed MIME types) for ``request``, or None"""
+    if request.method not in LIMITED_METHODS:
+        return None
+    for pattern, max_size, types in settings.UPLOAD_LIMITS:
+        if re.match(pattern, request.path_info):
+            return max_size, types
+    return None
+
+
+class UploadRejected(MultiPartParserError):
+    """
+    An upload stopped part way. Being a MultiPartParserError, whoever
+    triggered the parse treats it as a malformed body; UploadLimitMiddleware
+    turns it into the response.
+    """
+
+    def __init__(self, reason, message, status, bytes_received, bytes_skipped):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+        self.status = status
+        self.bytes_received = bytes_received
+        self.bytes_skipped = bytes_skipped
+
+
+class UploadLimitHandler(FileUploadHandler):
+    """
+    Enforce the request's upload limit: the declared Content-Length first,
+    then the type sniffed from the first chunk of each file and its size as
+    chunks arrive. Chunks are passed on to the next handlers unchanged.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.limit = upload_limit(request) if request is not None else None
+        self.request_length = 0
+        self.received = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_length = content_length or 0
+        if self.limit and self.request_length > self.limit[0] + FORM_OVERHEAD:
+            self.reject('too_large', body_read=False)
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None,
+                 content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.size = 0
+        self.header = b''
+        self.checked = False
+        if self.limit and content_length and content_length > self.limit[0]:
+            self.reject('too_large')
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.limit:
+            self.size += len(raw_data)
+            self.received += len(raw_data)
+            if self.size > self.limit[0]:
+                self.reject('too_large')
+            if not self.checked:
+                self.header += raw_data[:SNIFF_LENGTH - len(self.header)]
+                if len(self.header) >= SNIFF_LENGTH:
+                    self.check_type()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.limit and not self.checked:
+            self.check_type()
+        return None
+
+    def check_type(self):
+        self.checked = True
+        mime_type = sniff_mime_type(self.header, self.file_name)
+        if mime_type not in self.limit[1] or not content_matches(self.header, mime_type):
+            self.reject('file_type', mime_type)
+
+    def reject(self, reason, mime_type=None, body_read=True):
+        if reason == 'too_large':
+            message, status = f"File too large. The maximum size is {filesizeformat(self.limit[0])}.", 413
+        else:
+            message, status = "File type not allowed.", 415
+        skipped = self.request_length
+        if body_read:
+            # The parser reads up to a chunk ahead of what reached the handlers
+            skipped = max(skipped - self.received - self.chunk_size, 0)
+        error = UploadRejected(reason, message, status, bytes_received=self.received, bytes_skipped=skipped)
+        # Remove what the later handlers stored of this file so far
+        for handler in self.request.upload_handlers:
+            if handler is not self:
+                handler.upload_interrupted()
+        self.request.upload_rejection = error
+        logger.warning(
+            "Upload rejected",
+            extra={
+                'reason': reason,
+                'file_name': self.file_name,
+                'mime_type': mime_type,
+                'content_length': self.request_length,
+                'bytes_received': error.bytes_received,
+                'bytes_skipped': error.bytes_skipped,
+            },
+        )
+        raise error
+
+
+class FileMetadataMixin:
+    """Feed every received chunk into a FileMetadataBuilder."""
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        self.metadata_builder = FileMetadataBuilder(file_name)
+        super().new_file(field_name, file_name, *args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # The memory handler passes chunks through when it is not active
+        if getattr(self, 'activated', True):
+            self.metadata_builder.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file_obj = super().file_complete(file_size)
+        if file_obj is not None:
+            file_obj.metadata = self.metadata_builder.finish()
+        return file_obj
+
+
+class MetadataMemoryFileUploadHandler(FileMetadataMixin, MemoryFileUploadHandler):
+    """In-memory upload handler (small files) that records metadata."""
+
+
+class MetadataTemporaryFileUploadHandler(FileMetadataMixin, TemporaryFileUploadHandler):
+    """Temporary-file upload handler (large files) that records metadata."""
+
+
+def record_rejected_upload(error):
+    try:
+        record_stat('rejected_upload', error.reason)
+        record_stat('upload_bytes_skipped', error.reason, amount=error.bytes_skipped)
+    except Exception:
+        logger.exception("Failed to record rejected upload", extra={'reason': error.reason})
+
+
+class UploadLimitMiddleware:
+    """
+    Answer a request whose upload UploadLimitHandler stopped with 413 or 415,
+    whichever code parsed the body: an earlier middleware (then the view is
+    not called) or the view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        error = getattr(request, 'upload_rejection', None)
+        if error is None:
+            response = self.get_response(request)
+            error = getattr(request, 'upload_rejection', None)
+            if error is None:
+                return response
+        context = request_context.get()
+        if context is not None:
+            context['upload_rejected'] = error.reason
+            context['upload_bytes_skipped'] = error.bytes_skipped
+        record_rejected_upload(error)
+        return JsonResponse({'error': error.message}, status=error.status)
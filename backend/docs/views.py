@@ -1,6 +1,11 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import filters, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from no_dry_starts.bulk_import import run_import
+from no_dry_starts.http_cache import PublicCacheMixin
+from no_dry_starts.search import EstimatedCountPagination
+from no_dry_starts.sparse_fields import SparseFieldsMixin
+from .imports import DocumentImporter
 from .models import Document
 from .serializers import DocumentSerializer, DocumentListSerializer
 
@@ -16,14 +21,23 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return False
 
 
-class DocumentViewSet(viewsets.ModelViewSet):
+class DocumentViewSet(PublicCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for documents (patents, diagrams, investor decks).
     Public can list and download.
     Admin can CRUD documents.
+    Reads accept ?fields= / ?omit= to return only some fields.
+    Anonymous reads are cached by nginx under the 'documents' surrogate key.
+    ?search= matches file name and description (trigram-indexed on PostgreSQL).
     """
     queryset = Document.objects.all()
     permission_classes = [IsAdminOrReadOnly]
+    surrogate_key = 'documents'
+    expanded_serializer_class = DocumentSerializer
+    sparse_field_sources = {'file_url': ['file']}
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['file_name', 'description']
+    pagination_class = EstimatedCountPagination
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -36,3 +50,13 @@ class DocumentViewSet(viewsets.ModelViewSet):
         if category:
             queryset = queryset.filter(category=category)
         return queryset
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_import(self, request):
+        """Create documents in bulk from a CSV or NDJSON body (staff only)"""
+        return run_import(request, DocumentImporter())
@@ -0,0 +1,416 @@
+"""
+Early rejection of junk submissions to the public form endpoints.
+
+``AbuseFilterMiddleware`` sits in front of the lead, RFQ and investor
+download views (ABUSE_FILTER_PATHS) and drops a POST before DRF parses it or
+anything touches the database, cheapest check first:
+
+1. client IP on the denylist (ABUSE_IP_DENYLIST_FILE, IPs or CIDR ranges);
+2. more than ABUSE_IP_RATE submissions from the IP;
+3. a missing, forged, too-quick or stale ``X-Form-Token`` header: the signed
+   time the form was rendered, from GET /api/forms/token/. Being a header,
+   it rejects an RFQ upload before its body is read;
+4. the honeypot field (ABUSE_HONEYPOT_FIELD) filled in, an email on a
+   disposable domain (ABUSE_DISPOSABLE_DOMAINS_FILE), or more than
+   ABUSE_EMAIL_RATE submissions for the email. Multipart bodies (RFQ
+   uploads) are left to the view to parse under the upload limits, and
+   ``screen_parsed_fields`` checks them there;
+5. a form token already used: each one is good for a single submission,
+   given back if the submission fails.
+
+A retry whose Idempotency-Key was already claimed is only checked against
+the denylist: the view answers it from the stored result without running,
+so it uses up no rate budget or form token.
+
+Denylists are held in memory and reloaded when their files change, checked
+at most every ABUSE_DENYLIST_REFRESH_INTERVAL seconds. Rate windows are per
+process: with N workers a client gets up to N times the rate here, and the
+views' own rate limits still apply behind it. Used form tokens are kept in
+the cache, per process with the default local-memory cache. Blocked requests are counted
+per reason in memory and added to the ``blocked`` daily stat every
+ABUSE_COUNTER_FLUSH_INTERVAL seconds from a background thread.
+"""
+
+import ipaddress
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import Counter
+
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import RequestDataTooBig
+from django.db import connection
+from django.http import JsonResponse
+from django.http.multipartparser import MultiPartParserError
+
+from no_dry_starts.log import request_context
+
+from .models import Contact
+from .stats import record_stat
+
+logger = logging.getLogger(__name__)
+
+FORM_TOKEN_SALT = 'inquiries.form-token'
+FORM_TOKEN_HEADER = 'HTTP_X_FORM_TOKEN'
+USED_FORM_TOKEN_PREFIX = 'form-token-used:'
+
+# Filtered path -> scope of its view's @idempotent
+IDEMPOTENCY_SCOPES = {
+    '/api/leads/': 'leads',
+    '/api/rfq/': 'rfq',
+    '/api/investor/request-download/': 'investor_download',
+}
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Keys tracked per rate window before the window is dropped early
+MAX_TRACKED_KEYS = 100_000
+
+# reason -> (status, message)
+REJECTIONS = {
+    'ip_denylist': (403, "Submission rejected"),
+    'ip_rate': (429, "Too many submissions. Please try again later."),
+    'form_token': (400, "Please reload the page and submit the form again."),
+    'too_fast': (403, "Submission rejected"),
+    'form_expired': (400, "This form has expired. Please reload the page and try again."),
+    'form_token_used': (400, "This form was already submitted. Please reload the page to send another."),
+    'honeypot': (403, "Submission rejected"),
+    'disposable_email': (400, "Please use a permanent email address."),
+    'email_rate': (429, "Too many submissions. Please try again later."),
+}
+
+
+def parse_rate(rate):
+    """``"10/h"`` -> (10, 3600); an empty rate is unlimited (None)"""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count), RATE_PERIODS[period[-1]] * int(period[:-1] or 1)
+
+
+def issue_form_token(rendered_at=None):
+    """Signed form render time (Unix seconds) and nonce, to send back as X-Form-Token"""
+    rendered_at = int(time.time() if rendered_at is None else rendered_at)
+    return signing.dumps([rendered_at, secrets.token_urlsafe(12)], salt=FORM_TOKEN_SALT)
+
+
+def read_form_token(token):
+    """(render time, nonce) of an X-Form-Token value, or None if missing or forged"""
+    if not token:
+        return None
+    try:
+        value = signing.loads(token, salt=FORM_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    if not (isinstance(value, list) and len(value) == 2
+            and isinstance(value[0], int) and isinstance(value[1], str)):
+        return None
+    return tuple(value)
+
+
+def form_token_problem(token, now):
+    """Rejection reason for a read_form_token() value, or None if it is acceptable"""
+    if token is None:
+        return 'form_token'
+    age = now - token[0]
+    if age < settings.ABUSE_FORM_TOKEN_MIN_AGE:
+        return 'too_fast'
+    if age > settings.ABUSE_FORM_TOKEN_MAX_AGE:
+        return 'form_expired'
+    return None
+
+
+class WindowCounter:
+    """Hits per key in fixed windows of ``rate``, in this process"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.limit, self.period = parse_rate(rate)
+        self.window = None
+        self.counts = {}
+
+    def hit(self, key, now):
+        """Count a hit; True once ``key`` is over the limit in this window"""
+        window = int(now // self.period)
+        if window != self.window or len(self.counts) >= MAX_TRACKED_KEYS:
+            self.window = window
+            self.counts = {}
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        return count > self.limit
+
+    def retry_after(self, now):
+        return self.period - int(now % self.period)
+
+
+class Denylist:
+    """
+    Entries of a text file (one per line, ``#`` comments), lower-cased and
+    reloaded when the file's modification time changes.
+    """
+
+    def __init__(self, setting):
+        self.setting = setting
+        self.path = None
+        self.mtime = None
+        self.next_check = 0
+        self.entries = frozenset()
+
+    def current(self, now):
+        if now >= self.next_check:
+            self.next_check = now + settings.ABUSE_DENYLIST_REFRESH_INTERVAL
+            self.reload(getattr(settings, self.setting))
+        return self.entries
+
+    def reload(self, path):
+        try:
+            mtime = os.stat(path).st_mtime if path else None
+        except OSError:
+            mtime = None
+        if path == self.path and mtime == self.mtime:
+            return
+        entries = set()
+        if mtime is not None:
+            try:
+                with open(path, encoding='utf-8') as lines:
+                    for line in lines:
+                        entry = line.split('#', 1)[0].strip().lower()
+                        if entry:
+                            entries.add(entry)
+            except OSError:
+                logger.warning("Could not read denylist", extra={'path': str(path)})
+                return
+        self.path, self.mtime = path, mtime
+        self.loaded(entries)
+
+    def loaded(self, entries):
+        self.entries = frozenset(entries)
+
+
+class IPDenylist(Denylist):
+    """Addresses are matched exactly; CIDR ranges are checked only if there are any"""
+
+    networks = ()
+
+    def loaded(self, entries):
+        addresses, networks = set(), []
+        for entry in entries:
+            if '/' in entry:
+                try:
+                    networks.append(ipaddress.ip_network(entry, strict=False))
+                except ValueError:
+                    logger.warning("Invalid denylist range", extra={'entry': entry})
+            else:
+                addresses.add(entry)
+        self.entries = frozenset(addresses)
+        self.networks = tuple(networks)
+
+    def denies(self, ip, now):
+        if ip in self.current(now):
+            return True
+        if self.networks:
+            try:
+                address = ipaddress.ip_address(ip)
+            except ValueError:
+                return False
+            return any(address in network for network in self.networks)
+        return False
+
+
+def is_disposable(email, domains):
+    """True if the email's domain, or a domain it is under, is listed"""
+    domain = email.rpartition('@')[2].strip().lower().rstrip('.')
+    while domain:
+        if domain in domains:
+            return True
+        domain = domain.partition('.')[2]
+    return False
+
+
+def flush_blocked(counts):
+    try:
+        for reason, amount in counts.items():
+            record_stat('blocked', reason, amount=amount)
+    except Exception:
+        logger.exception("Failed to record blocked submissions", extra={'counts': dict(counts)})
+    finally:
+        connection.close()
+
+
+class AbuseFilter:
+    """Checks and counters shared by every request in this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        self.reset()
+
+    def reset(self):
+        """Forget denylists, rate windows and unflushed counts (tests)"""
+        self.ip_denylist = IPDenylist('ABUSE_IP_DENYLIST_FILE')
+        self.disposable_domains = Denylist('ABUSE_DISPOSABLE_DOMAINS_FILE')
+        self.windows = {}
+        self.blocked = Counter()
+
+    def window(self, setting):
+        rate = getattr(settings, setting)
+        counter = self.windows.get(setting)
+        if counter is None or counter.rate != rate:
+            counter = self.windows[setting] = WindowCounter(rate) if rate else None
+        return counter
+
+    def client_ip(self, request):
+        header = settings.ABUSE_CLIENT_IP_HEADER
+        return (header and request.META.get(header)) or request.META.get('REMOTE_ADDR', '')
+
+    def check(self, request):
+        """Rejection reason for ``request``, or None to let it through"""
+        now = time.time()
+        ip = self.client_ip(request)
+        if self.ip_denylist.denies(ip, now):
+            return 'ip_denylist'
+        if is_claimed_retry(request):
+            return None
+        ip_window = self.window('ABUSE_IP_RATE')
+        if ip_window and ip_window.hit(ip, now):
+            return 'ip_rate'
+        token = read_form_token(request.META.get(FORM_TOKEN_HEADER))
+        problem = form_token_problem(token, now)
+        if problem:
+            return problem
+
+        if request.content_type == 'multipart/form-data':
+            # Parsed by the view under the upload limits; see screen_parsed_fields
+            request.abuse_fields_deferred = True
+        else:
+            fields = submitted_fields(request)
+            # Unreadable fields are reported by the view
+            problem = self.check_fields(fields, now) if fields is not None else None
+            if problem:
+                return problem
+        return self.use_form_token(request, token[1])
+
+    def check_fields(self, fields, now):
+        """Rejection reason for the submitted form fields, or None"""
+        if fields.get(settings.ABUSE_HONEYPOT_FIELD):
+            return 'honeypot'
+        email = fields.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+        if is_disposable(email, self.disposable_domains.current(now)):
+            return 'disposable_email'
+        email_window = self.window('ABUSE_EMAIL_RATE')
+        if email_window and email_window.hit(Contact.normalize_email(email), now):
+            return 'email_rate'
+        return None
+
+    def use_form_token(self, request, nonce):
+        """Mark the form token used; 'form_token_used' if it already was"""
+        key = f'{USED_FORM_TOKEN_PREFIX}{nonce}'
+        if not cache.add(key, True, settings.ABUSE_FORM_TOKEN_MAX_AGE):
+            return 'form_token_used'
+        request.used_form_token = key
+        return None
+
+    def release_form_token(self, request):
+        """Let the form token be used again after a failed submission"""
+        key = getattr(request, 'used_form_token', None)
+        if key:
+            cache.delete(key)
+
+    def count(self, reason):
+        self.blocked[reason] += 1
+
+    def maybe_flush(self):
+        """Hand the blocked counts to a background thread once per interval"""
+        if not self.blocked:
+            return
+        now = time.monotonic()
+        if now - self.last_flush < settings.ABUSE_COUNTER_FLUSH_INTERVAL:
+            return
+        with self.lock:
+            if now - self.last_flush < settings.ABUSE_COUNTER_FLUSH_INTERVAL:
+                return
+            counts, self.blocked = self.blocked, Counter()
+            self.last_flush = now
+        threading.Thread(target=flush_blocked, args=(counts,), name='abuse-counts', daemon=True).start()
+
+    def reject(self, request, reason):
+        self.count(reason)
+        context = request_context.get()
+        if context is not None:
+            context['blocked'] = reason
+        status, message = REJECTIONS[reason]
+        response = JsonResponse({'error': message}, status=status)
+        if status == 429:
+            setting = 'ABUSE_IP_RATE' if reason == 'ip_rate' else 'ABUSE_EMAIL_RATE'
+            response['Retry-After'] = str(self.windows[setting].retry_after(time.time()))
+        return response
+
+
+def is_claimed_retry(request):
+    """True if the request's Idempotency-Key is already claimed by this client"""
+    from .idempotency import is_claimed
+
+    scope = IDEMPOTENCY_SCOPES.get(request.path_info)
+    return scope is not None and is_claimed(scope, request)
+
+
+def submitted_fields(request):
+    """Form fields of a JSON or form-encoded POST, or None if they can't be read"""
+    content_type = request.content_type or ''
+    try:
+        if content_type == 'application/json':
+            data = json.loads(request.body or b'{}')
+            return data if isinstance(data, dict) else None
+        if content_type == 'application/x-www-form-urlencoded':
+            return request.POST
+    except (ValueError, RequestDataTooBig, MultiPartParserError):
+        return None
+    return None
+
+
+def screen_parsed_fields(view_func):
+    """
+    Run the field checks the middleware left for a multipart body on the
+    fields the view parsed, so the upload is read once, under its limits.
+    Apply inside @idempotent, like the rate limits.
+    """
+
+    @wraps(view_func)
+    def wrapped(request, *args, **kwargs):
+        if getattr(request, 'abuse_fields_deferred', False):
+            reason = abuse_filter.check_fields(request.data, time.time())
+            if reason:
+                return abuse_filter.reject(request, reason)
+        return view_func(request, *args, **kwargs)
+
+    return wrapped
+
+
+abuse_filter = AbuseFilter()
+
+
+class AbuseFilterMiddleware:
+    """Reject junk POSTs to ABUSE_FILTER_PATHS before they reach the views"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method != 'POST' or request.path_info not in settings.ABUSE_FILTER_PATHS:
+            return self.get_response(request)
+        abuse_filter.maybe_flush()
+        reason = abuse_filter.check(request)
+        if reason:
+            return abuse_filter.reject(request, reason)
+        response = self.get_response(request)
+        if response.status_code >= 400:
+            abuse_filter.release_form_token(request)
+        return response
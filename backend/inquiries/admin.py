@@ -1,16 +1,54 @@
 from django.contrib import admin
-from .models import Lead, RFQSubmission
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from no_dry_starts.search import EstimatedCountPaginator
+from .models import Contact, Lead, RFQSubmission
+
+
+class ContactEmailSearchMixin:
+    """
+    Also match a complete email address through the indexed contact key, so
+    differently written forms of it are found; the usual search still runs.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        term = search_term.strip()
+        try:
+            validate_email(term)
+        except ValidationError:
+            return results, may_have_duplicates
+        lookup = 'email_key' if queryset.model is Contact else 'contact__email_key'
+        return results | queryset.filter(**{lookup: Contact.normalize_email(term)}), may_have_duplicates
+
+
+@admin.register(Contact)
+class ContactAdmin(ContactEmailSearchMixin, admin.ModelAdmin):
+    list_display = ['email', 'full_name', 'investor_requests', 'last_seen_at']
+    search_fields = ['full_name', 'email_key']
+    readonly_fields = [
+        'email_key', 'investor_requests', 'first_investor_request_at', 'last_investor_request_at',
+        'created_at', 'last_seen_at',
+    ]
 
 
 @admin.register(Lead)
-class LeadAdmin(admin.ModelAdmin):
+class LeadAdmin(ContactEmailSearchMixin, admin.ModelAdmin):
     list_display = ['full_name', 'email', 'inquiry_type', 'created_at']
     list_filter = ['inquiry_type', 'created_at']
     search_fields = ['full_name', 'email', 'message']
+    raw_id_fields = ['contact']
+    # Searches use the trigram indexes; counts are estimated on large tables
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(RFQSubmission)
-class RFQSubmissionAdmin(admin.ModelAdmin):
+class RFQSubmissionAdmin(ContactEmailSearchMixin, admin.ModelAdmin):
     list_display = ['full_name', 'email', 'company', 'created_at']
     list_filter = ['created_at']
     search_fields = ['full_name', 'email', 'company', 'message']
+    raw_id_fields = ['contact']
+    # Searches use the trigram indexes; counts are estimated on large tables
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,116 @@
+"""
+Circuit breaker for calls to external services (currently the Resend API).
+
+State is kept in a ``CircuitBreakerState`` row so every worker sees the same
+failures. After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures the
+circuit opens for CIRCUIT_BREAKER_RESET_TIMEOUT seconds, during which callers
+are refused immediately. Each process also remembers when the circuit it last
+saw open will close, so refusals don't touch the database, and trusts a
+closed circuit for CIRCUIT_BREAKER_CLOSED_CACHE_TTL seconds, so neither do
+most calls while the service is healthy. When the timeout
+passes, a single caller across all workers is allowed through as a probe: its
+success closes the circuit, its failure opens it again.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CircuitBreakerState
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    def __init__(self, name):
+        self.name = name
+        # Process-local copy of the shared opened_until
+        self.open_until = None
+        # Until when this process assumes the circuit is closed without looking
+        self.closed_until = None
+
+    def _state(self):
+        state, _ = CircuitBreakerState.objects.get_or_create(name=self.name)
+        return state
+
+    def _rows(self):
+        return CircuitBreakerState.objects.filter(name=self.name)
+
+    def _known_closed(self, now):
+        return self.closed_until is not None and now < self.closed_until
+
+    def _saw_closed(self, now):
+        self.open_until = None
+        self.closed_until = now + timedelta(seconds=settings.CIRCUIT_BREAKER_CLOSED_CACHE_TTL)
+
+    def is_open(self):
+        """True while calls are being refused (no probe is claimed)."""
+        now = timezone.now()
+        if self.open_until and now < self.open_until:
+            return True
+        if self._known_closed(now):
+            return False
+        state = self._state()
+        if state.opened_until and now < state.opened_until:
+            self.open_until = state.opened_until
+            return True
+        if state.opened_until is None:
+            self._saw_closed(now)
+        else:
+            self.open_until = None
+        return False
+
+    def retry_after(self):
+        """Seconds until the circuit may close, for Retry-After headers."""
+        if not self.open_until:
+            return 1
+        return max(int((self.open_until - timezone.now()).total_seconds()) + 1, 1)
+
+    def allow(self):
+        """Return True if a call may be made now."""
+        now = timezone.now()
+        if self.open_until and now < self.open_until:
+            return False
+        if self._known_closed(now):
+            return True
+        state = self._state()
+        if state.opened_until is None:
+            self._saw_closed(now)
+            return True
+        if now < state.opened_until:
+            self.open_until = state.opened_until
+            return False
+
+        # Half-open: claim the probe so only one caller tests the service
+        probe_until = now + timedelta(seconds=settings.CIRCUIT_BREAKER_PROBE_TIMEOUT)
+        claimed = self._rows().filter(
+            opened_until__lte=now,
+        ).filter(
+            Q(probe_until__isnull=True) | Q(probe_until__lte=now)
+        ).update(probe_until=probe_until)
+        return bool(claimed)
+
+    def record_success(self):
+        self.open_until = None
+        reset = self._rows().exclude(
+            failures=0, opened_until__isnull=True, probe_until__isnull=True
+        ).update(failures=0, opened_until=None, probe_until=None)
+        if reset:
+            logger.info("Circuit breaker reset", extra={"circuit": self.name})
+
+    def record_failure(self):
+        now = timezone.now()
+        self._rows().update(failures=F('failures') + 1)
+        state = self._state()
+        # A failed probe reopens at once; otherwise open after enough failures
+        if state.opened_until is not None or state.failures >= settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+            self.open_until = now + timedelta(seconds=settings.CIRCUIT_BREAKER_RESET_TIMEOUT)
+            self.closed_until = None
+            self._rows().update(opened_until=self.open_until, probe_until=None)
+            logger.warning(
+                "Circuit breaker opened",
+                extra={"circuit": self.name, "failures": state.failures, "open_until": self.open_until},
+            )
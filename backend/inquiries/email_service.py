@@ -2,16 +2,71 @@
 Email service using Resend for sending transactional emails.
 """
 
-import os
+import logging
+import time
+import uuid
+from datetime import timedelta
+from html import escape
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .circuit_breaker import CircuitBreaker
 
 try:
+    import requests
     import resend
+    from resend.exceptions import ResendError
+    from resend.http_client import HTTPClient
     RESEND_AVAILABLE = True
 except ImportError:
     RESEND_AVAILABLE = False
 
 
+logger = logging.getLogger(__name__)
+
+email_circuit = CircuitBreaker("resend")
+
+# A digest run still holding its claim after this long has died; its rows are
+# claimed again by the next run
+DIGEST_CLAIM_TIMEOUT = timedelta(minutes=15)
+
+
+if RESEND_AVAILABLE:
+    class ResendHTTPClient(HTTPClient):
+        """
+        Resend transport with a pooled session and explicit connect/read
+        timeouts, so a slow provider can't hold a worker for long.
+        """
+
+        def __init__(self):
+            self.session = requests.Session()
+
+        def request(self, method, url, headers, json=None):
+            response = self.session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                json=json,
+                timeout=(settings.EMAIL_CONNECT_TIMEOUT, settings.EMAIL_READ_TIMEOUT),
+            )
+            return response.content, response.status_code, response.headers
+
+    resend.default_http_client = ResendHTTPClient()
+
+
+def is_provider_failure(error):
+    """Timeouts, connection errors, 429s and 5xx count against the circuit; bad input doesn't."""
+    if not isinstance(error, ResendError):
+        return True
+    try:
+        code = int(error.code)
+    except (TypeError, ValueError):
+        return True
+    return code == 429 or code >= 500
+
+
 def send_email(to_email, subject, message, html=None):
     """
     Send email using Resend API.
@@ -23,15 +78,16 @@ def send_email(to_email, subject, message, html=None):
         html: Optional HTML email body
 
     Returns:
-        dict: Response from Resend API
+        dict: Response from Resend API. While the circuit breaker is open this
+        returns {"error": ..., "circuit_open": True} without calling Resend.
     """
     if not RESEND_AVAILABLE:
-        print("Resend package not installed")
+        logger.warning("Resend package not installed; email not sent", extra={"subject": subject})
         return {"error": "Email service not available"}
 
     api_key = settings.RESEND_API_KEY
     if not api_key:
-        print("RESEND_API_KEY not configured")
+        logger.warning("RESEND_API_KEY not configured; email not sent", extra={"subject": subject})
         return {"error": "Email service not configured"}
 
     # Set the API key
@@ -41,6 +97,11 @@ def send_email(to_email, subject, message, html=None):
     if isinstance(to_email, str):
         to_email = [to_email]
 
+    if not email_circuit.allow():
+        logger.warning("Email circuit open; email not sent", extra={"subject": subject})
+        return {"error": "Email service temporarily unavailable", "circuit_open": True}
+
+    started = time.perf_counter()
     try:
         response = resend.Emails.send({
             "from": settings.DEFAULT_FROM_EMAIL,
@@ -49,14 +110,149 @@ def send_email(to_email, subject, message, html=None):
             "text": message,
             "html": html or message,
         })
+        email_circuit.record_success()
+        logger.info(
+            "Email sent",
+            extra={
+                "subject": subject,
+                "recipients": len(to_email),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            },
+        )
         return response
     except Exception as e:
-        print(f"Failed to send email via Resend: {e}")
-        import traceback
-        traceback.print_exc()
+        if is_provider_failure(e):
+            email_circuit.record_failure()
+        else:
+            email_circuit.record_success()
+        logger.warning(
+            "Failed to send email via Resend: %s",
+            e,
+            exc_info=True,
+            extra={
+                "subject": subject,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            },
+        )
         return {"error": str(e)}
 
 
+def notify_admins(kind, to_email, subject, message, html=None):
+    """
+    Send an admin notification, or hold it for the next digest once the
+    hourly instant budget (ADMIN_NOTIFICATION_INSTANT_LIMIT) is used up.
+
+    Args:
+        kind: AdminNotification kind ("inquiry", "rfq", "investor_request")
+        to_email: Recipient email address or list of addresses
+        subject: Email subject
+        message: Plain text email body
+        html: Optional HTML email body
+
+    Returns:
+        dict: Response from Resend API, or {"queued": True} when digested
+    """
+    from .models import AdminNotification
+
+    if isinstance(to_email, str):
+        to_email = [to_email]
+
+    limit = settings.ADMIN_NOTIFICATION_INSTANT_LIMIT
+    if limit is None:
+        return send_email(to_email=to_email, subject=subject, message=message, html=html)
+
+    hour_ago = timezone.now() - timedelta(hours=1)
+    sent_this_hour = AdminNotification.objects.filter(
+        instant=True, sent_at__gte=hour_ago
+    ).count()
+    # Hold notifications for the digest while the email provider is down
+    instant = sent_this_hour < limit and not email_circuit.is_open()
+
+    notification = AdminNotification.objects.create(
+        kind=kind,
+        recipients=to_email,
+        subject=subject,
+        message=message,
+        html=html or "",
+        instant=instant,
+        sent_at=timezone.now() if instant else None,
+    )
+
+    if instant:
+        response = send_email(to_email=to_email, subject=subject, message=message, html=html)
+        if isinstance(response, dict) and response.get("circuit_open"):
+            AdminNotification.objects.filter(pk=notification.pk).update(instant=False, sent_at=None)
+            return {"queued": True}
+        return response
+
+    # Flush here too, so digests go out even without a scheduled worker
+    oldest = (
+        AdminNotification.objects.filter(sent_at__isnull=True, digest_batch__isnull=True)
+        .values_list("created_at", flat=True)
+        .first()
+    )
+    interval = timedelta(seconds=settings.ADMIN_NOTIFICATION_DIGEST_INTERVAL)
+    if oldest and oldest <= timezone.now() - interval:
+        transaction.on_commit(send_notification_digests)
+    return {"queued": True}
+
+
+def send_notification_digests():
+    """
+    Send every held admin notification as one summary email per recipient
+    list. Safe to run concurrently: each run claims its rows first.
+
+    Returns:
+        int: Number of notifications sent in digests
+    """
+    from .models import AdminNotification
+
+    batch = uuid.uuid4()
+    now = timezone.now()
+    claimed = AdminNotification.objects.filter(sent_at__isnull=True).filter(
+        Q(digest_batch__isnull=True) | Q(digest_claimed_at__lt=now - DIGEST_CLAIM_TIMEOUT)
+    ).update(digest_batch=batch, digest_claimed_at=now)
+    if not claimed:
+        return 0
+
+    notifications = list(AdminNotification.objects.filter(digest_batch=batch))
+    groups = {}
+    sent = 0
+    for notification in notifications:
+        groups.setdefault(tuple(sorted(notification.recipients)), []).append(notification)
+
+    for recipients, items in groups.items():
+        subject = f"{len(items)} New Notifications - No Dry Starts®"
+        message = f"{len(items)} notifications were received since the last summary:\n\n"
+        message += "\n\n".join(
+            f"=== {item.subject} ===\n{item.message.strip()}" for item in items
+        )
+        html = f"""
+    <div style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <h2>{len(items)} New Notifications - No Dry Starts®</h2>
+        <p>Received since the last summary:</p>
+        {'<hr>'.join(item.html or f'<pre>{escape(item.message)}</pre>' for item in items)}
+    </div>
+    """
+        response = send_email(to_email=list(recipients), subject=subject, message=message, html=html)
+        if isinstance(response, dict) and "error" in response:
+            logger.warning(
+                "Digest not sent; will retry",
+                extra={"notifications": len(items), "error": response["error"]},
+            )
+            # Release the claim so the next run retries this group
+            AdminNotification.objects.filter(
+                pk__in=[item.pk for item in items]
+            ).update(digest_batch=None, digest_claimed_at=None)
+            continue
+        AdminNotification.objects.filter(
+            pk__in=[item.pk for item in items]
+        ).update(sent_at=timezone.now())
+        sent += len(items)
+
+    return sent
+
+
 def send_inquiry_notification(lead):
     """
     Send notification email for new inquiry submission.
@@ -100,7 +296,8 @@ Received: {lead.created_at}
     </div>
     """
 
-    return send_email(
+    return notify_admins(
+        "inquiry",
         to_email=settings.INQUIRY_NOTIFICATION_EMAIL,
         subject=subject,
         message=message,
@@ -159,7 +356,7 @@ Received: {rfq.created_at}
     # Send to both admin and RFQ notification email
     to_emails = [settings.ADMIN_EMAIL, settings.RFQ_NOTIFICATION_EMAIL]
 
-    return send_email(to_email=to_emails, subject=subject, message=message, html=html)
+    return notify_admins("rfq", to_email=to_emails, subject=subject, message=message, html=html)
 
 
 def send_investor_download_link(email, download_url, token_expires):
@@ -257,6 +454,10 @@ Download URL: {download_url}
     </div>
     """
 
-    return send_email(
-        to_email=settings.ADMIN_EMAIL, subject=subject, message=message, html=html
+    return notify_admins(
+        "investor_request",
+        to_email=settings.ADMIN_EMAIL,
+        subject=subject,
+        message=message,
+        html=html,
     )
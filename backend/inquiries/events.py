@@ -0,0 +1,205 @@
+"""
+Fan-out of new lead / RFQ events to the admin panel's server-sent event streams.
+
+Each process runs at most one background listener shared by all of its open
+streams. On PostgreSQL the listener waits on ``LISTEN inquiry_events`` and new
+rows are announced with ``pg_notify`` when their transaction commits, so
+events reach every process whichever worker handled the submission. Other
+databases (SQLite in development) fall back to a single poller that checks for
+rows created since the last poll.
+
+``EventSource`` cannot send an Authorization header, so a stream is opened
+with a ticket from POST /api/events/ticket/: signed, valid for
+INQUIRY_EVENTS_TICKET_TTL seconds and accepted once, so one that ends up in an
+access log is of no use.
+"""
+
+import asyncio
+import json
+import secrets
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import close_old_connections, connection, connections
+from django.db.models import Q
+from django.utils import timezone
+
+CHANNEL = 'inquiry_events'
+
+# pg_notify payloads are limited to 8000 bytes
+MESSAGE_PREVIEW_LENGTH = 500
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Rows fetched per table on each poll
+POLL_BATCH_SIZE = 100
+
+TICKET_SALT = 'inquiries.events-ticket'
+
+
+def issue_stream_ticket(user):
+    """Signed single-use ticket to open the event stream as ``user``"""
+    return signing.dumps({'user': user.pk, 'nonce': secrets.token_urlsafe(16)}, salt=TICKET_SALT)
+
+
+def redeem_stream_ticket(ticket):
+    """Id of the user a ticket was issued to, or None if forged, expired or used"""
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.INQUIRY_EVENTS_TICKET_TTL)
+    except signing.BadSignature:
+        return None
+    # Streams are served by the one events process, whose cache remembers spent tickets
+    if not cache.add(f"events-ticket:{data['nonce']}", True, settings.INQUIRY_EVENTS_TICKET_TTL):
+        return None
+    return data['user']
+
+
+def lead_event(lead):
+    return {
+        'type': 'lead',
+        'id': str(lead.id),
+        'full_name': lead.full_name,
+        'email': lead.email,
+        'phone': lead.phone,
+        'inquiry_type': lead.inquiry_type,
+        'message': lead.message[:MESSAGE_PREVIEW_LENGTH],
+        'created_at': lead.created_at.isoformat(),
+    }
+
+
+def rfq_event(rfq):
+    return {
+        'type': 'rfq',
+        'id': str(rfq.id),
+        'full_name': rfq.full_name,
+        'email': rfq.email,
+        'phone': rfq.phone,
+        'company': rfq.company,
+        'message': rfq.message[:MESSAGE_PREVIEW_LENGTH],
+        'has_attachment': bool(rfq.attachment),
+        'created_at': rfq.created_at.isoformat(),
+    }
+
+
+def publish(event):
+    """Announce a committed submission to every process's listener."""
+    if connection.vendor != 'postgresql':
+        # Pollers pick the row up from the database
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(event)])
+
+
+class EventBroker:
+    """Per-process registry of SSE subscriber queues fed by one listener thread."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.add((loop, queue))
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='inquiry-events', daemon=True
+                )
+                self.thread.start()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers = {
+                (loop, q) for loop, q in self.subscribers if q is not queue
+            }
+
+    def keep_running(self):
+        """Checked by the listener thread; lets it exit once nobody is subscribed."""
+        with self.lock:
+            if self.subscribers:
+                return True
+            self.thread = None
+            return False
+
+    def dispatch(self, payload):
+        """Hand a JSON payload to every subscriber (called from the listener thread)."""
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, payload)
+
+    @staticmethod
+    def _offer(queue, payload):
+        # A stalled client must not hold up the others; drop its oldest event
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(payload)
+
+    def run(self):
+        if connections['default'].vendor == 'postgresql':
+            self.listen()
+        else:
+            self.poll()
+
+    def listen(self):
+        db = connections['default']
+        raw = db.get_new_connection(db.get_connection_params())
+        raw.autocommit = True
+        try:
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            while self.keep_running():
+                if select.select([raw], [], [], 5) == ([], [], []):
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    self.dispatch(raw.notifies.pop(0).payload)
+        finally:
+            raw.close()
+
+    def poll(self):
+        from .models import Lead, RFQSubmission
+
+        now = timezone.now()
+        cursors = {Lead: (now, None), RFQSubmission: (now, None)}
+        try:
+            while self.keep_running():
+                time.sleep(settings.INQUIRY_EVENTS_POLL_INTERVAL)
+                close_old_connections()
+                for event in poll_events(cursors):
+                    self.dispatch(json.dumps(event))
+        finally:
+            connections.close_all()
+
+
+def poll_events(cursors):
+    """
+    Events for rows created after each table's cursor, oldest first.
+    ``cursors`` maps a model to the (created_at, id) of the last row announced
+    and is advanced; ids are UUIDv7, so rows created in the same instant
+    still have an order.
+    """
+    from .models import Lead
+
+    events = []
+    for model, (created_at, last_id) in cursors.items():
+        after = Q(created_at__gt=created_at)
+        if last_id is not None:
+            after |= Q(created_at=created_at, id__gt=last_id)
+        rows = list(model.objects.filter(after).order_by('created_at', 'id')[:POLL_BATCH_SIZE])
+        if rows:
+            cursors[model] = (rows[-1].created_at, rows[-1].id)
+            to_event = lead_event if model is Lead else rfq_event
+            events += [(row.created_at, to_event(row)) for row in rows]
+    events.sort(key=lambda item: item[0])
+    return [event for _, event in events]
+
+
+broker = EventBroker()
@@ -0,0 +1,292 @@
+"""
+Background export jobs for leads and RFQ submissions.
+
+An export is written to a temporary file in chunks straight from a database
+iterator, then saved to the private ``exports`` storage. Jobs are keyed by a
+fingerprint of the requested resource, format and current table state, so
+identical concurrent requests share one job and a finished artifact is reused
+until rows are added, edited or deleted. A job pending or running for longer
+than EXPORT_JOB_TIMEOUT is marked failed, so one whose thread or worker died
+does not hold up identical requests. Months moved to the cold archive (see ``partitions``) are
+appended after the live rows.
+"""
+
+import csv
+import gzip
+import io
+import logging
+import tempfile
+import threading
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+try:
+    from openpyxl import Workbook
+    XLSX_AVAILABLE = True
+except ImportError:
+    XLSX_AVAILABLE = False
+
+from .models import ExportJob, Lead, RFQSubmission
+from .partitions import archived_records
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+
+FILE_EXTENSIONS = {
+    'csv': 'csv',
+    'csv_gz': 'csv.gz',
+    'parquet': 'parquet',
+    'xlsx': 'xlsx',
+}
+
+
+def lead_rows(leads):
+    for lead in leads:
+        yield [
+            str(lead.id),
+            lead.full_name,
+            lead.email,
+            lead.phone or "",
+            lead.get_inquiry_type_display(),
+            lead.message,
+            lead.created_at,
+        ]
+
+
+def rfq_rows(rfqs):
+    for rfq in rfqs:
+        yield [
+            str(rfq.id),
+            rfq.full_name,
+            rfq.email,
+            rfq.phone,
+            rfq.company or "",
+            rfq.message,
+            "Yes" if rfq.attachment else "No",
+            rfq.created_at,
+        ]
+
+
+# resource -> (model, column headers, row generator)
+RESOURCES = {
+    'leads': (
+        Lead,
+        ["ID", "Full Name", "Email", "Phone", "Inquiry Type", "Message", "Created At"],
+        lead_rows,
+    ),
+    'rfqs': (
+        RFQSubmission,
+        ["ID", "Full Name", "Email", "Phone", "Company", "Message", "Has Attachment", "Created At"],
+        rfq_rows,
+    ),
+}
+
+
+def available_formats():
+    formats = ['csv', 'csv_gz']
+    if PARQUET_AVAILABLE:
+        formats.append('parquet')
+    if XLSX_AVAILABLE:
+        formats.append('xlsx')
+    return formats
+
+
+def table_fingerprint(resource, export_format):
+    """Identify the requested export together with the current table state."""
+    model = RESOURCES[resource][0]
+    # updated_at is set on create and on every save, so edits change it too
+    state = model.objects.aggregate(rows=Count('pk'), latest=Max('updated_at'))
+    latest = state['latest'].isoformat() if state['latest'] else '-'
+    return f"{resource}:{export_format}:{state['rows']}:{latest}"
+
+
+def _text_rows(rows):
+    for row in rows:
+        yield [
+            value.strftime("%Y-%m-%d %H:%M:%S") if hasattr(value, 'strftime') else value
+            for value in row
+        ]
+
+
+def write_csv(output, headers, rows):
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(headers)
+    writer.writerows(_text_rows(rows))
+    text.flush()
+    text.detach()
+
+
+def write_csv_gz(output, headers, rows):
+    with gzip.GzipFile(fileobj=output, mode='wb', mtime=0) as compressed:
+        write_csv(compressed, headers, rows)
+
+
+def write_parquet(output, headers, rows):
+    # Created At is the last column in every resource; keep it as a real timestamp
+    schema = pyarrow.schema(
+        [(name, pyarrow.string()) for name in headers[:-1]]
+        + [(headers[-1], pyarrow.timestamp('us', tz='UTC'))]
+    )
+    with pyarrow.parquet.ParquetWriter(output, schema, compression='zstd') as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= CHUNK_SIZE:
+                writer.write_batch(_record_batch(schema, batch))
+                batch = []
+        if batch:
+            writer.write_batch(_record_batch(schema, batch))
+
+
+def _record_batch(schema, batch):
+    columns = list(zip(*batch))
+    return pyarrow.record_batch(
+        [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+def write_xlsx(output, headers, rows):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(headers)
+    for row in _text_rows(rows):
+        sheet.append(row)
+    workbook.save(output)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'csv_gz': write_csv_gz,
+    'parquet': write_parquet,
+    'xlsx': write_xlsx,
+}
+
+
+def stale_cutoff():
+    return timezone.now() - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)
+
+
+def fail_stale_jobs(jobs=None):
+    """
+    Mark jobs past EXPORT_JOB_TIMEOUT failed (never started, or not finished
+    in time), freeing their fingerprint; returns how many.
+    """
+    cutoff = stale_cutoff()
+    jobs = ExportJob.objects.all() if jobs is None else jobs
+    return jobs.filter(
+        Q(status='pending', created_at__lt=cutoff) | Q(status='running', started_at__lt=cutoff)
+    ).update(status='failed', error="Timed out", completed_at=timezone.now())
+
+
+def get_or_create_export_job(resource, export_format, user=None):
+    """
+    Return ``(job, created)``. A pending or running job for the same export,
+    or a recent finished one while no rows have changed, is reused.
+    """
+    fingerprint = table_fingerprint(resource, export_format)
+    fresh_since = timezone.now() - timedelta(seconds=settings.EXPORT_ARTIFACT_MAX_AGE)
+    existing = ExportJob.objects.filter(fingerprint=fingerprint).filter(
+        Q(status__in=ExportJob.ACTIVE_STATUSES)
+        | Q(status='completed', completed_at__gte=fresh_since)
+    ).first()
+    if existing and existing.status in ExportJob.ACTIVE_STATUSES:
+        if (existing.started_at or existing.created_at) < stale_cutoff():
+            fail_stale_jobs(ExportJob.objects.filter(pk=existing.pk))
+            existing = None
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = ExportJob.objects.create(
+                resource=resource,
+                format=export_format,
+                fingerprint=fingerprint,
+                requested_by=user,
+            )
+    except IntegrityError:
+        # An identical request created the job concurrently; it may have
+        # finished since, so take the latest job whatever its status
+        return ExportJob.objects.filter(fingerprint=fingerprint).order_by('-created_at').first(), False
+
+    transaction.on_commit(lambda: start_export_job(job))
+    return job, True
+
+
+def run_export_job(job):
+    """Write the export for ``job`` and store the finished artifact."""
+    # Claim the job so a thread and a worker never both run it
+    if not ExportJob.objects.filter(pk=job.pk, status='pending').update(
+        status='running', started_at=timezone.now()
+    ):
+        return
+    model, headers, row_generator = RESOURCES[job.resource]
+    # Newest first: live rows, then archived months
+    records = chain(
+        model.objects.order_by('-id').iterator(chunk_size=CHUNK_SIZE),
+        archived_records(model),
+    )
+
+    try:
+        with tempfile.TemporaryFile() as output:
+            counter = {'rows': 0}
+
+            def counted(rows):
+                for row in rows:
+                    counter['rows'] += 1
+                    yield row
+
+            WRITERS[job.format](output, headers, counted(row_generator(records)))
+            output.seek(0)
+            stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+            name = f"{job.resource}_export_{stamp}.{FILE_EXTENSIONS[job.format]}"
+            job.file.save(name, File(output), save=False)
+
+        job.row_count, job.status, job.completed_at = counter['rows'], 'completed', timezone.now()
+        finished = ExportJob.objects.filter(pk=job.pk, status='running').update(
+            file=job.file.name, row_count=job.row_count, status=job.status, completed_at=job.completed_at
+        )
+        if not finished:
+            # Timed out meanwhile and marked failed; the artifact is not served
+            job.file.delete(save=False)
+            logger.warning("Export job finished after timing out", extra={"job_id": str(job.pk)})
+            return
+        logger.info(
+            "Export job completed",
+            extra={"job_id": str(job.pk), "rows": job.row_count, "format": job.format},
+        )
+    except Exception as e:
+        logger.exception("Export job failed", extra={"job_id": str(job.pk)})
+        ExportJob.objects.filter(pk=job.pk, status='running').update(
+            status='failed', error=str(e), completed_at=timezone.now()
+        )
+
+
+def start_export_job(job):
+    """Run a job outside the request, in a thread, unless a separate worker handles it."""
+    if not settings.EXPORT_JOBS_IN_PROCESS:
+        return
+
+    def target():
+        try:
+            run_export_job(job)
+        finally:
+            connection.close()
+
+    threading.Thread(target=target, name=f'export-{job.pk}', daemon=True).start()
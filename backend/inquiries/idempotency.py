@@ -0,0 +1,209 @@
+"""
+Idempotency-Key support for the public submission endpoints.
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets the
+first response back instead of a second row, token or email, and the retry is
+answered before the rate limiter sees it.
+
+Keys are claimed by inserting an ``IdempotencyKey`` row under a unique
+constraint, so concurrent duplicates are settled by the database without
+``SELECT ... FOR UPDATE``: whoever loses the insert replays the stored
+response, or gets 409 Conflict while the first request is still running.
+Finished responses are also kept in the cache so most replays never reach the
+database.
+
+Keys are scoped to the client (the user, or else the client IP), so one
+client can neither replay nor block another client's submission by reusing
+its key.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .abuse import abuse_filter
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def client_scope(scope, request):
+    """``scope`` narrowed to the client sending ``request``"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        client = f'user:{user.pk}'
+    else:
+        client = f'ip:{abuse_filter.client_ip(request)}'
+    # Hashed to fit IdempotencyKey.scope and to keep IPs out of the table
+    return f"{scope}:{hashlib.sha256(client.encode()).hexdigest()[:16]}"
+
+
+def _cache_key(scope, key):
+    digest = hashlib.sha256(f'{scope}:{key}'.encode()).hexdigest()
+    return f'idempotency:{digest}'
+
+
+def _describe_value(value):
+    # Uploaded files are identified by name and size rather than content
+    if hasattr(value, 'size') and hasattr(value, 'name'):
+        return [value.name, value.size]
+    return str(value)
+
+
+def request_fingerprint(request):
+    """Hash the submitted fields so a key reused for a different request is caught."""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps(data, sort_keys=True, default=_describe_value)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim(scope, key, fingerprint):
+    """
+    Return ``(record, claimed)``. ``claimed`` is True when this request owns
+    the key and must run; otherwise ``record`` is the existing claim (or None
+    if it vanished while we looked).
+    """
+    record = None
+    for _ in range(2):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                # Short lease while running, so a crashed worker doesn't hold the key for the full TTL
+                return IdempotencyKey.objects.create(
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE),
+                ), True
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if record is None:
+            continue  # released in the meantime
+        if record.expires_at > now:
+            return record, False
+        # Expired: remove exactly that row and race for the key again
+        IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+    return record, False
+
+
+def is_claimed(scope, request):
+    """
+    True if ``request`` carries an Idempotency-Key this client already
+    claimed for ``scope``: the view will replay the stored response, or
+    answer 409 or 422, without running again.
+    """
+    key = (request.headers.get(HEADER) or '').strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return False
+    request_scope = client_scope(scope, request)
+    if cache.get(_cache_key(request_scope, key)) is not None:
+        return True
+    return IdempotencyKey.objects.filter(scope=request_scope, key=key, expires_at__gt=timezone.now()).exists()
+
+
+def store(record, response):
+    """Keep the finished response for replays until the key expires."""
+    expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        response_status=response.status_code,
+        response_body=response.data,
+        expires_at=expires_at,
+    )
+    cache.set(
+        _cache_key(record.scope, record.key),
+        (record.fingerprint, response.status_code, response.data),
+        settings.IDEMPOTENCY_KEY_TTL,
+    )
+
+
+def release(record):
+    """Drop a claim so the request can be retried (failed or server-error responses)."""
+    IdempotencyKey.objects.filter(pk=record.pk).delete()
+
+
+def replay(fingerprint, stored_fingerprint, response_status, response_body):
+    if fingerprint != stored_fingerprint:
+        return Response(
+            {"error": "This Idempotency-Key was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(response_body, status=response_status, headers={"Idempotent-Replayed": "true"})
+
+
+def in_progress():
+    return Response(
+        {"error": "A request with this Idempotency-Key is still being processed"},
+        status=status.HTTP_409_CONFLICT,
+        headers={"Retry-After": "1"},
+    )
+
+
+def idempotent(scope):
+    """
+    Decorate a DRF POST handler so requests carrying an Idempotency-Key header
+    run at most once per key within IDEMPOTENCY_KEY_TTL. Requests without the
+    header are handled as before. Apply it outside the rate limit decorator so
+    replays don't use up the caller's budget.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return view_func(request, *args, **kwargs)
+            key = key.strip()
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"error": f"{HEADER} must be between 1 and {MAX_KEY_LENGTH} characters"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            fingerprint = request_fingerprint(request)
+            request_scope = client_scope(scope, request)
+            cached = cache.get(_cache_key(request_scope, key))
+            if cached is not None:
+                return replay(fingerprint, *cached)
+
+            record, claimed = claim(request_scope, key, fingerprint)
+            if not claimed:
+                if record is None or record.response_status is None:
+                    return in_progress()
+                stored = (record.fingerprint, record.response_status, record.response_body)
+                remaining = (record.expires_at - timezone.now()).total_seconds()
+                cache.set(_cache_key(request_scope, key), stored, max(int(remaining), 1))
+                return replay(fingerprint, *stored)
+
+            try:
+                response = view_func(request, *args, **kwargs)
+            except BaseException:
+                release(record)
+                raise
+            if isinstance(response, Response) and response.status_code < 500:
+                store(record, response)
+            else:
+                release(record)
+            return response
+
+        return wrapped
+
+    return decorator
+
+
+def purge_expired_keys():
+    """Delete expired keys; returns the number removed."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
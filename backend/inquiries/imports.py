@@ -0,0 +1,40 @@
+from django.utils import timezone
+
+from no_dry_starts.bulk_import import Importer
+from no_dry_starts.ids import uuid7_from_datetime
+from .models import Contact, Lead
+from .stats import record_stat
+
+
+class LeadImporter(Importer):
+    """
+    Historical leads, e.g. from a CRM. ``created_at`` is kept when given and
+    stamps the key, so imported leads sort among existing ones by date.
+    """
+    model = Lead
+    fields = ('full_name', 'email', 'phone', 'message', 'inquiry_type', 'created_at')
+
+    def __init__(self):
+        # (day, inquiry type) -> [a created_at on that day, count]
+        self.daily = {}
+
+    def build(self, values):
+        values = super().build(values)
+        if values['created_at']:
+            values['id'] = uuid7_from_datetime(values['created_at'])
+        return values
+
+    def prepare(self, leads):
+        contact_ids = Contact.ids_for(
+            (lead['email'], lead['full_name'], lead['phone']) for lead in leads
+        )
+        now = timezone.now()
+        for lead in leads:
+            lead['contact_id'] = contact_ids[Contact.normalize_email(lead['email'])]
+            when = lead['created_at'] or now
+            self.daily.setdefault((timezone.localdate(when), lead['inquiry_type']), [when, 0])[1] += 1
+
+    def finish(self):
+        # Inserted rows skip the post_save rollup
+        for (day, inquiry_type), (when, count) in self.daily.items():
+            record_stat('lead', inquiry_type, when=when, amount=count)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from inquiries.partitions import PARTITIONED, archivable_months, archive_partition
+
+
+class Command(BaseCommand):
+    help = (
+        "Move monthly partitions of leads and RFQ submissions older than "
+        "INQUIRY_ARCHIVE_AFTER_MONTHS to gzipped NDJSON in archive storage"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after-months', type=int, default=settings.INQUIRY_ARCHIVE_AFTER_MONTHS)
+        parser.add_argument('--dry-run', action='store_true', help="List the months without archiving")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioning requires PostgreSQL")
+
+        for resource, model in PARTITIONED.items():
+            for month in archivable_months(model, options['after_months']):
+                if options['dry_run']:
+                    self.stdout.write(f"{resource} {month:%Y-%m}: would archive")
+                    continue
+                archive = archive_partition(model, month)
+                self.stdout.write(self.style.SUCCESS(
+                    f"{resource} {month:%Y-%m}: archived {archive.row_count} rows to {archive.file.name}"
+                ))
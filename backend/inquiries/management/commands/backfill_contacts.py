@@ -0,0 +1,111 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from inquiries.models import (
+    Contact,
+    INVESTOR_REQUEST_MESSAGE,
+    InvestorDownloadToken,
+    Lead,
+    RFQSubmission,
+)
+
+
+def unlinked_batches(model, batch_size):
+    """Yield rows with no contact, oldest first, one keyset page at a time"""
+    last_id = None
+    while True:
+        rows = model.objects.filter(contact__isnull=True).order_by('id')
+        if last_id is not None:
+            rows = rows.filter(id__gt=last_id)
+        batch = list(rows[:batch_size])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield batch
+
+
+def per_contact(values, output_field):
+    """``CASE`` giving each contact id in ``values`` its value"""
+    return Case(
+        *[When(pk=contact_id, then=Value(value)) for contact_id, value in values.items()],
+        output_field=output_field,
+    )
+
+
+def contact_ids_for(rows):
+    """Map case-folded email to contact id for every row, creating missing contacts"""
+    return Contact.ids_for(
+        (row.email, getattr(row, 'full_name', ''), getattr(row, 'phone', '')) for row in rows
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Link existing leads, RFQs and download tokens to contacts, merging "
+        "repeat investor download leads into each contact's request counter "
+        "and first and last request times"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        linked = merged = 0
+
+        for model in (RFQSubmission, InvestorDownloadToken):
+            for batch in unlinked_batches(model, batch_size):
+                contact_ids = contact_ids_for(batch)
+                for row in batch:
+                    row.contact_id = contact_ids[Contact.normalize_email(row.email)]
+                with transaction.atomic():
+                    model.objects.bulk_update(batch, ['contact'])
+                linked += len(batch)
+
+        for batch in unlinked_batches(Lead, batch_size):
+            contact_ids = contact_ids_for(batch)
+            requests = Counter()
+            first_requests, last_requests = {}, {}
+            duplicates = set()
+            # Contacts that already have an investor request lead
+            kept = set(
+                Lead.objects.filter(
+                    contact__in=contact_ids.values(),
+                    inquiry_type='investor',
+                    message=INVESTOR_REQUEST_MESSAGE,
+                ).values_list('contact_id', flat=True)
+            )
+            for lead in batch:
+                lead.contact_id = contact_ids[Contact.normalize_email(lead.email)]
+                if lead.inquiry_type == 'investor' and lead.message == INVESTOR_REQUEST_MESSAGE:
+                    requests[lead.contact_id] += 1
+                    # Keep the request times of the leads merged away
+                    contact_id, created_at = lead.contact_id, lead.created_at
+                    first_requests[contact_id] = min(first_requests.get(contact_id, created_at), created_at)
+                    last_requests[contact_id] = max(last_requests.get(contact_id, created_at), created_at)
+                    if lead.contact_id in kept:
+                        duplicates.add(lead.pk)
+                    else:
+                        kept.add(lead.contact_id)
+
+            with transaction.atomic():
+                Lead.objects.bulk_update([lead for lead in batch if lead.pk not in duplicates], ['contact'])
+                if requests:
+                    first = per_contact(first_requests, DateTimeField())
+                    last = per_contact(last_requests, DateTimeField())
+                    Contact.objects.filter(pk__in=requests).update(
+                        investor_requests=F('investor_requests') + per_contact(requests, IntegerField()),
+                        first_investor_request_at=Least(Coalesce('first_investor_request_at', first), first),
+                        last_investor_request_at=Greatest(Coalesce('last_investor_request_at', last), last),
+                    )
+                Lead.objects.filter(pk__in=duplicates).delete()
+            linked += len(batch) - len(duplicates)
+            merged += len(duplicates)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {linked} rows to contacts, merged {merged} repeat investor requests"
+        ))
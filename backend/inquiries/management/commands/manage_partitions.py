@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from inquiries.partitions import PARTITIONED, convert_to_partitioned, ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming monthly partitions of leads and RFQ submissions "
+        "(PostgreSQL); --convert partitions the existing tables first"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help="Rebuild unpartitioned tables as partitioned ones (locks each table while it runs)",
+        )
+        parser.add_argument('--months-ahead', type=int, default=settings.INQUIRY_PARTITION_MONTHS_AHEAD)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioning requires PostgreSQL")
+        if not settings.INQUIRY_PARTITIONING:
+            raise CommandError("Set INQUIRY_PARTITIONING=True to manage partitions")
+
+        for resource, model in PARTITIONED.items():
+            if not is_partitioned(model):
+                if not options['convert']:
+                    self.stdout.write(f"{resource}: not partitioned, run with --convert")
+                    continue
+                convert_to_partitioned(model)
+                self.stdout.write(f"{resource}: converted to monthly partitions")
+            created = ensure_partitions(model, months_ahead=options['months_ahead'])
+            months = ', '.join(f'{month:%Y-%m}' for month in created) or 'none'
+            self.stdout.write(self.style.SUCCESS(f"{resource}: created partitions {months}"))
@@ -0,0 +1,49 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inquiries.exports import fail_stale_jobs, run_export_job
+from inquiries.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Run pending export jobs (use with EXPORT_JOBS_IN_PROCESS=False), fail timed-out ones "
+        "and purge expired artifacts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep polling for new jobs instead of exiting when the queue is empty",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help="Seconds between polls in --loop mode (default: 2)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            timed_out = fail_stale_jobs()
+            if timed_out:
+                self.stdout.write(f"Marked {timed_out} timed-out jobs failed")
+            for job in ExportJob.objects.filter(status='pending').order_by('created_at'):
+                run_export_job(job)
+                job.refresh_from_db()
+                self.stdout.write(f"{job.id}: {job.status} ({job.row_count or 0} rows)")
+
+            self.purge_expired()
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def purge_expired(self):
+        """Delete artifacts that are too old to be reused or downloaded."""
+        cutoff = timezone.now() - timedelta(seconds=settings.EXPORT_ARTIFACT_MAX_AGE)
+        for job in ExportJob.objects.filter(completed_at__lt=cutoff).exclude(status__in=ExportJob.ACTIVE_STATUSES):
+            if job.file:
+                job.file.delete(save=False)
+            job.delete()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from inquiries.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily lead, RFQ and investor request rollups from the source tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First date to rebuild (YYYY-MM-DD), default: all")
+        parser.add_argument('--end', help="Last date to rebuild (YYYY-MM-DD), default: all")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('start', 'end'):
+            value = options[name]
+            dates[name] = parse_date(value) if value else None
+            if value and dates[name] is None:
+                raise CommandError(f"--{name} must be a date in YYYY-MM-DD format")
+
+        rebuilt = rebuild_daily_stats(dates['start'], dates['end'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} daily stat rows"))
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inquiries.email_service import send_notification_digests
+
+
+class Command(BaseCommand):
+    help = "Send held admin notifications as summary emails"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running, sending a digest every ADMIN_NOTIFICATION_DIGEST_INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = send_notification_digests()
+            self.stdout.write(f"Sent digest of {sent} notifications")
+            if not options['loop']:
+                break
+            time.sleep(settings.ADMIN_NOTIFICATION_DIGEST_INTERVAL)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0002_investordownloadtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rfqsubmission',
+            name='attachment_mime_type',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='rfqsubmission',
+            name='attachment_page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='rfqsubmission',
+            name='attachment_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='rfqsubmission',
+            name='attachment_size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
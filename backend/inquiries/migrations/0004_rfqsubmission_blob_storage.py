@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:40
+
+import docs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0003_rfqsubmission_attachment_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rfqsubmission',
+            name='attachment',
+            field=models.FileField(blank=True, null=True, storage=docs.storage.blob_storage, upload_to='rfq_attachments/%Y/%m/'),
+        ),
+    ]
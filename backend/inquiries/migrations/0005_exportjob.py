@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:45
+
+import django.db.models.deletion
+import inquiries.models
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0004_rfqsubmission_blob_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('resource', models.CharField(choices=[('leads', 'Leads'), ('rfqs', 'RFQ Submissions')], max_length=20)),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('csv_gz', 'Gzipped CSV'), ('parquet', 'Parquet'), ('xlsx', 'Excel (XLSX)')], default='csv', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('fingerprint', models.CharField(db_index=True, max_length=255)),
+                ('file', models.FileField(blank=True, storage=inquiries.models.export_storage, upload_to='%Y/%m/')),
+                ('row_count', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('fingerprint',), name='unique_active_export_job')],
+            },
+        ),
+    ]
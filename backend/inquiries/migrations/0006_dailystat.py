@@ -0,0 +1,49 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:46
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    DailyStat = apps.get_model('inquiries', 'DailyStat')
+    sources = [
+        ('lead', apps.get_model('inquiries', 'Lead'), 'inquiry_type'),
+        ('rfq', apps.get_model('inquiries', 'RFQSubmission'), None),
+        ('investor_token', apps.get_model('inquiries', 'InvestorDownloadToken'), None),
+    ]
+    for metric, model, breakdown in sources:
+        group_by = ['day', breakdown] if breakdown else ['day']
+        rows = (
+            model.objects.annotate(day=TruncDate('created_at'))
+            .order_by().values(*group_by).annotate(total=Count('pk'))
+        )
+        DailyStat.objects.bulk_create([
+            DailyStat(date=row['day'], metric=metric, key=row[breakdown] if breakdown else '', count=row['total'])
+            for row in rows
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0005_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('metric', models.CharField(choices=[('lead', 'Leads'), ('rfq', 'RFQ Submissions'), ('investor_token', 'Investor Download Requests'), ('investor_download', 'Investor Downloads')], max_length=30)),
+                ('key', models.CharField(blank=True, default='', max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'metric', 'key'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'metric', 'key'), name='unique_daily_stat')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
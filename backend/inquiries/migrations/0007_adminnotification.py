@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0006_dailystat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('inquiry', 'Inquiry'), ('rfq', 'RFQ Submission'), ('investor_request', 'Investor Document Request')], max_length=30)),
+                ('recipients', models.JSONField(default=list)),
+                ('subject', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('html', models.TextField(blank=True)),
+                ('instant', models.BooleanField(default=False)),
+                ('digest_batch', models.UUIDField(blank=True, db_index=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['instant', 'sent_at'], name='inquiries_a_instant_f0ed3a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0008_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CircuitBreakerState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('opened_until', models.DateTimeField(blank=True, null=True)),
+                ('probe_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:09
+
+import no_dry_starts.ids
+from django.db import migrations, models
+from no_dry_starts.ids import rekey_to_uuid7
+
+
+def rekey_existing_rows(apps, schema_editor):
+    # Existing random keys become UUIDv7s stamped with created_at, so
+    # primary key order is creation order for old rows too. These keys are
+    # only seen by staff; admin history follows them.
+    for name in ('InvestorDownloadToken', 'Lead', 'RFQSubmission'):
+        rekey_to_uuid7(apps, 'inquiries', name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin', '0003_logentry_add_action_flag_choices'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inquiries', '0009_circuitbreakerstate'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='investordownloadtoken',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='lead',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='rfqsubmission',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AlterField(
+            model_name='investordownloadtoken',
+            name='id',
+            field=models.UUIDField(default=no_dry_starts.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='lead',
+            name='id',
+            field=models.UUIDField(default=no_dry_starts.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='rfqsubmission',
+            name='id',
+            field=models.UUIDField(default=no_dry_starts.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(rekey_existing_rows, migrations.RunPython.noop),
+    ]
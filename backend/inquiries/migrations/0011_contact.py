@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0010_uuid7_primary_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email_key', models.CharField(editable=False, max_length=254, unique=True)),
+                ('email', models.EmailField(max_length=254)),
+                ('full_name', models.CharField(blank=True, max_length=255)),
+                ('phone', models.CharField(blank=True, max_length=50)),
+                ('investor_requests', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-last_seen_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='investordownloadtoken',
+            name='contact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='download_tokens', to='inquiries.contact'),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='contact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leads', to='inquiries.contact'),
+        ),
+        migrations.AddField(
+            model_name='rfqsubmission',
+            name='contact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rfqs', to='inquiries.contact'),
+        ),
+    ]
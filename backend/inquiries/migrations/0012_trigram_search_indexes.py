@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from no_dry_starts.search import trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0011_contact'),
+    ]
+
+    operations = [
+        trigram_indexes('inquiries_lead', ['full_name', 'email', 'message']),
+        trigram_indexes('inquiries_rfqsubmission', ['full_name', 'email', 'company', 'message']),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:17
+
+import inquiries.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0012_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(choices=[('leads', 'Leads'), ('rfqs', 'RFQ Submissions')], max_length=20)),
+                ('month', models.DateField()),
+                ('file', models.FileField(storage=inquiries.models.archive_storage, upload_to='%Y/')),
+                ('row_count', models.IntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['resource', '-month'],
+                'constraints': [models.UniqueConstraint(fields=('resource', 'month'), name='unique_archived_month')],
+            },
+        ),
+    ]
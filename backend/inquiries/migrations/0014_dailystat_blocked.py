@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0013_archivedpartition'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailystat',
+            name='metric',
+            field=models.CharField(choices=[('lead', 'Leads'), ('rfq', 'RFQ Submissions'), ('investor_token', 'Investor Download Requests'), ('investor_download', 'Investor Downloads'), ('blocked', 'Blocked Submissions')], max_length=30),
+        ),
+    ]
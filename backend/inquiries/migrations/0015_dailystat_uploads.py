@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0014_dailystat_blocked'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailystat',
+            name='count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='dailystat',
+            name='metric',
+            field=models.CharField(choices=[('lead', 'Leads'), ('rfq', 'RFQ Submissions'), ('investor_token', 'Investor Download Requests'), ('investor_download', 'Investor Downloads'), ('blocked', 'Blocked Submissions'), ('rejected_upload', 'Rejected Uploads'), ('upload_bytes_skipped', 'Bytes Not Read From Rejected Uploads')], max_length=30),
+        ),
+    ]
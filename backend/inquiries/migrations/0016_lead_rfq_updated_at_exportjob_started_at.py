@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0015_dailystat_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='rfqsubmission',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
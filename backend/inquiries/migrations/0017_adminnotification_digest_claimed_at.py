@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0016_lead_rfq_updated_at_exportjob_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adminnotification',
+            name='digest_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
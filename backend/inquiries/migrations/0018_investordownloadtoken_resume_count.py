@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0017_adminnotification_digest_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investordownloadtoken',
+            name='resume_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0018_investordownloadtoken_resume_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='first_investor_request_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='last_investor_request_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inquiries', '0019_contact_investor_request_times'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investordownloadtoken',
+            name='partial_end',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='investordownloadtoken',
+            name='partial_start',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,29 +1,130 @@
-from django.db import models
+from django.conf import settings
+from django.core.files.storage import storages
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from rest_framework.utils.encoders import JSONEncoder
 from django.utils import timezone
 from datetime import timedelta
 import uuid
 import secrets
+from docs.file_metadata import get_upload_metadata
+from docs.storage import blob_storage
+from no_dry_starts.ids import uuid7
+
+
+class Contact(models.Model):
+    """
+    One person, identified by their case-folded email. Leads, RFQs and
+    download tokens from the same address all link to one contact.
+    """
+    email_key = models.CharField(max_length=254, unique=True, editable=False)
+    email = models.EmailField()
+    full_name = models.CharField(max_length=255, blank=True)
+    phone = models.CharField(max_length=50, blank=True)
+    # Investor download requests; only the first one is recorded as a Lead
+    investor_requests = models.PositiveIntegerField(default=0)
+    first_investor_request_at = models.DateTimeField(blank=True, null=True)
+    last_investor_request_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-last_seen_at']
+
+    @staticmethod
+    def normalize_email(email):
+        return email.strip().casefold()
+
+    @classmethod
+    def for_email(cls, email, full_name='', phone=''):
+        """Return the contact for ``email``, creating it or refreshing its details"""
+        contact, created = cls.objects.get_or_create(
+            email_key=cls.normalize_email(email),
+            defaults={'email': email.strip(), 'full_name': full_name or '', 'phone': phone or ''},
+        )
+        if not created:
+            updates = {'last_seen_at': timezone.now()}
+            if full_name:
+                updates['full_name'] = full_name
+            if phone:
+                updates['phone'] = phone
+            cls.objects.filter(pk=contact.pk).update(**updates)
+            for field, value in updates.items():
+                setattr(contact, field, value)
+        return contact
+
+    @classmethod
+    def ids_for(cls, details):
+        """
+        Map case-folded email to contact id for (email, full_name, phone)
+        tuples, creating missing contacts in one query. Existing contacts are
+        left unchanged.
+        """
+        latest = {}
+        for email, full_name, phone in details:
+            # Later entries win the name and phone
+            latest[cls.normalize_email(email)] = (email, full_name, phone)
+        ids = dict(cls.objects.filter(email_key__in=latest).values_list('email_key', 'pk'))
+        missing = [
+            cls(email_key=key, email=email.strip(), full_name=full_name or '', phone=phone or '')
+            for key, (email, full_name, phone) in latest.items()
+            if key not in ids
+        ]
+        if missing:
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            ids.update(
+                cls.objects.filter(email_key__in=[c.email_key for c in missing])
+                .values_list('email_key', 'pk')
+            )
+        return ids
+
+    def record_investor_request(self):
+        """Count one investor download request; returns the new total"""
+        now = timezone.now()
+        Contact.objects.filter(pk=self.pk).update(
+            investor_requests=F('investor_requests') + 1,
+            first_investor_request_at=Coalesce('first_investor_request_at', Value(now)),
+            last_investor_request_at=now,
+        )
+        self.refresh_from_db(fields=['investor_requests', 'first_investor_request_at', 'last_investor_request_at'])
+        return self.investor_requests
+
+    def __str__(self):
+        return f"{self.full_name or self.email} <{self.email}>"
 
 
 class InvestorDownloadToken(models.Model):
     """Time-limited secure download token for investor documents"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     email = models.EmailField()
     token = models.CharField(max_length=64, unique=True, editable=False)
     document_category = models.CharField(max_length=50, default='investor')
     expires_at = models.DateTimeField()
     download_count = models.IntegerField(default=0)
     max_downloads = models.IntegerField(default=3)
+    # Ranged requests that continued a counted download without using one up
+    resume_count = models.IntegerField(default=0)
+    # Where the last response stopped short of the end of the file, as byte
+    # offsets [partial_start, partial_end); null once a response finished it
+    partial_start = models.BigIntegerField(null=True, blank=True, editable=False)
+    partial_end = models.BigIntegerField(null=True, blank=True, editable=False)
+    contact = models.ForeignKey(
+        Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name='download_tokens'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-created_at']
+        # UUIDv7 keys sort by creation time
+        ordering = ['-id']
 
     def save(self, *args, **kwargs):
         if not self.token:
             self.token = secrets.token_urlsafe(48)
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(hours=48)
+        if self.contact_id is None and self.email:
+            self.contact = Contact.for_email(self.email)
         super().save(*args, **kwargs)
 
     def is_valid(self):
@@ -33,15 +134,53 @@ class InvestorDownloadToken(models.Model):
             self.download_count < self.max_downloads
         )
 
+    def claim_resume(self, start):
+        """
+        Count one resume, from byte ``start``, of a download already counted.
+        Only a range continuing the last response that stopped short, past its
+        start and no further than it got, qualifies; False otherwise, or once
+        the token has expired or used INVESTOR_DOWNLOAD_MAX_RESUMES per download.
+        """
+        claimed = InvestorDownloadToken.objects.filter(
+            pk=self.pk,
+            expires_at__gt=timezone.now(),
+            download_count__gt=0,
+            resume_count__lt=F('download_count') * settings.INVESTOR_DOWNLOAD_MAX_RESUMES,
+            partial_start__lt=start,
+            partial_end__gte=start,
+        ).update(resume_count=F('resume_count') + 1)
+        return bool(claimed)
+
+    def track_progress(self, chunks, start, size):
+        """
+        Yield ``chunks`` (the file from byte ``start``) and, once they stop,
+        record how far they got for claim_resume.
+        """
+        sent = start
+        try:
+            for chunk in chunks:
+                yield chunk
+                sent += len(chunk)
+        finally:
+            partial = (None, None) if sent >= size else (start, sent)
+            if partial != (self.partial_start, self.partial_end):
+                InvestorDownloadToken.objects.filter(pk=self.pk).update(
+                    partial_start=partial[0], partial_end=partial[1],
+                )
+
     def increment_download(self):
         """Increment download count"""
         self.download_count += 1
-        self.save()
+        self.save(update_fields=['download_count'])
 
     def __str__(self):
         return f"Token for {self.email} - Expires {self.expires_at}"
 
 
+# Message of the Lead recorded for a contact's first investor download request
+INVESTOR_REQUEST_MESSAGE = "Requested investor documents download"
+
+
 class Lead(models.Model):
     """General contact and inquiry lead model"""
     TYPE_CHOICES = [
@@ -51,16 +190,27 @@ class Lead(models.Model):
         ('rfq', 'RFQ Submission'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     full_name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50, blank=True, null=True)
     message = models.TextField()
     inquiry_type = models.CharField(max_length=50, choices=TYPE_CHOICES)
+    contact = models.ForeignKey(
+        Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name='leads'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Changes with any edit, so export fingerprints see edited rows
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        # UUIDv7 keys sort by creation time
+        ordering = ['-id']
+
+    def save(self, *args, **kwargs):
+        if self.contact_id is None and self.email:
+            self.contact = Contact.for_email(self.email, self.full_name, self.phone)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.full_name} - {self.inquiry_type}"
@@ -68,17 +218,223 @@ class Lead(models.Model):
 
 class RFQSubmission(models.Model):
     """Request for Quote submission model"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     full_name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=50)
     company = models.CharField(max_length=255, blank=True, null=True)
     message = models.TextField()
-    attachment = models.FileField(upload_to='rfq_attachments/%Y/%m/', blank=True, null=True)
+    attachment = models.FileField(
+        upload_to='rfq_attachments/%Y/%m/', storage=blob_storage, blank=True, null=True
+    )
+    # Attachment metadata, computed once at upload
+    attachment_size = models.BigIntegerField(blank=True, null=True, editable=False)
+    attachment_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    attachment_mime_type = models.CharField(max_length=100, blank=True, editable=False)
+    attachment_page_count = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    contact = models.ForeignKey(
+        Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name='rfqs'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Changes with any edit, so export fingerprints see edited rows
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at']
+        # UUIDv7 keys sort by creation time
+        ordering = ['-id']
+
+    def save(self, *args, **kwargs):
+        if self.contact_id is None and self.email:
+            self.contact = Contact.for_email(self.email, self.full_name, self.phone)
+        if self.attachment and not self.attachment._committed:
+            metadata = get_upload_metadata(self.attachment)
+            self.attachment_size = metadata['size']
+            self.attachment_sha256 = metadata['sha256']
+            self.attachment_mime_type = metadata['mime_type']
+            self.attachment_page_count = metadata['page_count']
+            # Storing the file takes a blob reference; roll it back if the save fails
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+            return
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"RFQ from {self.full_name} - {self.company or 'No Company'}"
+
+
+def export_storage():
+    """Private storage for export artifacts (served only through signed URLs)"""
+    return storages['exports']
+
+
+class ExportJob(models.Model):
+    """Background export of leads or RFQ submissions to a stored file"""
+    RESOURCE_CHOICES = [
+        ('leads', 'Leads'),
+        ('rfqs', 'RFQ Submissions'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('csv_gz', 'Gzipped CSV'),
+        ('parquet', 'Parquet'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ['pending', 'running']
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    format = models.CharField(max_length=20, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Resource, format and table state; identical requests share a job
+    fingerprint = models.CharField(max_length=255, db_index=True)
+    file = models.FileField(upload_to='%Y/%m/', storage=export_storage, blank=True)
+    row_count = models.IntegerField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint'],
+                condition=Q(status__in=['pending', 'running']),
+                name='unique_active_export_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_resource_display()} export ({self.format}) - {self.status}"
+
+
+def archive_storage():
+    """Private storage for archived monthly partitions"""
+    return storages['archives']
+
+
+class ArchivedPartition(models.Model):
+    """A month of leads or RFQ submissions moved out of the database"""
+    RESOURCE_CHOICES = ExportJob.RESOURCE_CHOICES
+
+    resource = models.CharField(max_length=20, choices=RESOURCE_CHOICES)
+    # First day of the archived month (UTC)
+    month = models.DateField()
+    # Gzipped NDJSON, one object per row keyed by column name, newest first
+    file = models.FileField(upload_to='%Y/', storage=archive_storage)
+    row_count = models.IntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['resource', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['resource', 'month'], name='unique_archived_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_resource_display()} {self.month:%Y-%m} ({self.row_count} rows)"
+
+
+class DailyStat(models.Model):
+    """Per-day rollup counter backing the /api/stats/ dashboard endpoint"""
+    METRIC_CHOICES = [
+        ('lead', 'Leads'),
+        ('rfq', 'RFQ Submissions'),
+        ('investor_token', 'Investor Download Requests'),
+        ('investor_download', 'Investor Downloads'),
+        ('blocked', 'Blocked Submissions'),
+        ('rejected_upload', 'Rejected Uploads'),
+        ('upload_bytes_skipped', 'Bytes Not Read From Rejected Uploads'),
+    ]
+
+    date = models.DateField()
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES)
+    # Breakdown within a metric, e.g. Lead.inquiry_type; empty when unused
+    key = models.CharField(max_length=50, blank=True, default='')
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'metric', 'key']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'metric', 'key'], name='unique_daily_stat'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.metric}{f'/{self.key}' if self.key else ''}: {self.count}"
+
+
+class AdminNotification(models.Model):
+    """
+    Admin notification email. Sent immediately while under the hourly
+    instant budget, otherwise held until the next digest.
+    """
+    KIND_CHOICES = [
+        ('inquiry', 'Inquiry'),
+        ('rfq', 'RFQ Submission'),
+        ('investor_request', 'Investor Document Request'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    html = models.TextField(blank=True)
+    instant = models.BooleanField(default=False)
+    # Set when a digest run claims the notification
+    digest_batch = models.UUIDField(blank=True, null=True, db_index=True)
+    digest_claimed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['instant', 'sent_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({'sent' if self.sent_at else 'pending'})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    First response to a public POST sent with an Idempotency-Key header.
+    response_status is empty while the original request is still running.
+    """
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    # DRF's encoder, so replayed bodies render exactly like the original
+    response_body = models.JSONField(blank=True, null=True, encoder=JSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+
+class CircuitBreakerState(models.Model):
+    """Failure state of an external service, shared by every worker process."""
+    name = models.CharField(max_length=50, primary_key=True)
+    failures = models.PositiveIntegerField(default=0)
+    # Set while the circuit is open; once it passes, one caller may probe
+    opened_until = models.DateTimeField(blank=True, null=True)
+    probe_until = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} ({'open' if self.opened_until else 'closed'})"
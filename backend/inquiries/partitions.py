@@ -0,0 +1,299 @@
+"""
+Monthly range partitioning and cold archive for leads and RFQ submissions
+(PostgreSQL only).
+
+Tables are partitioned by RANGE on the primary key. Keys are UUIDv7, whose
+leading 48 bits are the creation time, so a calendar month (UTC) is exactly
+the key range ``[uuid7_floor(month), uuid7_floor(next month))`` and the
+primary key needs no extra column. Recent-first lists (``ORDER BY id DESC``)
+read the newest partitions first and stop; lookups by id touch one partition.
+
+Each table has a DEFAULT partition for keys outside every month, so inserts
+never fail when a month is missing. Partitions for the coming months are
+created ahead of time by ``migrate`` and ``manage.py manage_partitions``.
+
+``archive_partition`` detaches a month, writes it newest first to gzipped
+NDJSON in the ``archives`` storage, records an ArchivedPartition and drops the
+table. ``archived_records`` reads those files back as unsaved model
+instances, so exports still cover archived months.
+"""
+
+import gzip
+import json
+import re
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from no_dry_starts.ids import uuid7_floor
+from .models import ArchivedPartition, Lead, RFQSubmission
+
+# resource (as in exports and ArchivedPartition) -> partitioned model
+PARTITIONED = {
+    'leads': Lead,
+    'rfqs': RFQSubmission,
+}
+
+FETCH_SIZE = 2000
+
+
+def month_start(value):
+    """First day of the UTC month containing date or datetime ``value``"""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def month_bounds(month):
+    """Primary key range ``[lower, upper)`` of the rows created in ``month``"""
+    lower = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    following = add_months(month, 1)
+    upper = datetime(following.year, following.month, 1, tzinfo=dt_timezone.utc)
+    return str(uuid7_floor(lower)), str(uuid7_floor(upper))
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def is_partitioned(model):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)',
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_tables(model):
+    """Map month -> attached (bool) for every monthly table of ``model``"""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)
+            FROM pg_class c
+            WHERE c.relkind = 'r' AND c.relname ~ %s AND pg_table_is_visible(c.oid)
+            """,
+            [f'^{re.escape(table)}_p[0-9]{{6}}$'],
+        )
+        rows = cursor.fetchall()
+    return {
+        date(int(name[-6:-2]), int(name[-2:]), 1): attached
+        for name, attached in rows
+    }
+
+
+def create_partition(model, month):
+    """Create and attach the partition for ``month``, taking its rows from the default partition"""
+    table = model._meta.db_table
+    part = partition_name(table, month)
+    lower, upper = month_bounds(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {_quote(part)} '
+            f'(LIKE {_quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        )
+        # Rows inserted before the month had a partition sit in the default one,
+        # and ATTACH refuses while they are there
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {_quote(default_partition_name(table))} '
+            f'WHERE id >= %s AND id < %s RETURNING *) '
+            f'INSERT INTO {_quote(part)} SELECT * FROM moved',
+            [lower, upper],
+        )
+        cursor.execute(
+            f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(part)} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [lower, upper],
+        )
+
+
+def ensure_partitions(model, since=None, months_ahead=None):
+    """
+    Create missing monthly partitions from ``since`` (default: this month)
+    through ``months_ahead`` months from now. Archived months are skipped.
+    Returns the months created.
+    """
+    if not is_partitioned(model):
+        return []
+    if months_ahead is None:
+        months_ahead = settings.INQUIRY_PARTITION_MONTHS_AHEAD
+    table = model._meta.db_table
+    resource = resource_for(model)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {_quote(default_partition_name(table))} '
+            f'PARTITION OF {_quote(table)} DEFAULT'
+        )
+
+    current = month_start(timezone.now())
+    month = month_start(since) if since else current
+    last = add_months(current, months_ahead)
+    existing = set(monthly_tables(model))
+    existing.update(
+        ArchivedPartition.objects.filter(resource=resource).values_list('month', flat=True)
+    )
+    created = []
+    while month <= last:
+        if month not in existing:
+            create_partition(model, month)
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+@transaction.atomic
+def convert_to_partitioned(model):
+    """
+    Rebuild ``model``'s table as a partitioned table holding the same rows,
+    with the same primary key, indexes and foreign keys under the same names.
+    Runs in one transaction and locks the table until it is done.
+    """
+    table = model._meta.db_table
+    old = f'{table}_unpartitioned'
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(
+            'SELECT conrelid::regclass::text FROM pg_constraint '
+            'WHERE contype = %s AND confrelid = to_regclass(%s)',
+            ['f', table],
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            raise ValueError(f"{table} is referenced by {', '.join(referencing)}")
+
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f') "
+            "ORDER BY contype = 'p' DESC",  # primary key first
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            'SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s '
+            'AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))',
+            [table, table],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        earliest = model.objects.aggregate(earliest=Min('created_at'))['earliest']
+
+        cursor.execute(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(old)}')
+        cursor.execute(
+            f'CREATE TABLE {_quote(table)} (LIKE {_quote(old)} '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+            f'PARTITION BY RANGE (id)'
+        )
+
+    ensure_partitions(model, since=earliest)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {_quote(table)} SELECT * FROM {_quote(old)}')
+        cursor.execute(f'DROP TABLE {_quote(old)}')
+        # Keys and indexes are added after the copy and cascade to every partition
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}')
+        for definition in indexes:
+            cursor.execute(definition)
+
+
+def resource_for(model):
+    return next(resource for resource, m in PARTITIONED.items() if m is model)
+
+
+def archivable_months(model, after_months=None):
+    """Months older than the retention window that still have a table"""
+    if after_months is None:
+        after_months = settings.INQUIRY_ARCHIVE_AFTER_MONTHS
+    cutoff = add_months(month_start(timezone.now()), -after_months)
+    return sorted(month for month in monthly_tables(model) if month < cutoff)
+
+
+def archive_partition(model, month):
+    """
+    Move ``month`` of ``model`` to archive storage and drop its table.
+    Returns the ArchivedPartition. A month left detached by an interrupted
+    run is picked up again; if the transaction fails, the file it wrote is
+    deleted.
+    """
+    table = model._meta.db_table
+    part = partition_name(table, month)
+
+    # Detach in its own short transaction: the lock on the parent table is
+    # released before the rows are streamed out
+    if monthly_tables(model).get(month):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(part)}')
+
+    archive = ArchivedPartition(resource=resource_for(model), month=month, row_count=0)
+    try:
+        with transaction.atomic():
+            with tempfile.TemporaryFile() as output:
+                with gzip.GzipFile(fileobj=output, mode='wb', mtime=0) as compressed:
+                    # Server-side cursor, so the month is never held in memory
+                    with connection.chunked_cursor() as cursor:
+                        cursor.execute(f'SELECT * FROM {_quote(part)} ORDER BY id DESC')
+                        while True:
+                            rows = cursor.fetchmany(FETCH_SIZE)
+                            if not rows:
+                                break
+                            columns = [column[0] for column in cursor.description]
+                            for row in rows:
+                                compressed.write(
+                                    json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder).encode()
+                                    + b'\n'
+                                )
+                            archive.row_count += len(rows)
+                output.seek(0)
+                archive.file.save(f'{part}.ndjson.gz', File(output), save=False)
+            archive.save()
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE {_quote(part)}')
+    except BaseException:
+        # The table is still there; don't leave a file nothing records
+        if archive.file:
+            archive.file.delete(save=False)
+        raise
+    return archive
+
+
+def archived_records(model):
+    """Yield unsaved ``model`` instances from archived months, newest first"""
+    fields = model._meta.concrete_fields
+    archives = ArchivedPartition.objects.filter(resource=resource_for(model)).order_by('-month')
+    for archive in archives:
+        with archive.file.open('rb') as stored, gzip.open(stored, 'rt', encoding='utf-8') as lines:
+            for line in lines:
+                data = json.loads(line)
+                values = {}
+                for field in fields:
+                    if field.column not in data:
+                        # Column added after the month was archived
+                        values[field.attname] = field.get_default()
+                    elif data[field.column] is None:
+                        values[field.attname] = None
+                    else:
+                        values[field.attname] = field.to_python(data[field.column])
+                yield model(**values)
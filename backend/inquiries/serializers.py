@@ -1,5 +1,9 @@
+from django.core import signing
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Lead, RFQSubmission, InvestorDownloadToken
+from .models import Lead, RFQSubmission, InvestorDownloadToken, ExportJob
+
+EXPORT_DOWNLOAD_SALT = 'inquiries.export-download'
 
 
 class InvestorDownloadRequestSerializer(serializers.Serializer):
@@ -20,11 +24,38 @@ class RFQSubmissionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = RFQSubmission
-        fields = ['id', 'full_name', 'email', 'phone', 'company', 'message', 'attachment', 'attachment_url', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = [
+            'id', 'full_name', 'email', 'phone', 'company', 'message', 'attachment', 'attachment_url',
+            'attachment_size', 'attachment_mime_type', 'attachment_page_count', 'created_at',
+        ]
+        read_only_fields = ['id', 'attachment_size', 'attachment_mime_type', 'attachment_page_count', 'created_at']
 
     def get_attachment_url(self, obj):
         request = self.context.get('request')
         if obj.attachment and request:
             return request.build_absolute_uri(obj.attachment.url)
         return None
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = ['id', 'resource', 'format', 'status', 'row_count', 'error', 'download_url', 'created_at', 'completed_at']
+        read_only_fields = ['id', 'status', 'row_count', 'error', 'created_at', 'completed_at']
+
+    def validate_format(self, value):
+        from .exports import available_formats
+
+        if value not in available_formats():
+            raise serializers.ValidationError(f"The {value} export format is not available on this server.")
+        return value
+
+    def get_download_url(self, obj):
+        """Signed, time-limited URL for the finished artifact"""
+        request = self.context.get('request')
+        if obj.status != 'completed' or not obj.file or not request:
+            return None
+        signature = signing.TimestampSigner(salt=EXPORT_DOWNLOAD_SALT).sign(str(obj.id))
+        return request.build_absolute_uri(reverse('export-download', args=[signature]))
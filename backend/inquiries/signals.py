@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from docs.signals import release_file
+from .events import lead_event, publish, rfq_event
+from .models import InvestorDownloadToken, Lead, RFQSubmission
+from .partitions import PARTITIONED, ensure_partitions
+from .stats import record_stat
+
+
+@receiver(post_delete, sender=RFQSubmission)
+def release_rfq_attachment(sender, instance, **kwargs):
+    release_file(instance.attachment.storage, instance.attachment.name)
+
+
+@receiver(pre_save, sender=RFQSubmission)
+def release_replaced_rfq_attachment(sender, instance, **kwargs):
+    # Only an update that assigns a new upload replaces the stored file
+    if instance._state.adding or not instance.attachment or instance.attachment._committed:
+        return
+    old_name = RFQSubmission.objects.filter(pk=instance.pk).values_list('attachment', flat=True).first()
+    if old_name:
+        release_file(instance.attachment.storage, old_name)
+
+
+@receiver(post_save, sender=Lead)
+def announce_lead(sender, instance, created, **kwargs):
+    if created:
+        record_stat('lead', instance.inquiry_type, instance.created_at)
+        event = lead_event(instance)
+        transaction.on_commit(lambda: publish(event))
+
+
+@receiver(post_save, sender=RFQSubmission)
+def announce_rfq(sender, instance, created, **kwargs):
+    if created:
+        record_stat('rfq', when=instance.created_at)
+        event = rfq_event(instance)
+        transaction.on_commit(lambda: publish(event))
+
+
+@receiver(post_save, sender=InvestorDownloadToken)
+def count_investor_request(sender, instance, created, **kwargs):
+    if created:
+        record_stat('investor_token', when=instance.created_at)
+
+
+@receiver(post_migrate)
+def create_upcoming_partitions(sender, **kwargs):
+    """Keep monthly partitions ahead of time once the tables are partitioned"""
+    if sender.name != 'inquiries' or not settings.INQUIRY_PARTITIONING:
+        return
+    for model in PARTITIONED.values():
+        ensure_partitions(model)
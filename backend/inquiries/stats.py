@@ -0,0 +1,133 @@
+"""
+Daily rollups of leads, RFQs and investor document activity.
+
+Counters are bumped as rows are created, so dashboard queries read one row per
+day and metric instead of scanning the underlying tables. ``rebuild_daily_stats``
+recomputes them from the source tables in a batch, leaving the days of
+archived months alone.
+"""
+
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedPartition, DailyStat, InvestorDownloadToken, Lead, RFQSubmission
+from .partitions import PARTITIONED, add_months
+
+# Metrics that can be rebuilt from source rows: metric -> (model, breakdown field)
+REBUILDABLE_METRICS = {
+    'lead': (Lead, 'inquiry_type'),
+    'rfq': (RFQSubmission, None),
+    'investor_token': (InvestorDownloadToken, None),
+}
+
+
+def record_stat(metric, key='', when=None, amount=1):
+    """Increment the counter for ``metric``/``key`` on the day of ``when``."""
+    date = timezone.localdate(when or timezone.now())
+    rows = DailyStat.objects.filter(date=date, metric=metric, key=key)
+    if rows.update(count=F('count') + amount):
+        return
+    try:
+        with transaction.atomic():
+            DailyStat.objects.create(date=date, metric=metric, key=key, count=amount)
+    except IntegrityError:
+        # Created concurrently by another request
+        rows.update(count=F('count') + amount)
+
+
+def first_live_day(model):
+    """First day after the newest archived month of ``model``, or None"""
+    resources = [resource for resource, partitioned in PARTITIONED.items() if partitioned is model]
+    if not resources:
+        return None
+    newest = ArchivedPartition.objects.filter(resource__in=resources).aggregate(month=Max('month'))['month']
+    return add_months(newest, 1) if newest else None
+
+
+def rebuild_daily_stats(start=None, end=None):
+    """
+    Recompute rebuildable rollups for ``start``..``end`` (inclusive dates)
+    from the source tables. Days up to the end of a model's newest archived
+    month are skipped: their rows are no longer in the table, so the counts
+    recorded at the time are kept. Investor downloads are only recorded as
+    they happen and are left untouched.
+    """
+    rebuilt = 0
+    with transaction.atomic():
+        for metric, (model, breakdown) in REBUILDABLE_METRICS.items():
+            since = max(filter(None, [start, first_live_day(model)]), default=None)
+            queryset = model.objects.annotate(day=TruncDate('created_at'))
+            existing = DailyStat.objects.filter(metric=metric)
+            if since:
+                queryset = queryset.filter(day__gte=since)
+                existing = existing.filter(date__gte=since)
+            if end:
+                queryset = queryset.filter(day__lte=end)
+                existing = existing.filter(date__lte=end)
+
+            group_by = ['day', breakdown] if breakdown else ['day']
+            rows = queryset.order_by().values(*group_by).annotate(total=Count('pk'))
+            existing.delete()
+            stats = [
+                DailyStat(
+                    date=row['day'],
+                    metric=metric,
+                    key=row[breakdown] if breakdown else '',
+                    count=row['total'],
+                )
+                for row in rows
+            ]
+            DailyStat.objects.bulk_create(stats, batch_size=1000)
+            rebuilt += len(stats)
+    return rebuilt
+
+
+# metric -> summary field; broken down by key, with a 'total'
+BREAKDOWN_FIELDS = {
+    'lead': 'leads',
+    'blocked': 'blocked',
+    'rejected_upload': 'rejected_uploads',
+}
+# metric -> summary field; keys are added up
+SUM_FIELDS = {
+    'rfq': 'rfqs',
+    'investor_token': 'investor_requests',
+    'investor_download': 'investor_downloads',
+    'upload_bytes_skipped': 'upload_bytes_skipped',
+}
+
+
+def empty_summary():
+    summary = {field: defaultdict(int) for field in BREAKDOWN_FIELDS.values()}
+    summary.update((field, 0) for field in SUM_FIELDS.values())
+    return summary
+
+
+def summarize(start, end):
+    """Totals and a per-day series for the inclusive date range."""
+    totals = empty_summary()
+    days = {}
+
+    for stat in DailyStat.objects.filter(date__gte=start, date__lte=end):
+        day = days.get(stat.date)
+        if day is None:
+            day = days[stat.date] = {'date': stat.date.isoformat(), **empty_summary()}
+        if stat.metric in BREAKDOWN_FIELDS:
+            field = BREAKDOWN_FIELDS[stat.metric]
+            for bucket in (day[field], totals[field]):
+                bucket[stat.key] += stat.count
+                bucket['total'] += stat.count
+        else:
+            field = SUM_FIELDS[stat.metric]
+            day[field] += stat.count
+            totals[field] += stat.count
+
+    daily = [days[date] for date in sorted(days)]
+    for summary in (totals, *daily):
+        for field in BREAKDOWN_FIELDS.values():
+            summary[field] = dict(summary[field])
+    return {'totals': totals, 'daily': daily}
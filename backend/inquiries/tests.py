@@ -1,3 +1,822 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import resend
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from docs.models import Document
+from no_dry_starts.ids import uuid7_from_datetime
+from no_dry_starts.testing import TemporaryStorageMixin
+
+from .abuse import abuse_filter, issue_form_token
+from .circuit_breaker import CircuitBreaker
+from .email_service import email_circuit, send_email, send_notification_digests
+from .events import poll_events
+from .exports import available_formats, get_or_create_export_job, run_export_job
+from .models import (
+    INVESTOR_REQUEST_MESSAGE,
+    AdminNotification,
+    ArchivedPartition,
+    CircuitBreakerState,
+    Contact,
+    DailyStat,
+    ExportJob,
+    InvestorDownloadToken,
+    Lead,
+    RFQSubmission,
+)
+from .partitions import (
+    add_months,
+    archive_partition,
+    archived_records,
+    convert_to_partitioned,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+    monthly_tables,
+    partition_name,
+)
+from .stats import rebuild_daily_stats, record_stat, summarize
+from .views import get_staff_user
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Resend API; behaviour is set on the server."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        mode = self.server.mode
+        if mode == "slow":
+            time.sleep(1)
+        status, body = {
+            "ok": (200, {"id": "fake-email-id"}),
+            "slow": (200, {"id": "fake-email-id"}),
+            "error": (500, {"statusCode": 500, "name": "application_error", "message": "down"}),
+            "invalid": (422, {"statusCode": 422, "name": "validation_error", "message": "bad"}),
+        }[mode]
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client already gave up (timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(
+    RESEND_API_KEY="re_test",
+    EMAIL_CONNECT_TIMEOUT=0.5,
+    EMAIL_READ_TIMEOUT=0.3,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD=3,
+    CIRCUIT_BREAKER_RESET_TIMEOUT=30,
+    CIRCUIT_BREAKER_PROBE_TIMEOUT=5,
+)
+class EmailCircuitBreakerTests(TestCase):
+    """Fault injection against a local fake email provider."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeResendHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        patch = mock.patch.object(
+            resend, "api_url", f"http://127.0.0.1:{cls.server.server_address[1]}"
+        )
+        patch.start()
+        cls.addClassCleanup(patch.stop)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.mode = "ok"
+        self.server.requests = 0
+        email_circuit.open_until = None
+        email_circuit.closed_until = None
+        abuse_filter.reset()
+
+    def send(self):
+        return send_email("investor@example.com", "Subject", "Body")
+
+    def trip(self):
+        self.server.mode = "error"
+        for _ in range(3):
+            self.send()
+
+    def test_read_timeout_bounds_slow_provider(self):
+        self.server.mode = "slow"
+        started = time.monotonic()
+        response = self.send()
+        self.assertIn("error", response)
+        self.assertLess(time.monotonic() - started, 0.9)
+
+    def test_opens_after_consecutive_failures_and_fails_fast(self):
+        self.trip()
+        self.assertEqual(self.server.requests, 3)
+
+        started = time.monotonic()
+        with self.assertNumQueries(0):
+            response = self.send()
+        self.assertLess(time.monotonic() - started, 0.05)
+        self.assertTrue(response["circuit_open"])
+        self.assertEqual(self.server.requests, 3)
+
+    def test_open_state_is_shared_between_workers(self):
+        self.trip()
+        other_worker = CircuitBreaker("resend")
+        self.assertFalse(other_worker.allow())
+        self.assertTrue(other_worker.is_open())
+
+    def test_closed_state_is_cached_briefly(self):
+        worker = CircuitBreaker("resend")
+        self.assertFalse(worker.is_open())
+        with self.assertNumQueries(0):
+            self.assertFalse(worker.is_open())
+            self.assertTrue(worker.allow())
+
+        self.trip()
+        self.assertFalse(worker.is_open())
+        worker.closed_until = timezone.now()
+        self.assertTrue(worker.is_open())
+
+    def test_client_errors_do_not_trip(self):
+        self.server.mode = "invalid"
+        for _ in range(5):
+            self.send()
+        self.assertFalse(email_circuit.is_open())
+        self.assertEqual(self.server.requests, 5)
+
+    def test_half_open_probe_closes_on_success(self):
+        self.trip()
+        CircuitBreakerState.objects.update(opened_until=timezone.now() - timedelta(seconds=1))
+        email_circuit.open_until = None
+        self.server.mode = "ok"
+
+        # Only one worker gets to probe
+        self.assertTrue(CircuitBreaker("resend").allow())
+        self.assertFalse(CircuitBreaker("resend").allow())
+
+        CircuitBreakerState.objects.update(probe_until=None)
+        self.assertEqual(self.send(), {"id": "fake-email-id"})
+        self.assertFalse(email_circuit.is_open())
+        self.assertEqual(CircuitBreakerState.objects.get().failures, 0)
+
+    def test_failed_probe_reopens(self):
+        self.trip()
+        CircuitBreakerState.objects.update(opened_until=timezone.now() - timedelta(seconds=1))
+        email_circuit.open_until = None
+
+        self.send()
+        self.assertEqual(self.server.requests, 4)
+        self.assertTrue(email_circuit.is_open())
+        self.assertTrue(self.send()["circuit_open"])
+        self.assertEqual(self.server.requests, 4)
+
+    def test_investor_download_fails_fast_while_open(self):
+        self.trip()
+        response = APIClient().post(
+            "/api/investor/request-download/",
+            {"email": "investor@example.com"},
+            format="json",
+            HTTP_X_FORM_TOKEN=issue_form_token(time.time() - 60),
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        self.assertFalse(InvestorDownloadToken.objects.exists())
+
+
+@override_settings(RESEND_API_KEY="")
+class AbuseFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        abuse_filter.reset()
+        self.client = APIClient()
+
+    def submit(self, token=True, **fields):
+        data = {"full_name": "Jo", "email": "jo@example.com", "message": "Hi", "inquiry_type": "contact"}
+        data.update(fields)
+        headers = {}
+        if token:
+            headers["HTTP_X_FORM_TOKEN"] = issue_form_token(time.time() - 60)
+        return self.client.post("/api/leads/", data, format="json", **headers)
+
+    def test_genuine_submission_passes(self):
+        self.assertEqual(self.submit().status_code, 201)
+        self.assertFalse(abuse_filter.blocked)
+
+    def test_rejects_before_the_view(self):
+        cases = [
+            ({"token": False}, "form_token", 400),
+            ({"website": "http://spam.example"}, "honeypot", 403),
+            ({"email": "jo@mailinator.com"}, "disposable_email", 400),
+        ]
+        for fields, reason, status in cases:
+            with self.subTest(reason), self.assertNumQueries(0):
+                self.assertEqual(self.submit(**fields).status_code, status)
+        self.assertEqual(abuse_filter.blocked, {reason: 1 for _, reason, _ in cases})
+
+    def test_form_token_age(self):
+        for rendered_at, status in ((time.time(), 403), (time.time() - 2 * 86400, 400)):
+            response = self.client.post(
+                "/api/leads/", {}, format="json", HTTP_X_FORM_TOKEN=issue_form_token(rendered_at)
+            )
+            self.assertEqual(response.status_code, status)
+
+    def test_form_tokens_are_single_use(self):
+        token = issue_form_token(time.time() - 60)
+
+        def post(**fields):
+            data = {"full_name": "Jo", "email": "jo@example.com", "message": "Hi", "inquiry_type": "contact"}
+            return self.client.post("/api/leads/", {**data, **fields}, format="json", HTTP_X_FORM_TOKEN=token)
+
+        # A failed submission gives the token back
+        self.assertEqual(post(inquiry_type="unknown").status_code, 400)
+        self.assertEqual(post().status_code, 201)
+        self.assertEqual(post().status_code, 400)
+        self.assertEqual(abuse_filter.blocked, {"form_token_used": 1})
+
+    @override_settings(ABUSE_EMAIL_RATE="1/h", ABUSE_IP_RATE="1/h")
+    def test_idempotent_retries_are_not_counted(self):
+        token = issue_form_token(time.time() - 60)
+        data = {"full_name": "Jo", "email": "jo@example.com", "message": "Hi", "inquiry_type": "contact"}
+        for _ in range(3):
+            response = self.client.post(
+                "/api/leads/", data, format="json", HTTP_X_FORM_TOKEN=token, HTTP_IDEMPOTENCY_KEY="form-1",
+            )
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(Lead.objects.count(), 1)
+        self.assertFalse(abuse_filter.blocked)
+        self.assertEqual(self.submit(email="other@example.com").status_code, 429)
+
+    def test_multipart_fields_are_checked_after_parsing(self):
+        data = {"full_name": "Jo", "email": "jo@example.com", "phone": "1", "message": "Quote"}
+        cases = [({"website": "http://spam.example"}, 403), ({"email": "jo@mailinator.com"}, 400), ({}, 201)]
+        for fields, status in cases:
+            with self.subTest(fields=fields), mock.patch("inquiries.abuse.submitted_fields") as middleware_parse:
+                response = self.client.post(
+                    "/api/rfq/", {**data, **fields}, format="multipart",
+                    HTTP_X_FORM_TOKEN=issue_form_token(time.time() - 60),
+                )
+                self.assertEqual(response.status_code, status)
+                middleware_parse.assert_not_called()
+        self.assertEqual(abuse_filter.blocked, {"honeypot": 1, "disposable_email": 1})
+        self.assertEqual(RFQSubmission.objects.count(), 1)
+
+    @override_settings(ABUSE_EMAIL_RATE="2/h")
+    def test_email_rate_ignores_case(self):
+        self.assertEqual(self.submit(email="jo@example.com").status_code, 201)
+        self.assertEqual(self.submit(email="JO@example.com").status_code, 201)
+        response = self.submit(email="Jo@Example.com")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+
+class SubmissionEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", password="password", is_staff=True)
+        cls.user = User.objects.create_user("user", password="password")
+
+    def setUp(self):
+        cache.clear()
+
+    def ticket(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post("/api/events/ticket/")
+
+    def stream_user(self, **params):
+        return get_staff_user(RequestFactory().get("/api/events/", params))
+
+    def test_ticket_opens_one_stream(self):
+        response = self.ticket(self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-store", response["Cache-Control"])
+        ticket = response.data["ticket"]
+        self.assertEqual(self.stream_user(ticket=ticket), self.staff)
+        self.assertIsNone(self.stream_user(ticket=ticket))
+
+    def test_ticket_refused(self):
+        self.assertEqual(self.ticket(self.user).status_code, 403)
+        self.assertIsNone(self.stream_user(ticket="forged"))
+        self.assertIsNone(self.stream_user(token=str(AccessToken.for_user(self.staff))))
+        with override_settings(INQUIRY_EVENTS_TICKET_TTL=-1):
+            self.assertIsNone(self.stream_user(ticket=self.ticket(self.staff).data["ticket"]))
+
+    @mock.patch("inquiries.events.POLL_BATCH_SIZE", 2)
+    def test_poller_pages_each_table(self):
+        start = timezone.now() - timedelta(minutes=1)
+        cursors = {Lead: (start, None), RFQSubmission: (start, None)}
+        leads = [
+            Lead.objects.create(full_name=f"Lead {n}", email="lead@example.com", message="Hi", inquiry_type="contact")
+            for n in range(3)
+        ]
+        # Rows created in the same instant are told apart by their id
+        Lead.objects.update(created_at=start + timedelta(seconds=1))
+        RFQSubmission.objects.create(full_name="Buyer", email="buyer@example.com", phone="1", message="Quote")
+
+        first, second = poll_events(cursors), poll_events(cursors)
+        self.assertEqual([event["id"] for event in first if event["type"] == "lead"], [str(leads[0].id), str(leads[1].id)])
+        self.assertEqual([event["type"] for event in second], ["lead"])
+        self.assertEqual(second[0]["id"], str(leads[2].id))
+        self.assertEqual(sum(event["type"] == "rfq" for event in first), 1)
+        self.assertEqual(poll_events(cursors), [])
+
+
+@override_settings(EXPORT_JOBS_IN_PROCESS=False)
+class BackfillContactsTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def lead(self, email, days_ago, investor=True, **fields):
+        lead = Lead.objects.create(
+            full_name=fields.pop("full_name", "Jane"),
+            email=email,
+            message=INVESTOR_REQUEST_MESSAGE if investor else "Hello",
+            inquiry_type="investor" if investor else "contact",
+            **fields,
+        )
+        Lead.objects.filter(pk=lead.pk).update(contact=None, created_at=self.now - timedelta(days=days_ago))
+        return lead
+
+    def backfill(self):
+        call_command("backfill_contacts", "--batch-size", "2", stdout=io.StringIO())
+
+    def test_merges_repeat_investor_requests(self):
+        first = self.lead("jane@example.com", 30)
+        self.lead("JANE@example.com", 20)
+        self.lead("jane@example.com ", 10)
+        other = self.lead("jane@example.com", 5, investor=False)
+        Contact.objects.all().delete()
+
+        self.backfill()
+
+        contact = Contact.objects.get()
+        self.assertEqual(contact.investor_requests, 3)
+        self.assertEqual(contact.first_investor_request_at, self.now - timedelta(days=30))
+        self.assertEqual(contact.last_investor_request_at, self.now - timedelta(days=10))
+        self.assertEqual(set(contact.leads.values_list("pk", flat=True)), {first.pk, other.pk})
+
+    def test_adds_to_live_requests(self):
+        live = Contact.for_email("sam@example.com")
+        live.record_investor_request()
+        Lead.objects.create(
+            full_name="Sam", email="sam@example.com", message=INVESTOR_REQUEST_MESSAGE,
+            inquiry_type="investor", contact=live,
+        )
+        self.lead("sam@example.com", 40)
+        self.lead("SAM@example.com", 3)
+        rfq = RFQSubmission.objects.create(full_name="Sam", email="Sam@Example.com", phone="555", message="Quote")
+        RFQSubmission.objects.filter(pk=rfq.pk).update(contact=None)
+
+        self.backfill()
+
+        live.refresh_from_db()
+        self.assertEqual(live.investor_requests, 3)
+        self.assertEqual(live.first_investor_request_at, self.now - timedelta(days=40))
+        self.assertGreaterEqual(live.last_investor_request_at, self.now)
+        self.assertEqual(live.leads.count(), 1)
+        self.assertEqual(RFQSubmission.objects.get().contact, live)
+
+
+@override_settings(INVESTOR_DOWNLOAD_MAX_RESUMES=2)
+class AdminEmailSearchTests(TestCase):
+    def setUp(self):
+        Lead.objects.create(full_name="Ann", email="Ann@Acme.com", message="Hi", inquiry_type="contact")
+        Lead.objects.create(full_name="Bob", email="bob@acme.com", message="Hi", inquiry_type="contact")
+        unlinked = Lead.objects.create(full_name="Cy", email="cy@other.com", message="Hi", inquiry_type="contact")
+        Lead.objects.filter(pk=unlinked.pk).update(contact=None)
+        self.admin = admin.site._registry[Lead]
+        self.request = RequestFactory().get("/admin/inquiries/lead/")
+
+    def search(self, term):
+        results, _ = self.admin.get_search_results(self.request, Lead.objects.all(), term)
+        return sorted(results.values_list("full_name", flat=True))
+
+    def test_partial_addresses_use_the_usual_search(self):
+        self.assertEqual(self.search("@acme.com"), ["Ann", "Bob"])
+        self.assertEqual(self.search("bob@"), ["Bob"])
+        self.assertEqual(self.search("acme"), ["Ann", "Bob"])
+
+    def test_complete_addresses_match_the_contact_key(self):
+        # Stored as Ann@Acme.com; the contact key matches any case
+        self.assertEqual(self.search(" ANN@acme.COM "), ["Ann"])
+        self.assertEqual(self.search("cy@other.com"), ["Cy"])
+        self.assertEqual(self.search("nobody@acme.com"), [])
+
+
+class InvestorDownloadTests(TemporaryStorageMixin, TestCase):
+    content = b"%PDF-1.4 " + bytes(range(256)) * 64
+
+    def setUp(self):
+        Document.objects.create(file_name="Deck.pdf", category="investor", file=ContentFile(self.content, "deck.pdf"))
+        self.token = InvestorDownloadToken.objects.create(email="investor@example.com", max_downloads=2)
+
+    def download(self, stop_after=None, **headers):
+        """
+        Status of a download, read whole or closed after ``stop_after`` chunks;
+        only chunks followed by a request for more count as sent.
+        """
+        response = APIClient().get(f"/api/investor/download/{self.token.token}/", **headers)
+        if response.status_code in (200, 206):
+            chunks = iter(response.streaming_content)
+            if stop_after is None:
+                b"".join(chunks)
+            else:
+                for _ in range(stop_after):
+                    next(chunks)
+                response.close()
+        self.token.refresh_from_db()
+        return response.status_code
+
+    def counts(self):
+        return self.token.download_count, self.token.resume_count
+
+    def test_interrupted_downloads_resume_free(self):
+        self.assertEqual(self.download(stop_after=2), 200)
+        self.assertEqual((self.token.partial_start, self.token.partial_end), (0, 4096))
+        self.assertEqual(self.download(stop_after=0, HTTP_RANGE="bytes=4096-"), 206)
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertEqual(self.download(HTTP_RANGE="bytes=4000-"), 206)
+        self.assertEqual(self.counts(), (1, 2))
+        self.assertIsNone(self.token.partial_start)
+
+    def test_ranges_after_a_finished_download_count(self):
+        self.assertEqual(self.download(), 200)
+        self.assertEqual(self.download(HTTP_RANGE="bytes=1-"), 206)
+        self.assertEqual(self.counts(), (2, 0))
+        self.assertEqual(self.download(HTTP_RANGE="bytes=1-"), 403)
+
+    def test_only_ranges_continuing_the_stopped_response_are_free(self):
+        for header in ("bytes=100-", "bytes=5001-", "bytes=200-300, 400-"):
+            with self.subTest(header=header):
+                InvestorDownloadToken.objects.filter(pk=self.token.pk).update(
+                    download_count=1, partial_start=100, partial_end=5000,
+                )
+                self.download(stop_after=0, HTTP_RANGE=header)
+                self.assertEqual(self.counts(), (2, 0))
+
+    @override_settings(INVESTOR_DOWNLOAD_MAX_RESUMES=2)
+    def test_resumes_are_limited_per_download(self):
+        self.download(stop_after=2)
+        for start in (10, 20):
+            self.assertEqual(self.download(stop_after=0, HTTP_RANGE=f"bytes={start}-"), 206)
+        self.assertEqual(self.counts(), (1, 2))
+        self.assertEqual(self.download(stop_after=0, HTTP_RANGE="bytes=30-"), 206)
+        self.assertEqual(self.counts(), (2, 2))
+
+    def test_only_counted_downloads_resume(self):
+        InvestorDownloadToken.objects.filter(pk=self.token.pk).update(partial_start=0, partial_end=4096)
+        self.assertEqual(self.download(HTTP_RANGE="bytes=1-"), 206)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_expired_links_do_not_resume(self):
+        self.download(stop_after=2)
+        InvestorDownloadToken.objects.filter(pk=self.token.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.download(HTTP_RANGE="bytes=10-"), 403)
+
+    def test_missing_file_is_not_found(self):
+        document = Document.objects.get()
+        for file_size in (None, document.file_size):
+            with self.subTest(file_size=file_size):
+                Document.objects.filter(pk=document.pk).update(file_size=file_size)
+                with mock.patch.object(type(document.file.storage), "_open", side_effect=FileNotFoundError), \
+                        mock.patch.object(type(document.file.storage), "size", side_effect=FileNotFoundError):
+                    self.assertEqual(self.download(), 404)
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_serves_requested_ranges(self):
+        InvestorDownloadToken.objects.filter(pk=self.token.pk).update(max_downloads=3)
+        token_url = f"/api/investor/download/{self.token.token}/"
+        response = APIClient().get(token_url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        response = APIClient().get(token_url, HTTP_RANGE="bytes=1-", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+
+        response = APIClient().get(token_url, HTTP_RANGE=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, 416)
+
+
+def lead_created_at(when, name="Old lead"):
+    """A lead keyed and dated as if created at ``when``"""
+    lead = Lead.objects.create(
+        id=uuid7_from_datetime(when), full_name=name, email="old@example.com", message="Hi", inquiry_type="contact",
+    )
+    Lead.objects.filter(pk=lead.pk).update(created_at=when)
+    lead.created_at = when
+    return lead
+
+
+class ArchivePartitionTests(TemporaryStorageMixin, TestCase):
+    month = date(2024, 1, 1)
+
+    def setUp(self):
+        # A detached month: a plain table holding January's leads
+        self.table = partition_name(Lead._meta.db_table, self.month)
+        self.leads = [
+            lead_created_at(datetime(2024, 1, day, tzinfo=dt_timezone.utc), f"January {day}") for day in (3, 20)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE "{self.table}" AS SELECT * FROM "{Lead._meta.db_table}"')
+        Lead.objects.all().delete()
+        patcher = mock.patch("inquiries.partitions.monthly_tables", return_value={self.month: False})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def archive_files(self):
+        storage = ArchivedPartition._meta.get_field("file").storage
+        return storage.listdir("2024")[1] if storage.exists("2024") else []
+
+    def test_archives_rows_newest_first_and_drops_the_table(self):
+        archive = archive_partition(Lead, self.month)
+        self.assertEqual(archive.row_count, 2)
+        self.assertNotIn(self.table, connection.introspection.table_names())
+        records = list(archived_records(Lead))
+        self.assertEqual([lead.full_name for lead in records], ["January 20", "January 3"])
+        self.assertEqual(records[1].pk, self.leads[0].pk)
+        self.assertEqual(records[1].created_at.date(), date(2024, 1, 3))
+
+    def test_rebuilding_stats_keeps_archived_days(self):
+        DailyStat.objects.all().delete()
+        for lead in self.leads:
+            record_stat("lead", lead.inquiry_type, when=lead.created_at)
+        # Wrong count for a day after the archived month, and a live lead
+        record_stat("lead", "contact", when=datetime(2024, 2, 1, tzinfo=dt_timezone.utc), amount=5)
+        lead_created_at(datetime(2024, 2, 10, tzinfo=dt_timezone.utc))
+        archive_partition(Lead, self.month)
+
+        rebuild_daily_stats()
+        counts = dict(DailyStat.objects.filter(metric="lead").values_list("date", "count"))
+        self.assertEqual(counts, {date(2024, 1, 3): 1, date(2024, 1, 20): 1, date(2024, 2, 10): 1})
+
+    def test_failed_archive_leaves_no_file(self):
+        ArchivedPartition.objects.create(resource="leads", month=self.month, row_count=0, file="2024/other.ndjson.gz")
+        with self.assertRaises(IntegrityError):
+            archive_partition(Lead, self.month)
+        self.assertEqual(self.archive_files(), [])
+        self.assertIn(self.table, connection.introspection.table_names())
+
+
+@skipUnless(connection.vendor == "postgresql", "partitioning needs PostgreSQL")
+@override_settings(INQUIRY_PARTITION_MONTHS_AHEAD=2)
+class PartitionTests(TemporaryStorageMixin, TestCase):
+    def test_convert_ensure_and_archive(self):
+        now = timezone.now()
+        old = lead_created_at(now - timedelta(days=400), "Last year")
+        recent = lead_created_at(now, "This month")
+
+        convert_to_partitioned(Lead)
+        self.assertTrue(is_partitioned(Lead))
+        self.assertEqual(set(Lead.objects.values_list("pk", flat=True)), {old.pk, recent.pk})
+        months = monthly_tables(Lead)
+        first, last = month_start(old.created_at), add_months(month_start(now), 2)
+        self.assertEqual(min(months), first)
+        self.assertEqual(max(months), last)
+        self.assertEqual(len(months), (last.year - first.year) * 12 + last.month - first.month + 1)
+        self.assertTrue(all(months.values()))
+        self.assertEqual(ensure_partitions(Lead), [])
+
+        # A row older than every partition lands in the default one, and moves
+        # into its month when that month is created
+        older = lead_created_at(now - timedelta(days=800), "Two years ago")
+        created = ensure_partitions(Lead, since=older.created_at)
+        month = month_start(older.created_at)
+        self.assertEqual(min(created), month)
+        self.assertEqual(max(created), add_months(first, -1))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM "{partition_name(Lead._meta.db_table, month)}"')
+            self.assertEqual(cursor.fetchall(), [(older.pk,)])
+
+        archive = archive_partition(Lead, month)
+        self.assertEqual(archive.row_count, 1)
+        self.assertNotIn(month, monthly_tables(Lead))
+        self.assertFalse(Lead.objects.filter(pk=older.pk).exists())
+        self.assertEqual([lead.pk for lead in archived_records(Lead)], [older.pk])
+        self.assertEqual(ensure_partitions(Lead, since=older.created_at), [])
+
+        lead = Lead.objects.create(full_name="New", email="new@example.com", message="Hi", inquiry_type="contact")
+        self.assertEqual(Lead.objects.get(pk=lead.pk).full_name, "New")
+
+
+class ExportJobTests(TemporaryStorageMixin, TestCase):
+    def setUp(self):
+        self.leads = [
+            Lead.objects.create(full_name=f"Lead {n}", email=f"lead{n}@example.com", message="Hi", inquiry_type="contact")
+            for n in range(3)
+        ]
+
+    def read_rows(self, job):
+        with job.file.open("rb") as stored:
+            data = stored.read()
+        if job.format == "csv_gz":
+            data = gzip.decompress(data)
+        if job.format in ("csv", "csv_gz"):
+            return list(csv.reader(io.StringIO(data.decode())))
+        if job.format == "parquet":
+            import pyarrow.parquet
+
+            table = pyarrow.parquet.read_table(io.BytesIO(data))
+            return [table.column_names] + [list(row.values()) for row in table.to_pylist()]
+        from openpyxl import load_workbook
+
+        return [list(row) for row in load_workbook(io.BytesIO(data), read_only=True).active.values]
+
+    def test_lifecycle(self):
+        job, created = get_or_create_export_job("leads", "csv")
+        self.assertTrue(created)
+        self.assertEqual(job.status, "pending")
+        self.assertEqual(get_or_create_export_job("leads", "csv"), (job, False))
+
+        run_export_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.row_count), ("completed", 3))
+        self.assertIsNotNone(job.started_at)
+        # Unchanged rows reuse the artifact; an edited row needs a new one
+        self.assertEqual(get_or_create_export_job("leads", "csv"), (job, False))
+        self.leads[0].message = "Edited"
+        self.leads[0].save()
+        self.assertTrue(get_or_create_export_job("leads", "csv")[1])
+
+    def test_formats(self):
+        for export_format in available_formats():
+            with self.subTest(export_format):
+                job, _ = get_or_create_export_job("leads", export_format)
+                run_export_job(job)
+                job.refresh_from_db()
+                self.assertEqual(job.status, "completed", job.error)
+                rows = self.read_rows(job)
+                self.assertEqual(rows[0][:3], ["ID", "Full Name", "Email"])
+                # Newest first
+                self.assertEqual([row[1] for row in rows[1:]], ["Lead 2", "Lead 1", "Lead 0"])
+
+    @override_settings(EXPORT_JOB_TIMEOUT=60)
+    def test_stale_jobs_are_failed(self):
+        stuck, _ = get_or_create_export_job("leads", "csv")
+        ExportJob.objects.filter(pk=stuck.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        job, created = get_or_create_export_job("leads", "csv")
+        self.assertTrue(created)
+        stuck.refresh_from_db()
+        self.assertEqual((stuck.status, stuck.error), ("failed", "Timed out"))
+
+    def test_timed_out_job_is_not_completed(self):
+        job, _ = get_or_create_export_job("leads", "csv")
+
+        def time_out(output, headers, rows):
+            ExportJob.objects.filter(pk=job.pk).update(status="failed", error="Timed out")
+            output.write(b"late")
+
+        with mock.patch.dict("inquiries.exports.WRITERS", {"csv": time_out}):
+            run_export_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertFalse(job.file)
+
+    def test_concurrent_create_returns_the_other_job(self):
+        job, _ = get_or_create_export_job("leads", "csv")
+        ExportJob.objects.filter(pk=job.pk).update(status="failed")
+        with mock.patch.object(ExportJob.objects, "create", side_effect=IntegrityError):
+            self.assertEqual(get_or_create_export_job("leads", "csv"), (job, False))
+
+
+class DailyStatTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+        for inquiry_type in ("contact", "contact", "investor"):
+            Lead.objects.create(full_name="Jo", email="jo@example.com", message="Hi", inquiry_type=inquiry_type)
+        RFQSubmission.objects.create(full_name="Buyer", email="buyer@example.com", phone="1", message="Quote")
+        record_stat("investor_download", when=timezone.now() - timedelta(days=1), amount=2)
+
+    def counts(self):
+        return {(stat.date, stat.metric, stat.key): stat.count for stat in DailyStat.objects.all()}
+
+    def test_created_rows_are_counted(self):
+        summary = summarize(self.yesterday, self.today)
+        self.assertEqual(summary["totals"]["leads"], {"contact": 2, "investor": 1, "total": 3})
+        self.assertEqual(summary["totals"]["rfqs"], 1)
+        self.assertEqual(summary["totals"]["investor_downloads"], 2)
+        self.assertEqual([day["date"] for day in summary["daily"]], [self.yesterday.isoformat(), self.today.isoformat()])
+        self.assertEqual(summary["daily"][0]["leads"], {})
+        self.assertEqual(summary["daily"][1]["rfqs"], 1)
+
+    def test_rebuild_matches_recorded_counts(self):
+        recorded = self.counts()
+        DailyStat.objects.filter(metric="lead").update(count=99)
+        record_stat("rfq", when=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(rebuild_daily_stats(), 3)
+        self.assertEqual(self.counts(), recorded)
+
+    def test_rebuild_keeps_days_outside_the_range(self):
+        record_stat("rfq", when=timezone.now() - timedelta(days=1))
+        rebuild_daily_stats(start=self.today)
+        self.assertEqual(self.counts()[(self.yesterday, "rfq", "")], 1)
+        self.assertEqual(self.counts()[(self.yesterday, "investor_download", "")], 2)
+
+    def test_stats_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("staff", is_staff=True))
+        response = client.get("/api/stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["start"], self.yesterday)
+        self.assertEqual(response.data["totals"]["leads"]["total"], 3)
+        for params in ({"start": "19-10-2026"}, {"start": self.today.isoformat(), "end": self.yesterday.isoformat()}):
+            with self.subTest(params=params):
+                self.assertEqual(client.get("/api/stats/", params).status_code, 400)
+
+
+class NotificationDigestTests(TestCase):
+    def hold(self, message, **fields):
+        return AdminNotification.objects.create(
+            kind="inquiry", recipients=["admin@example.com"], subject="New Inquiry", message=message, **fields
+        )
+
+    @mock.patch("inquiries.email_service.send_email", return_value={"id": "sent"})
+    def test_digest_escapes_plain_messages(self, send):
+        self.hold("<script>alert(1)</script>")
+        self.assertEqual(send_notification_digests(), 1)
+        html = send.call_args.kwargs["html"]
+        self.assertIn("<pre>&lt;script&gt;alert(1)&lt;/script&gt;</pre>", html)
+        self.assertNotIn("<script>", html)
+
+    @mock.patch("inquiries.email_service.send_email", return_value={"id": "sent"})
+    def test_stale_claims_are_taken_over(self, send):
+        stale = self.hold("Left by a run that died", digest_batch=uuid.uuid4(), digest_claimed_at=timezone.now() - timedelta(hours=1))
+        self.hold("Claimed by a running digest", digest_batch=uuid.uuid4(), digest_claimed_at=timezone.now())
+        self.assertEqual(send_notification_digests(), 1)
+        stale.refresh_from_db()
+        self.assertIsNotNone(stale.sent_at)
+
+    @mock.patch("inquiries.email_service.send_email", return_value={"error": "down"})
+    def test_failed_digest_releases_its_claim(self, send):
+        notification = self.hold("Retry me")
+        self.assertEqual(send_notification_digests(), 0)
+        notification.refresh_from_db()
+        self.assertIsNone(notification.digest_batch)
+        self.assertIsNone(notification.digest_claimed_at)
+        self.assertIsNone(notification.sent_at)
+
+
+@override_settings(RESEND_API_KEY="")
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        abuse_filter.reset()
+
+    def submit(self, key, ip="203.0.113.1", **fields):
+        data = {"full_name": "Jo", "email": "jo@example.com", "message": "Hi", "inquiry_type": "contact"}
+        data.update(fields)
+        return APIClient().post(
+            "/api/leads/", data, format="json", REMOTE_ADDR=ip,
+            HTTP_IDEMPOTENCY_KEY=key, HTTP_X_FORM_TOKEN=issue_form_token(time.time() - 60),
+        )
+
+    def test_retry_is_replayed(self):
+        first = self.submit("form-1")
+        retry = self.submit("form-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Lead.objects.count(), 1)
+
+    def test_key_reused_for_another_body(self):
+        self.submit("form-1")
+        self.assertEqual(self.submit("form-1", message="Different").status_code, 422)
+
+    def test_keys_are_per_client(self):
+        mine = self.submit("shared-key", ip="203.0.113.1")
+        theirs = self.submit("shared-key", ip="198.51.100.7", full_name="Someone Else")
+        self.assertEqual(theirs.status_code, 201)
+        self.assertFalse(theirs.has_header("Idempotent-Replayed"))
+        self.assertNotEqual(theirs.data["id"], mine.data["id"])
+        self.assertEqual(Lead.objects.count(), 2)
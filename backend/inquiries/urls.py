@@ -3,15 +3,27 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     LeadViewSet, 
     RFQSubmissionViewSet,
+    ExportJobViewSet,
+    download_export,
     request_investor_download,
-    download_investor_documents
+    download_investor_documents,
+    submission_events,
+    events_ticket,
+    stats,
+    form_token,
 )
 
 router = DefaultRouter()
 router.register(r'leads', LeadViewSet, basename='lead')
 router.register(r'rfq', RFQSubmissionViewSet, basename='rfq')
+router.register(r'exports', ExportJobViewSet, basename='export')
 
 urlpatterns = [
+    path('forms/token/', form_token, name='form-token'),
     path('investor/request-download/', request_investor_download, name='investor-request-download'),
     path('investor/download/<str:token>/', download_investor_documents, name='investor-download'),
+    path('events/', submission_events, name='submission-events'),
+    path('events/ticket/', events_ticket, name='events-ticket'),
+    path('stats/', stats, name='stats'),
+    path('exports/download/<str:signature>/', download_export, name='export-download'),
 ] + router.urls
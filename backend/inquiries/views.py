@@ -1,25 +1,66 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import filters, mixins, viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.conf import settings
-from django.http import FileResponse, Http404, HttpResponse
+from django.contrib.auth.models import User
+from django.core import signing
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
 from django_ratelimit.decorators import ratelimit
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
 from django.utils.decorators import method_decorator
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+import asyncio
 import csv
-from .models import Lead, RFQSubmission, InvestorDownloadToken
+import logging
+import os
+from .models import (
+    Contact,
+    DailyStat,
+    ExportJob,
+    INVESTOR_REQUEST_MESSAGE,
+    InvestorDownloadToken,
+    Lead,
+    RFQSubmission,
+)
 from .serializers import (
+    EXPORT_DOWNLOAD_SALT,
+    ExportJobSerializer,
     LeadSerializer,
     RFQSubmissionSerializer,
     InvestorDownloadRequestSerializer,
 )
 from .email_service import (
+    email_circuit,
     send_inquiry_notification,
     send_rfq_notification,
     send_investor_download_link,
     send_investor_download_admin_notification,
 )
+from .abuse import issue_form_token, screen_parsed_fields
+from .events import broker, issue_stream_ticket, redeem_stream_ticket
+from .idempotency import idempotent
+from .exports import get_or_create_export_job
+from .imports import LeadImporter
+from .stats import record_stat, summarize
 from docs.models import Document
+from docs.ranges import RangeNotSatisfiable, file_response, requested_ranges
+from no_dry_starts.bulk_import import run_import
+from no_dry_starts.search import EstimatedCountPagination
+
+logger = logging.getLogger(__name__)
 
 
 class AllowAnyPost(permissions.BasePermission):
@@ -31,19 +72,37 @@ class AllowAnyPost(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
+def filter_by_email(queryset, request):
+    """Apply ?email= as an indexed, case-insensitive match on the linked contact"""
+    email = request.query_params.get("email")
+    if email:
+        queryset = queryset.filter(contact__email_key=Contact.normalize_email(email))
+    return queryset
+
+
+@method_decorator(idempotent("leads"), name="create")
+@method_decorator(screen_parsed_fields, name="create")
 @method_decorator(ratelimit(key="ip", rate="10/h", method="POST"), name="create")
 class LeadViewSet(viewsets.ModelViewSet):
     """
     ViewSet for general contact leads.
     Public can POST (create) - Rate limited to 10 submissions per hour per IP.
-    Admin can view all.
+    Retries sent with the same Idempotency-Key header replay the first response.
+    Admin can view all, or one sender's with ?email= (any letter case).
+    ?search= matches name, email and message text (trigram-indexed on PostgreSQL).
     """
 
     queryset = Lead.objects.all()
     serializer_class = LeadSerializer
     permission_classes = [AllowAnyPost]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ["full_name", "email", "message"]
+    pagination_class = EstimatedCountPagination
     http_method_names = ["get", "post", "delete"]  # No PUT/PATCH
 
+    def get_queryset(self):
+        return filter_by_email(super().get_queryset(), self.request)
+
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def export_csv(self, request):
         """Export all leads to CSV file"""
@@ -63,7 +122,7 @@ class LeadViewSet(viewsets.ModelViewSet):
             ]
         )
 
-        for lead in Lead.objects.all().order_by("-created_at"):
+        for lead in Lead.objects.all().order_by("-id"):
             writer.writerow(
                 [
                     str(lead.id),
@@ -78,6 +137,16 @@ class LeadViewSet(viewsets.ModelViewSet):
 
         return response
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_import(self, request):
+        """Create leads in bulk from a CSV or NDJSON body (historical CRM data)"""
+        return run_import(request, LeadImporter())
+
     def perform_create(self, serializer):
         """Send email notification when new lead is created"""
         lead = serializer.save()
@@ -85,24 +154,36 @@ class LeadViewSet(viewsets.ModelViewSet):
         # Send email notification
         try:
             send_inquiry_notification(lead)
-        except Exception as e:
+        except Exception:
             # Log error but don't fail the request
-            print(f"Failed to send inquiry notification email: {e}")
+            logger.exception(
+                "Failed to send inquiry notification email", extra={"lead_id": str(lead.id)}
+            )
 
 
+@method_decorator(idempotent("rfq"), name="create")
+@method_decorator(screen_parsed_fields, name="create")
 @method_decorator(ratelimit(key="ip", rate="5/h", method="POST"), name="create")
 class RFQSubmissionViewSet(viewsets.ModelViewSet):
     """
     ViewSet for RFQ submissions.
     Public can POST (create) - Rate limited to 5 submissions per hour per IP.
-    Admin can view all.
+    Retries sent with the same Idempotency-Key header replay the first response.
+    Admin can view all, or one sender's with ?email= (any letter case).
+    ?search= matches name, email, company and message text (trigram-indexed on PostgreSQL).
     """
 
     queryset = RFQSubmission.objects.all()
     serializer_class = RFQSubmissionSerializer
     permission_classes = [AllowAnyPost]
+    filter_backends = [filters.SearchFilter]
+    search_fields = ["full_name", "email", "company", "message"]
+    pagination_class = EstimatedCountPagination
     http_method_names = ["get", "post", "delete"]  # No PUT/PATCH
 
+    def get_queryset(self):
+        return filter_by_email(super().get_queryset(), self.request)
+
     @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def export_csv(self, request):
         """Export all RFQ submissions to CSV file"""
@@ -125,7 +206,7 @@ class RFQSubmissionViewSet(viewsets.ModelViewSet):
             ]
         )
 
-        for rfq in RFQSubmission.objects.all().order_by("-created_at"):
+        for rfq in RFQSubmission.objects.all().order_by("-id"):
             writer.writerow(
                 [
                     str(rfq.id),
@@ -148,19 +229,141 @@ class RFQSubmissionViewSet(viewsets.ModelViewSet):
         # Send email notification to admin and RFQ email
         try:
             send_rfq_notification(rfq)
-        except Exception as e:
+        except Exception:
             # Log error but don't fail the request
-            print(f"Failed to send RFQ notification email: {e}")
+            logger.exception(
+                "Failed to send RFQ notification email", extra={"rfq_id": str(rfq.id)}
+            )
+
+
+class ExportJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Background exports of leads and RFQ submissions (admin only).
+    POST creates (or joins) an export job, GET polls its status; once
+    completed, download_url is a signed, time-limited link to the file.
+    """
+
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job, created = get_or_create_export_job(
+            serializer.validated_data["resource"],
+            serializer.validated_data.get("format", "csv"),
+            user=request.user,
+        )
+        return Response(
+            self.get_serializer(job).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def download_export(request, signature):
+    """Download a finished export through a signed, time-limited URL."""
+    try:
+        job_id = signing.TimestampSigner(salt=EXPORT_DOWNLOAD_SALT).unsign(
+            signature, max_age=settings.EXPORT_URL_MAX_AGE
+        )
+    except signing.BadSignature:
+        return Response(
+            {"error": "This download link is invalid or has expired"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    job = get_object_or_404(ExportJob, pk=job_id, status="completed")
+    if not job.file:
+        raise Http404("Export file not found")
+
+    # Private S3 objects are served by S3 through a presigned URL
+    if hasattr(job.file.storage, "bucket"):
+        return HttpResponseRedirect(job.file.url)
+    return FileResponse(
+        job.file.open("rb"), as_attachment=True, filename=os.path.basename(job.file.name)
+    )
+
+
+def parse_date_param(request, name):
+    """Parse an optional YYYY-MM-DD query parameter; ValueError if malformed."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    return parsed
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def stats(request):
+    """
+    Lead, RFQ and investor activity for a date range, read from daily rollups.
+    Query params: start, end (YYYY-MM-DD, inclusive). Defaults to everything
+    recorded up to today.
+    """
+    try:
+        start = parse_date_param(request, "start")
+        end = parse_date_param(request, "end")
+    except ValueError:
+        return Response(
+            {"error": "start and end must be dates in YYYY-MM-DD format"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    end = end or timezone.localdate()
+    if start is None:
+        first = DailyStat.objects.order_by("date").values_list("date", flat=True).first()
+        start = first or end
+    if start > end:
+        return Response(
+            {"error": "start must not be after end"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return Response({"start": start, "end": end, **summarize(start, end)})
+
+
+def email_unavailable_response():
+    return Response(
+        {"error": "Email is temporarily unavailable. Please try again shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(email_circuit.retry_after())},
+    )
+
+
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def form_token(request):
+    """
+    Signed render time for a public form, sent back as the X-Form-Token
+    header when the form is submitted (see inquiries.abuse).
+    """
+    response = Response({"token": issue_form_token()})
+    patch_cache_control(response, private=True, no_store=True)
+    return response
 
 
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@idempotent("investor_download")
+@screen_parsed_fields
 @ratelimit(key="ip", rate="3/h", method="POST")
 def request_investor_download(request):
     """
     Request a secure download link for investor documents.
     Creates a time-limited token and sends it via email.
-    Rate limited to 3 requests per hour per IP.
+    Rate limited to 3 requests per hour per IP; retries sent with the same
+    Idempotency-Key header replay the first response.
     """
     serializer = InvestorDownloadRequestSerializer(data=request.data)
     if not serializer.is_valid():
@@ -168,16 +371,23 @@ def request_investor_download(request):
 
     email = serializer.validated_data["email"]
 
+    # Fail fast instead of issuing a token we can't deliver
+    if email_circuit.is_open():
+        return email_unavailable_response()
+
     # Create download token
-    token = InvestorDownloadToken.objects.create(email=email)
-
-    # Create lead entry for tracking
-    Lead.objects.create(
-        full_name=serializer.validated_data.get("name", "Investor"),
-        email=email,
-        message=f"Requested investor documents download",
-        inquiry_type="investor",
-    )
+    contact = Contact.for_email(email, serializer.validated_data.get("name", ""))
+    token = InvestorDownloadToken.objects.create(email=email, contact=contact)
+
+    # Record the first request as a lead; repeats only bump the contact's counter
+    if contact.record_investor_request() == 1:
+        Lead.objects.create(
+            full_name=serializer.validated_data.get("name", "Investor"),
+            email=email,
+            message=INVESTOR_REQUEST_MESSAGE,
+            inquiry_type="investor",
+            contact=contact,
+        )
 
     # Generate download URL
     download_url = (
@@ -186,9 +396,12 @@ def request_investor_download(request):
 
     # Send email with download link
     try:
-        send_investor_download_link(
+        sent = send_investor_download_link(
             email=email, download_url=download_url, token_expires=token.expires_at
         )
+        if isinstance(sent, dict) and sent.get("circuit_open"):
+            token.delete()
+            return email_unavailable_response()
 
         # Notify admin
         send_investor_download_admin_notification(
@@ -198,8 +411,9 @@ def request_investor_download(request):
             download_url=download_url,
         )
 
-    except Exception as e:
+    except Exception:
         # If email fails, delete the token and return error
+        logger.exception("Failed to send investor download email")
         token.delete()
         return Response(
             {"error": "Failed to send email. Please try again later."},
@@ -217,15 +431,44 @@ def request_investor_download(request):
 def download_investor_documents(request, token):
     """
     Download investor documents using a secure token.
-    Token is time-limited and has a maximum number of uses.
+    Token is time-limited and has a maximum number of uses. Supports Range
+    and If-Range; a single range continuing a response that stopped short
+    doesn't use up the token, up to INVESTOR_DOWNLOAD_MAX_RESUMES times per
+    download.
     """
     try:
         download_token = InvestorDownloadToken.objects.get(token=token)
     except InvestorDownloadToken.DoesNotExist:
         raise Http404("Invalid or expired download link")
 
+    # For simplicity, serve the first investor document
+    # In production, you might want to return a ZIP of all documents
+    document = Document.objects.filter(category="investor").first()
+
+    size = None
+    ranges = None
+    if document is not None:
+        try:
+            # Use the metadata stored at upload instead of asking storage
+            size = document.file_size if document.file_size is not None else document.file.size
+        except OSError:
+            logger.exception("Investor document file is missing")
+            document = None
+    etag = f'"{document.sha256}"' if document and document.sha256 else None
+    if document is not None:
+        try:
+            ranges = requested_ranges(request, size, etag)
+        except RangeNotSatisfiable:
+            ranges = []
+
+    resuming = (
+        bool(ranges)
+        and len(ranges) == 1
+        and download_token.claim_resume(ranges[0][0])
+    )
+
     # Check if token is still valid
-    if not download_token.is_valid():
+    if not (resuming or download_token.is_valid()):
         return Response(
             {
                 "error": "This download link has expired or reached its maximum usage limit"
@@ -233,29 +476,117 @@ def download_investor_documents(request, token):
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    # Get investor documents
-    documents = Document.objects.filter(category="investor")
-
-    if not documents.exists():
+    if document is None:
         return Response(
             {"error": "No investor documents available"},
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    # For simplicity, return the first investor document
-    # In production, you might want to return a ZIP of all documents
-    document = documents.first()
-
-    # Increment download count
-    download_token.increment_download()
+    if ranges == []:
+        return Response(
+            {"error": "Requested range not satisfiable"},
+            status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
 
     # Return the file
     try:
-        return FileResponse(
-            document.file.open("rb"), as_attachment=True, filename=document.file_name
+        response = file_response(
+            document.file,
+            ranges,
+            size,
+            filename=document.file_name,
+            content_type=document.mime_type,
+            etag=etag,
         )
-    except Exception as e:
+    except FileNotFoundError:
+        logger.exception("Investor document file is missing")
+        return Response(
+            {"error": "No investor documents available"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    except Exception:
+        logger.exception("Failed to open investor document")
         return Response(
             {"error": "Failed to retrieve document"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+    # Count each download once; continuations are free
+    if not resuming:
+        download_token.increment_download()
+        record_stat("investor_download")
+    if ranges is None or len(ranges) == 1:
+        start = ranges[0][0] if ranges else 0
+        response.streaming_content = download_token.track_progress(response.streaming_content, start, size)
+    return response
+
+
+def get_staff_user(request):
+    """
+    Authenticate a JWT from the Authorization header, or a ``ticket`` query
+    parameter from events_ticket (EventSource cannot send headers). Returns
+    None unless staff.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        user_id = redeem_stream_ticket(request.GET.get("ticket", ""))
+        user = User.objects.filter(pk=user_id, is_active=True).first() if user_id else None
+        return user if user and user.is_staff else None
+    raw_token = authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        user = authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    return user if user.is_staff else None
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAdminUser])
+def events_ticket(request):
+    """
+    Single-use ticket to open the submission event stream with, valid for
+    INQUIRY_EVENTS_TICKET_TTL seconds. Keeps the JWT out of the stream URL.
+    """
+    response = Response({"ticket": issue_stream_ticket(request.user)})
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+async def submission_events(request):
+    """
+    Server-sent event stream of new leads and RFQ submissions for staff.
+    Served from the ASGI application; each event carries one new row as JSON.
+    """
+    user = await sync_to_async(get_staff_user)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    queue = broker.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(
+                        queue.get(), timeout=settings.INQUIRY_EVENTS_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: submission\ndata: {payload}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
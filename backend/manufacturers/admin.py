@@ -1,9 +1,17 @@
 from django.contrib import admin
-from .models import Manufacturer
+from .models import Manufacturer, PostalCentroid
 
 
 @admin.register(Manufacturer)
 class ManufacturerAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'phone', 'active', 'created_at']
-    list_filter = ['active', 'created_at']
-    search_fields = ['name', 'email', 'phone']
+    list_display = ['name', 'email', 'phone', 'postal_code', 'active', 'created_at']
+    list_filter = ['active', 'country', 'created_at']
+    search_fields = ['name', 'email', 'phone', 'postal_code']
+    readonly_fields = ['latitude', 'longitude']
+
+
+@admin.register(PostalCentroid)
+class PostalCentroidAdmin(admin.ModelAdmin):
+    list_display = ['country', 'postal_code', 'place_name', 'latitude', 'longitude']
+    list_filter = ['country']
+    search_fields = ['postal_code', 'place_name']
@@ -0,0 +1,27 @@
+from no_dry_starts.bulk_import import Importer
+from no_dry_starts.http_cache import schedule_purge
+from .models import Manufacturer, PostalCentroid
+from .spatial import invalidate_index
+
+
+class ManufacturerImporter(Importer):
+    model = Manufacturer
+    fields = (
+        'name', 'description', 'address', 'postal_code', 'country',
+        'phone', 'email', 'website', 'active',
+    )
+
+    def clean(self, values):
+        values['country'] = values['country'].upper()
+
+    def prepare(self, rows):
+        # save() is bypassed, so locate the chunk's postal codes here in one query
+        located = PostalCentroid.locate_many(
+            {(row['country'], row['postal_code']) for row in rows if row['postal_code']}
+        )
+        for row in rows:
+            row['latitude'], row['longitude'] = located.get((row['country'], row['postal_code']), (None, None))
+
+    def finish(self):
+        schedule_purge('manufacturers')
+        invalidate_index()
@@ -0,0 +1,88 @@
+import io
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from manufacturers.models import Manufacturer, PostalCentroid, normalize_postal_code
+
+BATCH_SIZE = 5000
+
+
+def geonames_lines(path):
+    """Lines of a GeoNames postal code dump, plain (US.txt) or zipped (US.zip)"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name.lower() == 'readme.txt' or not name.lower().endswith('.txt'):
+                    continue
+                with archive.open(name) as member:
+                    yield from io.TextIOWrapper(member, encoding='utf-8')
+    else:
+        with open(path, encoding='utf-8') as lines:
+            yield from lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Load postal code centroids from GeoNames postal code files "
+        "(https://download.geonames.org/export/zip/, e.g. US.zip) and locate "
+        "every manufacturer again"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help="GeoNames .txt or .zip files")
+        parser.add_argument(
+            '--country', action='append', default=[],
+            help="Only load this ISO country code (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        countries = {country.upper() for country in options['country']}
+        # A code shared by several places is placed at their average
+        places = {}
+        for path in options['paths']:
+            try:
+                for line in geonames_lines(path):
+                    columns = line.rstrip('\n').split('\t')
+                    if len(columns) < 11:
+                        continue
+                    country, postal_code = columns[0].upper(), normalize_postal_code(columns[1])
+                    if not postal_code or (countries and country not in countries):
+                        continue
+                    try:
+                        latitude, longitude = float(columns[9]), float(columns[10])
+                    except ValueError:
+                        continue
+                    entry = places.setdefault((country, postal_code), [columns[2][:180], 0.0, 0.0, 0])
+                    entry[1] += latitude
+                    entry[2] += longitude
+                    entry[3] += 1
+            except OSError as e:
+                raise CommandError(f"Cannot read {path}: {e}")
+
+        centroids = [
+            PostalCentroid(
+                country=country, postal_code=postal_code, place_name=place_name,
+                latitude=latitude / count, longitude=longitude / count,
+            )
+            for (country, postal_code), (place_name, latitude, longitude, count) in places.items()
+        ]
+        with transaction.atomic():
+            for start in range(0, len(centroids), BATCH_SIZE):
+                PostalCentroid.objects.bulk_create(
+                    centroids[start:start + BATCH_SIZE],
+                    update_conflicts=True,
+                    unique_fields=['country', 'postal_code'],
+                    update_fields=['place_name', 'latitude', 'longitude'],
+                )
+
+        # save() locates each manufacturer and updates the nearest-partner index
+        located = 0
+        for manufacturer in Manufacturer.objects.exclude(postal_code=''):
+            manufacturer.save()
+            located += manufacturer.latitude is not None
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {len(centroids)} postal codes, located {located} manufacturers"
+        ))
@@ -1,21 +1,111 @@
+import re
+
+from django.conf import settings
 from django.db import models
-import uuid
+from no_dry_starts.ids import uuid7
+
+
+def normalize_postal_code(value):
+    """Upper case without spaces, as postal codes are stored in PostalCentroid"""
+    return re.sub(r'\s+', '', value or '').upper()
+
+
+def postal_code_candidates(value):
+    """
+    Normalized forms of ``value`` to look up, most precise first: the whole
+    code, then its leading part (ZIP+4 ``12345-6789`` -> ``12345``, UK
+    ``SW1A 1AA`` -> ``SW1A``), for tables that only hold the coarser code.
+    """
+    candidates = [normalize_postal_code(value)]
+    leading = re.split(r'[\s-]', (value or '').strip(), maxsplit=1)[0]
+    if normalize_postal_code(leading) not in candidates:
+        candidates.append(normalize_postal_code(leading))
+    return [candidate for candidate in candidates if candidate]
+
+
+class PostalCentroid(models.Model):
+    """Centre of a postal code area, loaded from a GeoNames postal code file"""
+    country = models.CharField(max_length=2)
+    postal_code = models.CharField(max_length=20)
+    place_name = models.CharField(max_length=180, blank=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['country', 'postal_code'], name='unique_postal_centroid'),
+        ]
+
+    @classmethod
+    def locate_many(cls, addresses):
+        """
+        Map each (country, postal code) in ``addresses`` to (latitude,
+        longitude), or leave it out when the table has no match. One query.
+        """
+        wanted = {}
+        codes_by_country = {}
+        for address in addresses:
+            country = (address[0] or settings.MANUFACTURER_DEFAULT_COUNTRY).upper()
+            wanted[address] = [(country, code) for code in postal_code_candidates(address[1])]
+            codes_by_country.setdefault(country, set()).update(code for _, code in wanted[address])
+
+        query = models.Q()
+        for country, codes in codes_by_country.items():
+            if codes:
+                query |= models.Q(country=country, postal_code__in=codes)
+        if not query:
+            return {}
+        found = {
+            (country, code): (latitude, longitude)
+            for country, code, latitude, longitude in cls.objects.filter(query).values_list(
+                'country', 'postal_code', 'latitude', 'longitude'
+            )
+        }
+
+        located = {}
+        for address, candidates in wanted.items():
+            match = next((found[key] for key in candidates if key in found), None)
+            if match:
+                located[address] = match
+        return located
+
+    @classmethod
+    def locate(cls, country, postal_code):
+        """(latitude, longitude) of a postal code, or None"""
+        return cls.locate_many([(country, postal_code)]).get((country, postal_code))
+
+    def __str__(self):
+        return f"{self.country} {self.postal_code}"
 
 
 class Manufacturer(models.Model):
     """Manufacturer/prototype partner model"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     description = models.TextField()
     address = models.TextField()
+    postal_code = models.CharField(max_length=20, blank=True)
+    # ISO 3166-1 alpha-2; blank means MANUFACTURER_DEFAULT_COUNTRY
+    country = models.CharField(max_length=2, blank=True)
+    # Centre of the postal code area, set on save from PostalCentroid
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
     phone = models.CharField(max_length=50)
     email = models.EmailField()
     website = models.URLField(blank=True, null=True)
     active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # Keys from before UUIDv7 are random, so order by time, not key
         ordering = ['-created_at']
 
+    def save(self, *args, **kwargs):
+        self.country = self.country.upper()
+        location = PostalCentroid.locate(self.country, self.postal_code) if self.postal_code else None
+        self.latitude, self.longitude = location or (None, None)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
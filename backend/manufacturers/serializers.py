@@ -5,8 +5,11 @@ from .models import Manufacturer
 class ManufacturerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Manufacturer
-        fields = ['id', 'name', 'description', 'address', 'phone', 'email', 'website', 'active', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = [
+            'id', 'name', 'description', 'address', 'postal_code', 'country', 'latitude', 'longitude',
+            'phone', 'email', 'website', 'active', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['id', 'latitude', 'longitude', 'created_at', 'updated_at']
 
 
 class ManufacturerListSerializer(serializers.ModelSerializer):
@@ -14,3 +17,14 @@ class ManufacturerListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Manufacturer
         fields = ['id', 'name', 'description', 'phone', 'email', 'website']
+
+
+class NearbyManufacturerSerializer(ManufacturerListSerializer):
+    """List fields plus the distance from the searched location"""
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(ManufacturerListSerializer.Meta):
+        fields = ManufacturerListSerializer.Meta.fields + ['postal_code', 'country', 'distance_km']
+
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 1)
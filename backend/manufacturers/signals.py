@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from no_dry_starts.http_cache import schedule_purge
+
+from .models import Manufacturer
+from .spatial import invalidate_index
+
+
+@receiver([post_save, post_delete], sender=Manufacturer)
+def purge_manufacturer(sender, instance, **kwargs):
+    schedule_purge('manufacturers', f'manufacturers:{instance.pk}')
+    invalidate_index()
@@ -0,0 +1,134 @@
+"""
+Nearest active manufacturers to a point, from an in-process k-d tree.
+
+Coordinates are mapped onto the unit sphere (x, y, z), where straight-line
+distance orders points exactly as great-circle distance does, so a plain 3-d
+k-d tree answers nearest-neighbour queries without special cases at the poles
+or the antimeridian. A query visits O(log n) nodes: well under a millisecond
+for thousands of partners.
+
+Each process builds the tree on first use and keeps it for
+MANUFACTURER_INDEX_TTL seconds, so lookups run no query for it. Saves and
+deletes in this process, and bulk imports, drop it at once; changes made by
+other workers, or with ``QuerySet.update()`` (which no signal or timestamp
+reveals), show up when the tree is next rebuilt.
+"""
+
+import heapq
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Manufacturer
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_xyz(latitude, longitude):
+    lat, lng = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+
+def chord_to_km(chord):
+    """Great-circle distance for a straight-line distance on the unit sphere"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+class KDTree:
+    """Static 3-d tree over ``points``, returning the matching ``items``"""
+
+    def __init__(self, points, items):
+        self.points = list(points)
+        self.items = list(items)
+        # node: (index into points, split axis, left node, right node)
+        self.root = self._build(list(range(len(self.points))), 0)
+
+    def _build(self, indexes, depth):
+        if not indexes:
+            return None
+        axis = depth % 3
+        indexes.sort(key=lambda i: self.points[i][axis])
+        middle = len(indexes) // 2
+        return (
+            indexes[middle],
+            axis,
+            self._build(indexes[:middle], depth + 1),
+            self._build(indexes[middle + 1:], depth + 1),
+        )
+
+    def __len__(self):
+        return len(self.points)
+
+    def nearest(self, point, k, max_distance=None):
+        """Up to ``k`` (item, straight-line distance) pairs, nearest first"""
+        if k <= 0 or self.root is None:
+            return []
+        limit = max_distance * max_distance if max_distance is not None else math.inf
+        # Max-heap of the best k so far, as (-squared distance, index)
+        best = []
+        # (node, squared distance from point to the node's region, as far as known)
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, region = stack.pop()
+            bound = -best[0][0] if len(best) == k else limit
+            if node is None or region > bound:
+                continue
+            index, axis, left, right = node
+            candidate = self.points[index]
+            squared = sum((a - b) ** 2 for a, b in zip(point, candidate))
+            if squared <= bound:
+                if len(best) < k:
+                    heapq.heappush(best, (-squared, index))
+                else:
+                    heapq.heapreplace(best, (-squared, index))
+
+            offset = point[axis] - candidate[axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            # The far side lies beyond the split plane; pushed first, visited last
+            stack.append((far, max(region, offset * offset)))
+            stack.append((near, region))
+        return [(self.items[index], math.sqrt(-negative)) for negative, index in sorted(best, reverse=True)]
+
+
+_lock = threading.Lock()
+_index = None  # (time.monotonic() when built, KDTree)
+
+
+def located_manufacturers():
+    return Manufacturer.objects.filter(
+        active=True, latitude__isnull=False, longitude__isnull=False
+    ).order_by()
+
+
+def current_index():
+    """The k-d tree of located active manufacturers, at most MANUFACTURER_INDEX_TTL seconds old"""
+    global _index
+    index = _index
+    if index is None or time.monotonic() - index[0] >= settings.MANUFACTURER_INDEX_TTL:
+        with _lock:
+            if _index is None or time.monotonic() - _index[0] >= settings.MANUFACTURER_INDEX_TTL:
+                built_at = time.monotonic()
+                pks, points = [], []
+                for pk, latitude, longitude in located_manufacturers().values_list('pk', 'latitude', 'longitude'):
+                    pks.append(pk)
+                    points.append(to_xyz(latitude, longitude))
+                _index = (built_at, KDTree(points, pks))
+            index = _index
+    return index[1]
+
+
+def invalidate_index():
+    """Rebuild the tree on the next lookup in this process"""
+    global _index
+    _index = None
+
+
+def nearest_manufacturers(latitude, longitude, k, max_km=None):
+    """Up to ``k`` (manufacturer pk, distance in km) pairs, nearest first"""
+    max_chord = None
+    if max_km is not None:
+        max_chord = 2 * math.sin(min(max_km / (2 * EARTH_RADIUS_KM), math.pi / 2))
+    matches = current_index().nearest(to_xyz(latitude, longitude), k, max_chord)
+    return [(pk, chord_to_km(chord)) for pk, chord in matches]
@@ -1,3 +1,111 @@
-from django.test import TestCase
+import math
+import random
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import spatial
+from .models import Manufacturer, PostalCentroid
+from .spatial import KDTree, to_xyz
+
+
+def random_point(rng):
+    # Uniform on the sphere, not bunched at the poles
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+
+class KDTreeTests(TestCase):
+    def scan(self, points, query, k, max_distance=None):
+        distances = sorted((math.dist(query, point), item) for item, point in enumerate(points))
+        if max_distance is not None:
+            distances = [pair for pair in distances if pair[0] <= max_distance]
+        return distances[:k]
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(0)
+        for size in (1, 2, 7, 100, 1000):
+            points = [to_xyz(*random_point(rng)) for _ in range(size)]
+            tree = KDTree(points, range(size))
+            for _ in range(50):
+                query = to_xyz(*random_point(rng))
+                for k, max_distance in ((1, None), (5, None), (size + 3, None), (10, 0.3), (size, 0.0)):
+                    with self.subTest(size=size, k=k, max_distance=max_distance):
+                        found = tree.nearest(query, k, max_distance)
+                        expected = self.scan(points, query, k, max_distance)
+                        self.assertEqual([item for item, _ in found], [item for _, item in expected])
+                        for (_, distance), (scanned, _) in zip(found, expected):
+                            self.assertAlmostEqual(distance, scanned)
+
+    def test_duplicate_points(self):
+        point = to_xyz(51.5, -0.1)
+        tree = KDTree([point] * 5, 'abcde')
+        self.assertEqual(len(tree.nearest(point, 3)), 3)
+        self.assertEqual(len(tree.nearest(point, 10)), 5)
+
+    def test_empty_tree_and_zero_k(self):
+        self.assertEqual(KDTree([], []).nearest(to_xyz(0, 0), 5), [])
+        tree = KDTree([to_xyz(0, 0)], ['only'])
+        self.assertEqual(tree.nearest(to_xyz(0, 0), 0), [])
+        self.assertEqual(tree.nearest(to_xyz(0, 0), 1), [('only', 0.0)])
+
+
+class NearestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        spatial.invalidate_index()
+        self.addCleanup(spatial.invalidate_index)
+        PostalCentroid.objects.bulk_create([
+            PostalCentroid(country='US', postal_code='10001', latitude=40.75, longitude=-73.99),
+            PostalCentroid(country='US', postal_code='19103', latitude=39.95, longitude=-75.17),
+        ])
+        self.near = self.create('Near', '10001')
+        self.far = self.create('Far', '19103')
+
+    def create(self, name, postal_code):
+        return Manufacturer.objects.create(
+            name=name, description='', address='', postal_code=postal_code, country='us',
+            phone='1', email=f'{name.lower()}@example.com',
+        )
+
+    def nearest(self, **params):
+        return APIClient().get('/api/manufacturers/nearest/', {'postal_code': '10001', 'country': 'US', **params})
+
+    def names(self, **params):
+        response = self.nearest(**params)
+        self.assertEqual(response.status_code, 200)
+        return [result['name'] for result in response.data['results']]
+
+    def test_nearest_first(self):
+        self.assertEqual(self.names(), ['Near', 'Far'])
+        self.assertEqual(self.names(limit=1), ['Near'])
+        self.assertEqual(self.names(max_km=10), ['Near'])
+        self.assertEqual(self.names(max_km=0), ['Near'])
+
+    def test_rejects_out_of_range_parameters(self):
+        for params in ({'max_km': '-1'}, {'max_km': 'nan'}, {'max_km': 'x'}, {'limit': '0'}, {'limit': '-2'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.nearest(**params).status_code, 400)
+
+    def test_save_rebuilds_index(self):
+        self.assertEqual(self.names(), ['Near', 'Far'])
+        self.near.postal_code = '19103'
+        self.near.save()
+        self.far.delete()
+        self.assertEqual(self.names(), ['Near'])
+        self.create('New', '10001')
+        self.assertEqual(self.names(), ['New', 'Near'])
+
+    def test_queryset_update_seen_after_ttl(self):
+        with override_settings(MANUFACTURER_INDEX_TTL=30), mock.patch('manufacturers.spatial.time.monotonic') as now:
+            now.return_value = 1000.0
+            self.assertEqual(self.names(), ['Near', 'Far'])
+            # No signal for update(); the view still drops inactive rows
+            Manufacturer.objects.filter(pk=self.near.pk).update(active=False)
+            Manufacturer.objects.filter(pk=self.far.pk).update(postal_code='10001', latitude=40.75, longitude=-73.99)
+            self.assertEqual(self.names(), ['Far'])
+            self.assertEqual(self.names(limit=1), [])
+
+            now.return_value = 1030.0
+            self.assertEqual(self.names(limit=1), ['Far'])
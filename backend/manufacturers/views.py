@@ -1,8 +1,14 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Manufacturer
-from .serializers import ManufacturerSerializer, ManufacturerListSerializer
+from django.conf import settings
+from no_dry_starts.bulk_import import run_import
+from no_dry_starts.http_cache import PublicCacheMixin
+from no_dry_starts.sparse_fields import SparseFieldsMixin
+from .imports import ManufacturerImporter
+from .models import Manufacturer, PostalCentroid
+from .serializers import ManufacturerSerializer, ManufacturerListSerializer, NearbyManufacturerSerializer
+from .spatial import nearest_manufacturers
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -17,18 +23,25 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return False
 
 
-class ManufacturerViewSet(viewsets.ModelViewSet):
+class ManufacturerViewSet(PublicCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for manufacturers/prototype partners.
     Public can list active manufacturers.
     Admin can CRUD all manufacturers.
+    Reads accept ?fields= / ?omit= to return only some fields.
+    Anonymous reads are cached by nginx under the 'manufacturers' surrogate key.
+    /nearest/ finds the partners closest to a postal code or point.
     """
     queryset = Manufacturer.objects.all()
     permission_classes = [IsAdminOrReadOnly]
+    surrogate_key = 'manufacturers'
+    expanded_serializer_class = ManufacturerSerializer
 
     def get_serializer_class(self):
         if self.action == 'list':
             return ManufacturerListSerializer
+        if self.action == 'nearest':
+            return NearbyManufacturerSerializer
         return ManufacturerSerializer
 
     def get_queryset(self):
@@ -37,3 +50,63 @@ class ManufacturerViewSet(viewsets.ModelViewSet):
         if not (self.request.user and self.request.user.is_staff):
             queryset = queryset.filter(active=True)
         return queryset
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_import(self, request):
+        """Create manufacturers in bulk from a CSV or NDJSON body (staff only)"""
+        return run_import(request, ManufacturerImporter())
+
+    @action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """
+        Active manufacturers nearest a postal code (?postal_code=&country=) or
+        a point (?lat=&lng=), nearest first with distance_km. Optional
+        ?limit= (default 5, at least 1) and ?max_km= (not negative).
+        """
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', 5)), settings.MANUFACTURER_NEAREST_MAX_RESULTS)
+            max_km = float(params['max_km']) if params.get('max_km') else None
+            if limit < 1 or not (max_km is None or max_km >= 0):
+                raise ValueError
+            if params.get('postal_code'):
+                location = PostalCentroid.locate(params.get('country', ''), params['postal_code'])
+                if location is None:
+                    return Response(
+                        {'error': 'Unknown postal code'},
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+            elif params.get('lat') and params.get('lng'):
+                location = (float(params['lat']), float(params['lng']))
+                if not (-90 <= location[0] <= 90 and -180 <= location[1] <= 180):
+                    raise ValueError
+            else:
+                return Response(
+                    {'error': 'Provide postal_code or lat and lng'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        except ValueError:
+            return Response(
+                {'error': 'limit, max_km, lat and lng must be numbers in range'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        matches = nearest_manufacturers(*location, k=limit, max_km=max_km)
+        manufacturers = Manufacturer.objects.in_bulk([pk for pk, _ in matches])
+        results = []
+        for pk, distance in matches:
+            # A partner deactivated since the index was read is left out
+            manufacturer = manufacturers.get(pk)
+            if manufacturer is not None and manufacturer.active:
+                manufacturer.distance_km = distance
+                results.append(manufacturer)
+        return Response({
+            'latitude': location[0],
+            'longitude': location[1],
+            'results': self.get_serializer(results, many=True).data,
+        })
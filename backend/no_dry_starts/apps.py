@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class NoDryStartsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'no_dry_starts'
@@ -0,0 +1,182 @@
+"""
+``POST /api/batch/``: resolve several read-only API GETs in one round trip.
+
+Each sub-request is dispatched straight to its view, skipping nginx, the
+middleware stack and a second HTTP exchange; the caller's Authorization
+header is passed on so every view still applies its own permissions. Every
+sub-request asks for JSON and carries no headers of its own, so its response
+depends only on the path and the caller's credentials. Under ASGI the
+sub-requests run concurrently in worker threads; under WSGI they run one
+after another on the request thread, reusing its database connection.
+
+Every item gets an ETag and honours its own ``If-None-Match``. Anonymous
+200 responses are cached for BATCH_ITEM_CACHE_TTL seconds.
+"""
+
+import asyncio
+import hashlib
+import json
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import HttpRequest, JsonResponse, QueryDict, StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+
+# Only endpoints whose GETs have no side effects may be batched
+BATCHABLE_PREFIXES = (
+    '/api/content/',
+    '/api/documents/',
+    '/api/manufacturers/',
+    '/api/leads/',
+    '/api/rfq/',
+    '/api/exports/',
+    '/api/stats/',
+)
+
+# Outer request headers never passed to sub-requests
+DROPPED_META = {
+    'CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_ACCEPT', 'HTTP_ACCEPT_ENCODING', 'HTTP_COOKIE', 'HTTP_IF_NONE_MATCH',
+}
+
+ITEM_HEADERS = ('Cache-Control', 'Content-Type', 'ETag', 'Vary')
+
+
+def item_error(status, message):
+    return {'status': status, 'headers': {}, 'body': {'error': message}}
+
+
+def build_subrequest(request, path):
+    """
+    GET ``path`` with the caller's headers, minus the ones that would change
+    the response's shape or encoding: anonymous items are cached by path.
+    An item's own headers never reach the view; If-None-Match is applied by
+    run_item.
+    """
+    url = urlsplit(path)
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = url.path
+    sub.META = {key: value for key, value in request.META.items() if key not in DROPPED_META}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=url.path, QUERY_STRING=url.query, HTTP_ACCEPT='application/json')
+    sub.GET = QueryDict(url.query)
+    sub.request_id = getattr(request, 'request_id', None)
+    return sub
+
+
+def render_item(response):
+    """Turn a view's response into (status, headers, body), or None if it streams."""
+    if isinstance(response, StreamingHttpResponse):
+        return None
+    if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+        response.render()
+    content = response.content
+    headers = {name: response[name] for name in ITEM_HEADERS if response.has_header(name)}
+    content_type = headers.get('Content-Type', '')
+    if 'json' in content_type:
+        body = json.loads(content) if content else None
+    else:
+        body = content.decode(response.charset or 'utf-8', errors='replace')
+    if response.status_code == 200:
+        headers['ETag'] = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+    return response.status_code, headers, body
+
+
+def run_item(request, item):
+    path = item['path']
+    headers = item.get('headers') or {}
+    sub = build_subrequest(request, path)
+    anonymous = 'HTTP_AUTHORIZATION' not in sub.META
+    auth = 'anon' if anonymous else 'auth'
+    cache_key = f"batch:{auth}:{hashlib.sha256(path.encode()).hexdigest()}"
+
+    cached = cache.get(cache_key) if anonymous else None
+    if cached is None:
+        try:
+            match = resolve(urlsplit(path).path)
+        except Resolver404:
+            return item_error(404, 'Not found')
+        sub.resolver_match = match
+        rendered = render_item(match.func(sub, *match.args, **match.kwargs))
+        if rendered is None:
+            return item_error(400, 'Streaming responses cannot be batched')
+        if anonymous and rendered[0] == 200 and settings.BATCH_ITEM_CACHE_TTL:
+            cache.set(cache_key, rendered, settings.BATCH_ITEM_CACHE_TTL)
+    else:
+        rendered = cached
+
+    status, response_headers, body = rendered
+    etag = response_headers.get('ETag')
+    if etag and etag in parse_etags(headers.get('If-None-Match', '')):
+        return {'status': 304, 'headers': {'ETag': etag}, 'body': None}
+    return {'status': status, 'headers': response_headers, 'body': body}
+
+
+def run_item_in_thread(request, item):
+    try:
+        return run_item(request, item)
+    finally:
+        # Worker threads don't get request_finished; don't leave connections open
+        connections.close_all()
+
+
+def parse_items(request):
+    """Validate the batch body; returns (items, error message)."""
+    try:
+        payload = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return None, 'Body must be JSON'
+    items = payload.get('requests') if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, 'requests must be a non-empty list'
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        return None, f'At most {settings.BATCH_MAX_REQUESTS} requests per batch'
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            return None, 'Each request needs a path'
+        if not isinstance(item.get('headers', {}), dict):
+            return None, 'headers must be an object'
+    return items, None
+
+
+# Sub-requests are authenticated by their Authorization header, never cookies
+@csrf_exempt
+async def batch(request):
+    """
+    Body: {"requests": [{"id": "docs", "path": "/api/documents/?category=investor",
+    "headers": {"If-None-Match": "..."}}, ...]}. Returns {"responses": [...]} in
+    the same order, each with id, status, headers and body.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    items, error = parse_items(request)
+    if error:
+        return JsonResponse({'error': error}, status=400)
+
+    concurrent = isinstance(request, ASGIRequest)
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async def dispatch(item):
+        if not item['path'].startswith(BATCHABLE_PREFIXES):
+            return item_error(400, 'Path cannot be batched')
+        if not concurrent:
+            return await sync_to_async(run_item)(request, item)
+        async with semaphore:
+            return await sync_to_async(run_item_in_thread, thread_sensitive=False)(request, item)
+
+    if concurrent:
+        results = await asyncio.gather(*(dispatch(item) for item in items))
+    else:
+        results = [await dispatch(item) for item in items]
+
+    return JsonResponse({
+        'responses': [
+            {'id': item.get('id', index), **result}
+            for index, (item, result) in enumerate(zip(items, results))
+        ]
+    })
@@ -0,0 +1,264 @@
+"""
+Staff bulk imports from CSV or NDJSON.
+
+Rows are read one line at a time from the request body (or an uploaded
+``file``), cleaned with the model fields' own validation and inserted in
+chunks of BULK_IMPORT_BATCH_SIZE: with ``COPY`` on PostgreSQL and one
+``executemany`` elsewhere. Invalid rows are reported by position and skipped;
+the valid ones are still inserted. ``save()`` and its signals are bypassed,
+so an importer's ``finish`` does what they would have done.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import status
+from rest_framework.response import Response
+
+MEDIA_TYPES = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+# COPY ... FROM STDIN text format: tab-separated, \N for NULL
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+class UnsupportedInput(Exception):
+    pass
+
+
+def csv_rows(lines):
+    yield from csv.DictReader(lines)
+
+
+def ndjson_rows(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield ValidationError("Invalid JSON")
+            continue
+        yield row if isinstance(row, dict) else ValidationError("Expected a JSON object")
+
+
+def read_rows(request):
+    """
+    Yield the rows of a CSV or NDJSON request body, or of the multipart
+    ``file`` upload, as dicts. Unparseable NDJSON lines are yielded as
+    ValidationErrors so they can be reported in place.
+    """
+    media_type = (request.content_type or '').split(';')[0].strip().lower()
+    if media_type == 'multipart/form-data':
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise UnsupportedInput("Upload the rows as 'file'")
+        input_format = (
+            MEDIA_TYPES.get(upload.content_type)
+            or EXTENSIONS.get(os.path.splitext(upload.name)[1].lower())
+        )
+        lines = upload
+    else:
+        input_format = MEDIA_TYPES.get(media_type)
+        lines = request.stream or ()
+    if input_format is None:
+        raise UnsupportedInput("Send text/csv or application/x-ndjson")
+
+    text = codecs.iterdecode(lines, 'utf-8-sig')
+    return csv_rows(text) if input_format == 'csv' else ndjson_rows(text)
+
+
+def copy_text(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(COPY_ESCAPES)
+
+
+def is_text(field):
+    return field.get_internal_type() in ('CharField', 'TextField')
+
+
+def insert_rows(model, rows):
+    """
+    Insert ``rows`` (dicts of every concrete field's attname -> value) in one
+    statement, without save() or signals. Empty auto_now(_add) fields get the
+    current time.
+    """
+    db = connections[DEFAULT_DB_ALIAS]
+    fields = model._meta.concrete_fields
+    now = timezone.now()
+    for field in fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            for row in rows:
+                if row[field.attname] is None:
+                    row[field.attname] = now
+
+    # Strings need no conversion for text columns
+    prepare = [None if is_text(field) else field.get_db_prep_save for field in fields]
+    attnames = [field.attname for field in fields]
+    values = [
+        [
+            row[attname] if prep is None or row[attname] is None else prep(row[attname], db)
+            for attname, prep in zip(attnames, prepare)
+        ]
+        for row in rows
+    ]
+    table = db.ops.quote_name(model._meta.db_table)
+    columns = ', '.join(db.ops.quote_name(field.column) for field in fields)
+    with db.cursor() as cursor:
+        if db.vendor == 'postgresql':
+            buffer = io.StringIO()
+            for row in values:
+                buffer.write('\t'.join(map(copy_text, row)))
+                buffer.write('\n')
+            buffer.seek(0)
+            cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', buffer)
+        else:
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', values)
+
+
+class Importer:
+    """How input rows become ``model`` rows; one instance per import"""
+    model = None
+    # Input columns, by model field name; other columns are ignored
+    fields = ()
+
+    @cached_property
+    def columns(self):
+        """(input name, field, allowed choices or None) per input column"""
+        columns = []
+        for name in self.fields:
+            field = self.model._meta.get_field(name)
+            choices = {str(value) for value, _ in field.flatchoices} if field.choices else None
+            columns.append((name, field, choices))
+        return columns
+
+    @cached_property
+    def defaults(self):
+        """Concrete fields not taken from the input, filled per row"""
+        return [
+            field for field in self.model._meta.concrete_fields
+            if field.name not in self.fields
+        ]
+
+    def clean_value(self, field, choices, raw):
+        if raw is None or raw == '':
+            if field.has_default():
+                return field.get_default()
+            if not field.blank:
+                raise ValidationError(field.error_messages['blank'])
+            if field.null or not field.empty_strings_allowed:
+                return None
+            return ''
+        if isinstance(field, models.BooleanField) and isinstance(raw, str):
+            raw = {'true': True, 'false': False}.get(raw.strip().lower(), raw)
+        value = field.to_python(raw)
+        if choices is not None and str(value) not in choices:
+            raise ValidationError(
+                field.error_messages['invalid_choice'] % {'value': value}
+            )
+        for validator in field.validators:
+            validator(value)
+        if isinstance(value, datetime) and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    def clean_row(self, row):
+        """Return attname -> value for ``row``; raises ValidationError"""
+        values, errors = {}, {}
+        for name, field, choices in self.columns:
+            try:
+                values[field.attname] = self.clean_value(field, choices, row.get(name))
+            except ValidationError as e:
+                errors[name] = e.messages
+        if errors:
+            raise ValidationError(errors)
+        self.clean(values)
+        return values
+
+    def clean(self, values):
+        """Checks across fields; raise ValidationError to reject the row"""
+
+    def build(self, values):
+        """Complete cleaned ``values`` with defaults for the other fields"""
+        for field in self.defaults:
+            values[field.attname] = field.get_default()
+        return values
+
+    def prepare(self, rows):
+        """Called with each chunk before it is inserted"""
+
+    def save(self, rows):
+        self.prepare(rows)
+        with transaction.atomic():
+            insert_rows(self.model, rows)
+        return len(rows)
+
+    def finish(self):
+        """Called once after an import that created rows"""
+
+
+def error_details(error):
+    if hasattr(error, 'error_dict'):
+        return error.message_dict
+    return {'non_field_errors': error.messages}
+
+
+def run_import(request, importer):
+    """
+    Import the rows of ``request`` with ``importer`` and respond with
+    ``{"created", "failed", "errors"}``. Up to BULK_IMPORT_MAX_ERRORS
+    failed rows are listed with their 1-based position in the input.
+    """
+    try:
+        rows = read_rows(request)
+    except UnsupportedInput as e:
+        return Response({"error": str(e)}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    report = {'created': 0, 'failed': 0, 'errors': []}
+    response_status = status.HTTP_200_OK
+    batch = []
+    number = 0
+    try:
+        for number, row in enumerate(rows, start=1):
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                batch.append(importer.build(importer.clean_row(row)))
+            except ValidationError as e:
+                report['failed'] += 1
+                if len(report['errors']) < settings.BULK_IMPORT_MAX_ERRORS:
+                    report['errors'].append({'row': number, 'errors': error_details(e)})
+            if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+                report['created'] += importer.save(batch)
+                batch = []
+        if batch:
+            report['created'] += importer.save(batch)
+    except (UnicodeDecodeError, csv.Error) as e:
+        # The rest of the input cannot be read; rows before it are kept
+        if batch:
+            report['created'] += importer.save(batch)
+        report['error'] = f"Unreadable input after row {number}: {e}"
+        response_status = status.HTTP_400_BAD_REQUEST
+
+    if report['created']:
+        importer.finish()
+    return Response(report, status=response_status)
@@ -0,0 +1,154 @@
+"""
+Shared caching of public API reads in nginx.
+
+Anonymous GETs of content blocks, documents and manufacturers are marked
+cacheable (``Cache-Control`` for browsers, ``X-Accel-Expires`` for nginx) and
+tagged with a ``Surrogate-Key`` header. Requests carrying an Authorization
+header get ``private, no-store``, and nginx neither caches nor serves them
+from cache.
+
+Open-source nginx can't purge by key, so when NGINX_CACHE_URL is set each
+tagged path Django serves is recorded in ``CachedPath``. When a tagged model
+is saved or deleted, the paths recorded under its keys are requested again
+through nginx's internal port with ``X-Cache-Refresh: 1``, which skips the
+cached copy and stores the fresh response in its place. At most
+PUBLIC_CACHE_MAX_PATHS paths are recorded per key (any query string makes a
+new path); a path that can't be recorded is served with ``X-Accel-Expires:
+0`` so nginx never holds a copy it couldn't refresh.
+"""
+
+import logging
+import queue
+import threading
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+
+from .models import CachedPath
+
+logger = logging.getLogger(__name__)
+
+MAX_PATH_LENGTH = 500
+
+
+def mark_public(request, response, keys):
+    """Make ``response`` cacheable by browsers and nginx, tagged with ``keys``."""
+    patch_cache_control(response, public=True, max_age=settings.PUBLIC_CACHE_BROWSER_MAX_AGE)
+    # nginx-only lifetime; nginx strips this header before it reaches clients
+    max_age = settings.PUBLIC_CACHE_MAX_AGE
+    if settings.NGINX_CACHE_URL and not record_path(keys, request.get_full_path()):
+        max_age = 0
+    response['X-Accel-Expires'] = str(max_age)
+    response['Surrogate-Key'] = ' '.join(keys)
+
+
+def record_path(keys, path):
+    """Remember ``path`` under ``keys``; False if it can't be (too long, or too many paths)."""
+    if len(path) > MAX_PATH_LENGTH:
+        return False
+    now = timezone.now()
+    if CachedPath.objects.filter(key__in=keys, path=path).update(last_seen=now) == len(keys):
+        return True
+    # A new path: make room by forgetting paths nginx has expired by now
+    expired = now - timedelta(seconds=settings.PUBLIC_CACHE_MAX_AGE)
+    CachedPath.objects.filter(key__in=keys, last_seen__lt=expired).delete()
+    if CachedPath.objects.filter(key=keys[0]).count() >= settings.PUBLIC_CACHE_MAX_PATHS:
+        return False
+    CachedPath.objects.bulk_create(
+        [CachedPath(key=key, path=path, last_seen=now) for key in keys],
+        update_conflicts=True,
+        unique_fields=['key', 'path'],
+        update_fields=['last_seen'],
+    )
+    return True
+
+
+class PublicCacheMixin:
+    """Viewset mixin adding Cache-Control and Surrogate-Key headers to reads."""
+
+    # Resource key, e.g. 'content'; detail responses are also tagged '<key>:<lookup>'
+    surrogate_key = None
+
+    def get_surrogate_keys(self):
+        keys = [self.surrogate_key]
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup:
+            keys.append(f'{self.surrogate_key}:{lookup}')
+        return keys
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD'):
+            return response
+        if 'HTTP_AUTHORIZATION' in request.META or request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_store=True)
+        elif response.status_code == 200:
+            mark_public(request, response, self.get_surrogate_keys())
+        return response
+
+
+class CacheRefresher:
+    """Background thread that re-requests paths through nginx, deduplicating bursts."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, paths):
+        if not paths:
+            return
+        self.queue.put(set(paths))
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='cache-refresh', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            with self.lock:
+                if self.queue.empty():
+                    self.thread = None
+                    return
+            paths = set()
+            while not self.queue.empty():
+                paths |= self.queue.get_nowait()
+            for path in sorted(paths):
+                self.refresh(path)
+
+    def refresh(self, path):
+        request = urllib.request.Request(
+            settings.NGINX_CACHE_URL.rstrip('/') + path,
+            headers={'Host': settings.NGINX_CACHE_HOST, 'X-Cache-Refresh': '1'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=settings.NGINX_CACHE_REFRESH_TIMEOUT) as response:
+                response.read()
+        except Exception as e:
+            logger.warning('Cache refresh failed: %s', e, extra={'path': path})
+
+
+refresher = CacheRefresher()
+
+
+def purge_surrogate_keys(*keys):
+    """Refresh every path nginx may hold under ``keys``; returns how many."""
+    if not settings.NGINX_CACHE_URL:
+        return 0
+    # Anything last served longer ago than the nginx lifetime has expired there
+    expired = timezone.now() - timedelta(seconds=settings.PUBLIC_CACHE_MAX_AGE)
+    CachedPath.objects.filter(key__in=keys, last_seen__lt=expired).delete()
+    paths = set(CachedPath.objects.filter(key__in=keys).values_list('path', flat=True))
+    refresher.submit(paths)
+    logger.info('Purging cached paths', extra={'keys': list(keys), 'paths': len(paths)})
+    return len(paths)
+
+
+def schedule_purge(*keys):
+    """Purge ``keys`` once the current transaction commits."""
+    if settings.NGINX_CACHE_URL:
+        transaction.on_commit(lambda: purge_surrogate_keys(*keys))
@@ -0,0 +1,120 @@
+"""
+Structured, non-blocking logging.
+
+Request threads only put records on an in-memory queue (``QueueListenerHandler``);
+a background ``QueueListener`` thread formats them as JSON and writes them out.
+``RequestContextFilter`` stamps each record with the id and view of the
+request that produced it, and ``SamplingFilter`` thins out high-volume INFO
+records. Wired up in ``settings.LOGGING``.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Set by RequestLogMiddleware for the duration of a request
+request_context = contextvars.ContextVar('request_context', default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+RESERVED_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class RequestContextFilter(logging.Filter):
+    """Add request_id and view from the current request, if any."""
+
+    def filter(self, record):
+        context = request_context.get()
+        # django.request logs after middleware has finished, but passes the request along
+        request_id = getattr(getattr(record, 'request', None), 'request_id', None)
+        if request_id and not hasattr(record, 'request_id'):
+            record.request_id = request_id
+        if context:
+            for key, value in context.items():
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only ``rate`` of records at INFO or below. Warnings and errors always
+    pass, and so do request lines for a 4xx/5xx status or taking ``slow_ms``
+    or longer, whatever level they were logged at.
+    """
+
+    def __init__(self, rate=1.0, slow_ms=None):
+        super().__init__()
+        self.rate = float(rate)
+        self.slow_ms = slow_ms
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or self.rate >= 1:
+            return True
+        if getattr(record, 'status', 0) >= 400:
+            return True
+        if self.slow_ms is not None and getattr(record, 'duration_ms', 0) >= self.slow_ms:
+            return True
+        return random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(
+                timespec='milliseconds'
+            ),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Queue records for a background listener that feeds ``handlers``.
+
+    Enqueueing never blocks: when the queue is full the record is dropped and
+    counted in ``dropped`` rather than stalling the request.
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        # dictConfig hands over a ConvertingList; index it so cfg:// references resolve
+        targets = [handlers[index] for index in range(len(handlers))]
+        for target in targets:
+            if not isinstance(target, logging.Handler):
+                raise ValueError(f'Not a configured logging handler: {target!r}')
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, *targets, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        # Merge args into the message but leave formatting (and exc_info) to
+        # the listener thread; the queue is in-process so nothing is pickled.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
@@ -0,0 +1,135 @@
+import logging
+import re
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import clickjacking, csrf
+
+from .log import request_context
+
+logger = logging.getLogger('no_dry_starts.requests')
+
+# Accept a caller-supplied request id (e.g. from nginx) if it looks sane
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+class RequestLogMiddleware:
+    """
+    Give every request an id (X-Request-ID), make it and the resolved view
+    available to log records, and log one line per request with its timing.
+    For streaming responses the duration is the time to the first byte.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        context, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_context.reset(token)
+        return self.finish(request, response, context, started)
+
+    async def __acall__(self, request):
+        context, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_context.reset(token)
+        return self.finish(request, response, context, started)
+
+    def start(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        context = {'request_id': request_id}
+        return context, request_context.set(context), time.perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        context = request_context.get()
+        if context is not None:
+            context['view'] = f"{view_func.__module__}.{getattr(view_func, '__name__', type(view_func).__name__)}"
+
+    def finish(self, request, response, context, started):
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        response['X-Request-ID'] = context['request_id']
+
+        if response.status_code >= 500:
+            level = logging.ERROR
+        elif response.status_code >= 400 or duration_ms >= settings.LOG_SLOW_REQUEST_MS:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        logger.log(
+            level,
+            '%s %s %s',
+            request.method,
+            request.path,
+            response.status_code,
+            extra={
+                **context,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': duration_ms,
+            },
+        )
+        return response
+
+
+def is_stateless(request):
+    """True for requests under STATELESS_PATH_PREFIXES (the JWT/anonymous API)."""
+    return request.path_info.startswith(settings.STATELESS_PATH_PREFIXES)
+
+
+class SkipOnStatelessPaths:
+    """
+    Run the wrapped middleware only outside STATELESS_PATH_PREFIXES; on those
+    paths the request goes straight to the next layer. Mixed into the session,
+    CSRF, auth, messages and clickjacking middleware, which only Django admin
+    needs. Subclassing (rather than one wrapper around all five) keeps admin's
+    system checks for the stock middleware satisfied.
+    """
+
+    def __call__(self, request):
+        if is_stateless(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipOnStatelessPaths, sessions_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipOnStatelessPaths, csrf.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # Called by the handler directly, so it needs its own path check
+        if is_stateless(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(SkipOnStatelessPaths, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipOnStatelessPaths, messages_middleware.MessageMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(SkipOnStatelessPaths, clickjacking.XFrameOptionsMiddleware):
+    pass
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Takes over the table cms.0005 renamed"""
+
+    initial = True
+
+    dependencies = [
+        ('cms', '0005_move_cachedpath'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='CachedPath',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('key', models.CharField(max_length=100)),
+                        ('path', models.CharField(max_length=500)),
+                        ('last_seen', models.DateTimeField()),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['key', 'last_seen'], name='no_dry_star_key_67c3d9_idx')],
+                        'constraints': [models.UniqueConstraint(fields=('key', 'path'), name='unique_cached_path')],
+                    },
+                ),
+            ],
+        ),
+    ]
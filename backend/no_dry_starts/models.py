@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class CachedPath(models.Model):
+    """
+    A public API path recently served with a given Surrogate-Key, and so
+    possibly held in the nginx cache. Used to refresh those paths on change.
+    """
+    key = models.CharField(max_length=100)
+    path = models.CharField(max_length=500)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'path'], name='unique_cached_path'),
+        ]
+        indexes = [
+            models.Index(fields=['key', 'last_seen']),
+        ]
+
+    def __str__(self):
+        return f"{self.key}: {self.path}"
@@ -0,0 +1,125 @@
+"""
+Per-route budgets checked by ``no_dry_starts.tests``: the most queries a
+request may run and its slowest acceptable response time, against the seeded
+test data (a handful of rows per table, so a per-row query overruns).
+
+Keys are ``"<METHOD> <url name> (<client>)"``. When a change legitimately
+needs more, raise the number here in the same commit and say why.
+
+Query counts are always enforced. Response times depend on the machine, so a
+slow case only logs a warning unless ENFORCE_TIME_BUDGETS=1 is set in the
+environment; then it fails once it takes TIME_BUDGET_MARGIN times its budget.
+"""
+
+import os
+
+ENFORCE_TIME_BUDGETS = os.environ.get('ENFORCE_TIME_BUDGETS', '') == '1'
+TIME_BUDGET_MARGIN = float(os.environ.get('TIME_BUDGET_MARGIN', '3'))
+
+# key -> (max queries, max milliseconds)
+QUERY_BUDGETS = {
+    # API
+    'GET api-root (anonymous)': (0, 100),
+    'POST token_obtain_pair (anonymous)': (1, 1500),  # password hashing
+    'POST token_refresh (anonymous)': (1, 200),
+    'GET schema (anonymous)': (0, 1000),  # schema generated per request
+    'GET swagger-ui (anonymous)': (0, 100),
+    'POST batch (anonymous)': (6, 200),
+    'GET manufacturer-list (anonymous)': (2, 100),
+    'GET manufacturer-list (staff)': (3, 100),
+    'POST manufacturer-list (staff)': (2, 200),
+    'GET manufacturer-detail (anonymous)': (1, 100),
+    'GET manufacturer-nearest (anonymous)': (3, 100),
+    'PATCH manufacturer-detail (staff)': (4, 200),
+    'POST manufacturer-bulk-import (staff)': (4, 200),
+    'GET document-list (anonymous)': (2, 100),
+    'GET document-list (staff)': (3, 100),
+    'POST document-list (staff)': (6, 200),  # savepoint so a failed save drops the blob reference
+    'GET document-detail (anonymous)': (1, 100),
+    'PATCH document-detail (staff)': (3, 200),
+    'POST document-bulk-import (staff)': (4, 200),
+    'POST investor-request-download (anonymous)': (10, 200),
+    'GET form-token (anonymous)': (0, 100),
+    'GET investor-download (anonymous)': (4, 100),
+    'GET stats (staff)': (3, 100),
+    'POST events-ticket (staff)': (1, 100),
+    'GET lead-list (staff)': (3, 100),
+    'POST lead-list (anonymous)': (7, 200),
+    'GET lead-detail (staff)': (2, 100),
+    'GET lead-export-csv (staff)': (2, 100),
+    'POST lead-bulk-import (staff)': (6, 200),
+    'GET rfq-list (staff)': (3, 100),
+    'POST rfq-list (anonymous)': (7, 200),
+    'GET rfq-detail (staff)': (2, 100),
+    'GET rfq-export-csv (staff)': (2, 100),
+    'GET export-list (staff)': (3, 100),
+    'POST export-list (staff)': (6, 200),
+    'GET export-detail (staff)': (2, 100),
+    'GET export-download (anonymous)': (1, 100),
+    'GET content-list (anonymous)': (2, 100),
+    'GET content-list (staff)': (3, 100),
+    'POST content-list (staff)': (3, 200),
+    'GET content-detail (anonymous)': (1, 100),
+    'PATCH content-detail (staff)': (3, 200),
+    'GET content-html (anonymous)': (1, 100),
+    'POST content-reorder (staff)': (3, 200),
+
+    # Admin
+    'GET admin:index (admin)': (3, 300),
+    'GET admin:login (anonymous)': (0, 300),
+    'POST admin:logout (admin)': (4, 300),
+    'GET admin:password_change (admin)': (2, 300),
+    'GET admin:password_change_done (admin)': (2, 300),
+    'GET admin:jsi18n (admin)': (2, 300),
+    'GET admin:auth_user_password_change (admin)': (3, 300),
+    'GET admin:app_list[auth] (admin)': (2, 300),
+    'GET admin:app_list[cms] (admin)': (2, 300),
+    'GET admin:app_list[docs] (admin)': (2, 300),
+    'GET admin:app_list[inquiries] (admin)': (2, 300),
+    'GET admin:app_list[manufacturers] (admin)': (2, 300),
+    'GET admin:auth_group_changelist (admin)': (5, 300),
+    'GET admin:auth_group_add (admin)': (3, 300),
+    'GET admin:auth_group_change (admin)': (5, 300),
+    'GET admin:auth_group_history (admin)': (4, 300),
+    'GET admin:auth_group_delete (admin)': (5, 300),
+    'GET admin:auth_user_changelist (admin)': (6, 300),
+    'GET admin:auth_user_add (admin)': (2, 300),
+    'GET admin:auth_user_change (admin)': (7, 300),
+    'GET admin:auth_user_history (admin)': (4, 300),
+    'GET admin:auth_user_delete (admin)': (6, 300),
+    'GET admin:cms_contentblock_changelist (admin)': (5, 300),
+    'GET admin:cms_contentblock_add (admin)': (2, 300),
+    'GET admin:cms_contentblock_change (admin)': (3, 300),
+    'GET admin:cms_contentblock_history (admin)': (4, 300),
+    'GET admin:cms_contentblock_delete (admin)': (3, 300),
+    'GET admin:docs_document_changelist (admin)': (4, 300),
+    'GET admin:docs_document_add (admin)': (2, 300),
+    'GET admin:docs_document_change (admin)': (3, 300),
+    'GET admin:docs_document_history (admin)': (4, 300),
+    'GET admin:docs_document_delete (admin)': (3, 300),
+    'GET admin:inquiries_contact_changelist (admin)': (5, 300),
+    'GET admin:inquiries_contact_add (admin)': (2, 300),
+    'GET admin:inquiries_contact_change (admin)': (3, 300),
+    'GET admin:inquiries_contact_history (admin)': (4, 300),
+    'GET admin:inquiries_contact_delete (admin)': (3, 300),
+    'GET admin:inquiries_lead_changelist (admin)': (4, 300),
+    'GET admin:inquiries_lead_add (admin)': (2, 300),
+    'GET admin:inquiries_lead_change (admin)': (4, 300),
+    'GET admin:inquiries_lead_history (admin)': (4, 300),
+    'GET admin:inquiries_lead_delete (admin)': (3, 300),
+    'GET admin:inquiries_rfqsubmission_changelist (admin)': (4, 300),
+    'GET admin:inquiries_rfqsubmission_add (admin)': (2, 300),
+    'GET admin:inquiries_rfqsubmission_change (admin)': (4, 300),
+    'GET admin:inquiries_rfqsubmission_history (admin)': (4, 300),
+    'GET admin:inquiries_rfqsubmission_delete (admin)': (3, 300),
+    'GET admin:manufacturers_manufacturer_changelist (admin)': (6, 300),
+    'GET admin:manufacturers_manufacturer_add (admin)': (2, 300),
+    'GET admin:manufacturers_manufacturer_change (admin)': (3, 300),
+    'GET admin:manufacturers_manufacturer_history (admin)': (4, 300),
+    'GET admin:manufacturers_manufacturer_delete (admin)': (3, 300),
+    'GET admin:manufacturers_postalcentroid_changelist (admin)': (6, 300),
+    'GET admin:manufacturers_postalcentroid_add (admin)': (2, 300),
+    'GET admin:manufacturers_postalcentroid_change (admin)': (3, 300),
+    'GET admin:manufacturers_postalcentroid_history (admin)': (4, 300),
+    'GET admin:manufacturers_postalcentroid_delete (admin)': (3, 300),
+}
@@ -14,6 +14,7 @@ from pathlib import Path
 from datetime import timedelta
 import os
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,17 +55,25 @@ INSTALLED_APPS = [
     "docs",
     "inquiries",
     "cms",
+    "no_dry_starts",
 ]
 
+# Session, CSRF, auth, messages and clickjacking middleware only run outside
+# these prefixes; API calls authenticate with JWT and never use sessions
+STATELESS_PATH_PREFIXES = ("/api/",)
+
 MIDDLEWARE = [
+    "no_dry_starts.middleware.RequestLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "no_dry_starts.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "inquiries.abuse.AbuseFilterMiddleware",
+    "docs.upload_handlers.UploadLimitMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "no_dry_starts.middleware.CsrfViewMiddleware",
+    "no_dry_starts.middleware.AuthenticationMiddleware",
+    "no_dry_starts.middleware.MessageMiddleware",
+    "no_dry_starts.middleware.XFrameOptionsMiddleware",
 ]
 
 ROOT_URLCONF = "no_dry_starts.urls"
@@ -166,6 +175,10 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# Admin lists of leads, RFQs and documents report the planner's row estimate
+# instead of an exact COUNT(*) above this many rows (PostgreSQL only)
+ESTIMATED_COUNT_THRESHOLD = int(os.environ.get("ESTIMATED_COUNT_THRESHOLD", "10000"))
+
 # Simple JWT Configuration
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
@@ -191,10 +204,115 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "x-form-token")
+
 # Media files
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Upload handlers record size, SHA-256, MIME type and page count while
+# the upload streams in, so file metadata never needs a second read.
+# UploadLimitHandler comes first and aborts an upload to UPLOAD_LIMITS
+# before the others store any of it
+FILE_UPLOAD_HANDLERS = [
+    "docs.upload_handlers.UploadLimitHandler",
+    "docs.upload_handlers.MetadataMemoryFileUploadHandler",
+    "docs.upload_handlers.MetadataTemporaryFileUploadHandler",
+]
+
+# Size (bytes) and type limits for uploaded files, checked against the
+# declared Content-Length, the bytes received so far and the file's magic
+# bytes: (path pattern, max file size, allowed MIME types). Other paths and
+# the Django admin are not limited here
+RFQ_ATTACHMENT_MAX_SIZE = int(os.environ.get("RFQ_ATTACHMENT_MAX_SIZE", str(10 * 1024 * 1024)))
+DOCUMENT_MAX_SIZE = int(os.environ.get("DOCUMENT_MAX_SIZE", str(100 * 1024 * 1024)))
+RFQ_ATTACHMENT_TYPES = (
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "image/vnd.dwg",
+    "image/vnd.dxf",
+    "model/step",
+    "image/png",
+    "image/jpeg",
+)
+DOCUMENT_TYPES = (
+    *RFQ_ATTACHMENT_TYPES,
+    "application/vnd.ms-excel",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-powerpoint",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/zip",
+    "image/gif",
+    "image/webp",
+    "image/tiff",
+    "text/plain",
+    "text/csv",
+)
+UPLOAD_LIMITS = (
+    (r"^/api/rfq/$", RFQ_ATTACHMENT_MAX_SIZE, RFQ_ATTACHMENT_TYPES),
+    (r"^/api/documents/(?:[0-9a-f-]+/)?$", DOCUMENT_MAX_SIZE, DOCUMENT_TYPES),
+)
+
+# Background export jobs (/api/exports/)
+# Run jobs in a thread of the web process; set to False when a separate
+# `manage.py process_export_jobs` worker picks them up instead
+EXPORT_JOBS_IN_PROCESS = os.environ.get("EXPORT_JOBS_IN_PROCESS", "True") == "True"
+# Finished artifacts are reused for identical requests for this many seconds
+EXPORT_ARTIFACT_MAX_AGE = int(os.environ.get("EXPORT_ARTIFACT_MAX_AGE", "86400"))
+# Jobs pending or running for longer than this (seconds) are marked failed,
+# so a job whose thread or worker died does not block identical requests
+EXPORT_JOB_TIMEOUT = int(os.environ.get("EXPORT_JOB_TIMEOUT", "1800"))
+# Lifetime of signed download URLs, in seconds
+EXPORT_URL_MAX_AGE = int(os.environ.get("EXPORT_URL_MAX_AGE", "3600"))
+
+# Ranged requests continuing an investor download that stopped short don't
+# use up the link, up to this many per download counted
+INVESTOR_DOWNLOAD_MAX_RESUMES = int(os.environ.get("INVESTOR_DOWNLOAD_MAX_RESUMES", "10"))
+
+# Staff bulk imports (POST /api/manufacturers|documents|leads/import/):
+# rows validated and inserted per chunk, and row errors listed per response
+BULK_IMPORT_BATCH_SIZE = int(os.environ.get("BULK_IMPORT_BATCH_SIZE", "2000"))
+BULK_IMPORT_MAX_ERRORS = int(os.environ.get("BULK_IMPORT_MAX_ERRORS", "100"))
+
+# Nearest-partner lookup (GET /api/manufacturers/nearest/): country assumed
+# for postal codes given without one, and the most partners returned per query
+MANUFACTURER_DEFAULT_COUNTRY = os.environ.get("MANUFACTURER_DEFAULT_COUNTRY", "US")
+MANUFACTURER_NEAREST_MAX_RESULTS = int(os.environ.get("MANUFACTURER_NEAREST_MAX_RESULTS", "50"))
+# Seconds each process keeps its nearest-partner index; saves in the process
+# rebuild it sooner, changes from other workers show up after at most this
+MANUFACTURER_INDEX_TTL = int(os.environ.get("MANUFACTURER_INDEX_TTL", "30"))
+
+# Early rejection of junk POSTs to the public forms (inquiries.abuse), before
+# DRF parses them. The form token (X-Form-Token, from GET /api/forms/token/)
+# must be between MIN_AGE and MAX_AGE seconds old, and is good for one submission
+ABUSE_FILTER_PATHS = ("/api/leads/", "/api/rfq/", "/api/investor/request-download/")
+ABUSE_FORM_TOKEN_MIN_AGE = int(os.environ.get("ABUSE_FORM_TOKEN_MIN_AGE", "3"))
+ABUSE_FORM_TOKEN_MAX_AGE = int(os.environ.get("ABUSE_FORM_TOKEN_MAX_AGE", "7200"))
+# Hidden form field humans leave empty
+ABUSE_HONEYPOT_FIELD = os.environ.get("ABUSE_HONEYPOT_FIELD", "website")
+# Per-process limits across the three forms ("count/period", blank = none)
+ABUSE_IP_RATE = os.environ.get("ABUSE_IP_RATE", "30/h")
+ABUSE_EMAIL_RATE = os.environ.get("ABUSE_EMAIL_RATE", "5/h")
+# Request header with the client address set by nginx; blank uses REMOTE_ADDR
+ABUSE_CLIENT_IP_HEADER = os.environ.get("ABUSE_CLIENT_IP_HEADER", "HTTP_X_REAL_IP")
+# Denylist files (one entry per line), reloaded when they change
+ABUSE_IP_DENYLIST_FILE = os.environ.get("ABUSE_IP_DENYLIST_FILE", "")
+ABUSE_DISPOSABLE_DOMAINS_FILE = os.environ.get(
+    "ABUSE_DISPOSABLE_DOMAINS_FILE", str(BASE_DIR / "inquiries" / "data" / "disposable_domains.txt")
+)
+ABUSE_DENYLIST_REFRESH_INTERVAL = int(os.environ.get("ABUSE_DENYLIST_REFRESH_INTERVAL", "60"))
+# Blocked counts are added to the "blocked" daily stat this often (seconds)
+ABUSE_COUNTER_FLUSH_INTERVAL = int(os.environ.get("ABUSE_COUNTER_FLUSH_INTERVAL", "60"))
+
+# Monthly partitioning of leads and RFQ submissions (PostgreSQL only).
+# Convert once with `manage.py manage_partitions --convert`; migrate and
+# manage_partitions then keep partitions this many months ahead
+INQUIRY_PARTITIONING = os.environ.get("INQUIRY_PARTITIONING", "False") == "True"
+INQUIRY_PARTITION_MONTHS_AHEAD = int(os.environ.get("INQUIRY_PARTITION_MONTHS_AHEAD", "3"))
+# `manage.py archive_partitions` moves months older than this to archive storage
+INQUIRY_ARCHIVE_AFTER_MONTHS = int(os.environ.get("INQUIRY_ARCHIVE_AFTER_MONTHS", "24"))
+
 # AWS S3 Configuration
 USE_S3 = os.environ.get("DJANGO_USE_S3", "False") == "True"
 
@@ -220,6 +338,29 @@ if USE_S3:
         "staticfiles": {
             "BACKEND": "storages.backends.s3boto3.S3StaticStorage",
         },
+        # Deduplicated documents and RFQ attachments, stored by content digest
+        "blobs": {
+            "BACKEND": "docs.storage.ContentAddressedStorage",
+            "OPTIONS": {"backend": "default"},
+        },
+        # Private export artifacts, downloaded through presigned URLs
+        "exports": {
+            "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+            "OPTIONS": {
+                "location": "private/exports",
+                "default_acl": "private",
+                "querystring_auth": True,
+                "querystring_expire": EXPORT_URL_MAX_AGE,
+            },
+        },
+        # Archived monthly partitions of inquiry tables (gzipped NDJSON)
+        "archives": {
+            "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+            "OPTIONS": {
+                "location": "private/archives",
+                "default_acl": "private",
+            },
+        },
     }
 
     STATIC_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/static/"
@@ -233,8 +374,52 @@ else:
         "staticfiles": {
             "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
         },
+        # Deduplicated documents and RFQ attachments, stored by content digest
+        "blobs": {
+            "BACKEND": "docs.storage.ContentAddressedStorage",
+            "OPTIONS": {"backend": "default"},
+        },
+        # Private export artifacts, outside MEDIA_ROOT so they are never served directly
+        "exports": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": BASE_DIR / "private" / "exports"},
+        },
+        # Archived monthly partitions of inquiry tables (gzipped NDJSON)
+        "archives": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": BASE_DIR / "private" / "archives"},
+        },
     }
 
+# Admin submission event stream (/api/events/, served by the ASGI app)
+INQUIRY_EVENTS_POLL_INTERVAL = int(os.environ.get("INQUIRY_EVENTS_POLL_INTERVAL", "5"))
+INQUIRY_EVENTS_HEARTBEAT = int(os.environ.get("INQUIRY_EVENTS_HEARTBEAT", "15"))
+# Seconds a ticket from /api/events/ticket/ can be used to open a stream
+INQUIRY_EVENTS_TICKET_TTL = int(os.environ.get("INQUIRY_EVENTS_TICKET_TTL", "30"))
+
+# /api/batch/: max sub-requests per call, how many run at once under ASGI,
+# and how long anonymous 200 responses are cached per item (seconds, 0 = off)
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "20"))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "4"))
+BATCH_ITEM_CACHE_TTL = int(os.environ.get("BATCH_ITEM_CACHE_TTL", "30"))
+
+# Shared nginx cache for anonymous reads of content, documents and manufacturers:
+# how long nginx keeps a response and how long browsers may reuse it (seconds)
+PUBLIC_CACHE_MAX_AGE = int(os.environ.get("PUBLIC_CACHE_MAX_AGE", "300"))
+PUBLIC_CACHE_BROWSER_MAX_AGE = int(os.environ.get("PUBLIC_CACHE_BROWSER_MAX_AGE", "30"))
+# Distinct paths (query strings included) nginx may cache per resource; the
+# rest are served uncached by nginx until older ones expire
+PUBLIC_CACHE_MAX_PATHS = int(os.environ.get("PUBLIC_CACHE_MAX_PATHS", "1000"))
+# Base URL of nginx's internal refresh port as seen from Django, used to
+# refresh cached paths when a model changes; leave blank when nothing caches
+# in front of Django
+NGINX_CACHE_URL = os.environ.get("NGINX_CACHE_URL", "")
+NGINX_CACHE_HOST = os.environ.get("NGINX_CACHE_HOST", ALLOWED_HOSTS[0])
+NGINX_CACHE_REFRESH_TIMEOUT = int(os.environ.get("NGINX_CACHE_REFRESH_TIMEOUT", "5"))
+
+# Store a gzipped copy of each rendered ContentBlock for direct serving
+CMS_PRECOMPRESS_HTML = os.environ.get("CMS_PRECOMPRESS_HTML", "True") == "True"
+
 # Resend Email Configuration
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "info@nathanreardon.com")
@@ -250,3 +435,86 @@ INQUIRY_NOTIFICATION_EMAIL = os.environ.get(
 RFQ_NOTIFICATION_EMAIL = os.environ.get(
     "RFQ_NOTIFICATION_EMAIL", "nathan@membershipauto.com"
 )
+
+# Resend timeouts (seconds) and the circuit breaker around it: after
+# CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures, emails are refused
+# (admin notifications are held for the digest) for CIRCUIT_BREAKER_RESET_TIMEOUT
+# seconds, then a single probe request decides whether to close the circuit.
+EMAIL_CONNECT_TIMEOUT = float(os.environ.get("EMAIL_CONNECT_TIMEOUT", "3"))
+EMAIL_READ_TIMEOUT = float(os.environ.get("EMAIL_READ_TIMEOUT", "10"))
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+CIRCUIT_BREAKER_RESET_TIMEOUT = int(os.environ.get("CIRCUIT_BREAKER_RESET_TIMEOUT", "30"))
+CIRCUIT_BREAKER_PROBE_TIMEOUT = int(os.environ.get("CIRCUIT_BREAKER_PROBE_TIMEOUT", "15"))
+# Seconds a process trusts a closed circuit it read before reading it again;
+# another worker's trip reaches it within this time
+CIRCUIT_BREAKER_CLOSED_CACHE_TTL = float(os.environ.get("CIRCUIT_BREAKER_CLOSED_CACHE_TTL", "5"))
+
+# Idempotency-Key handling for public submissions (seconds)
+# Finished responses are replayed for IDEMPOTENCY_KEY_TTL; a key whose request
+# never finished (e.g. the worker died) can be reused after IDEMPOTENCY_KEY_LEASE.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", "86400"))
+IDEMPOTENCY_KEY_LEASE = int(os.environ.get("IDEMPOTENCY_KEY_LEASE", "60"))
+
+# Admin notification digests
+# The first N admin notifications per hour are sent immediately; the rest are
+# grouped into one summary email every ADMIN_NOTIFICATION_DIGEST_INTERVAL
+# seconds. Set ADMIN_NOTIFICATION_INSTANT_LIMIT to "none" to always send instantly.
+_instant_limit = os.environ.get("ADMIN_NOTIFICATION_INSTANT_LIMIT", "20")
+ADMIN_NOTIFICATION_INSTANT_LIMIT = (
+    None if _instant_limit.lower() == "none" else int(_instant_limit)
+)
+ADMIN_NOTIFICATION_DIGEST_INTERVAL = int(
+    os.environ.get("ADMIN_NOTIFICATION_DIGEST_INTERVAL", "600")
+)
+
+# Logging
+# Records are queued and written as JSON lines by a background thread, so
+# request threads never wait on stdout. Per-request log lines at INFO are
+# sampled at LOG_REQUEST_SAMPLE_RATE; 4xx/5xx and slow requests are always kept.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_REQUEST_SAMPLE_RATE = float(
+    os.environ.get("LOG_REQUEST_SAMPLE_RATE", "1.0" if DEBUG else "0.1")
+)
+LOG_SLOW_REQUEST_MS = int(os.environ.get("LOG_SLOW_REQUEST_MS", "1000"))
+
+# Quiets the log output during `manage.py test`
+TEST_RUNNER = "no_dry_starts.testing.TestRunner"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_context": {"()": "no_dry_starts.log.RequestContextFilter"},
+        "sample_requests": {
+            "()": "no_dry_starts.log.SamplingFilter",
+            "rate": LOG_REQUEST_SAMPLE_RATE,
+            "slow_ms": LOG_SLOW_REQUEST_MS,
+        },
+    },
+    "formatters": {
+        "json": {"()": "no_dry_starts.log.JSONFormatter"},
+    },
+    "handlers": {
+        # Written to only by the queue listener thread
+        "console": {
+            "class": "logging.StreamHandler",
+            "stream": "ext://sys.stdout",
+            "formatter": "json",
+        },
+        "queue": {
+            "()": "no_dry_starts.log.QueueListenerHandler",
+            "handlers": ["cfg://handlers.console"],
+            "filters": ["request_context"],
+        },
+    },
+    "root": {"handlers": ["queue"], "level": LOG_LEVEL},
+    "loggers": {
+        "django": {"handlers": ["queue"], "level": LOG_LEVEL, "propagate": False},
+        "no_dry_starts.requests": {
+            "handlers": ["queue"],
+            "level": "INFO",
+            "filters": ["sample_requests"],
+            "propagate": False,
+        },
+    },
+}
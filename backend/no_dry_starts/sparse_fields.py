@@ -0,0 +1,86 @@
+"""
+Sparse fieldsets for read endpoints: ``?fields=a,b`` returns only those
+fields, ``?omit=c`` drops fields from the default set. The queryset is
+narrowed with ``.only()`` to the columns the remaining fields read, so large
+columns (e.g. content block HTML) are never fetched when they aren't wanted.
+
+On list endpoints ``?fields=`` may also name fields that only the detail
+serializer (``expanded_serializer_class``) provides.
+"""
+
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_field_list(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    # Detail serializer used on list endpoints when ?fields= asks for more
+    expanded_serializer_class = None
+    # Model fields read by serializer fields whose source can't be inferred
+    # (SerializerMethodFields), e.g. {'file_url': ['file']}
+    sparse_field_sources = {}
+
+    def get_sparse_fields(self):
+        """Return (serializer_class, selected field names or None for all)."""
+        serializer_class = self.get_serializer_class()
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return serializer_class, None
+
+        requested = parse_field_list(self.request.query_params.get('fields'))
+        omitted = parse_field_list(self.request.query_params.get('omit'))
+        if not requested and not omitted:
+            return serializer_class, None
+
+        available = list(serializer_class().fields)
+        if (
+            requested
+            and self.expanded_serializer_class
+            and not set(requested) <= set(available)
+        ):
+            serializer_class = self.expanded_serializer_class
+            available = list(serializer_class().fields)
+
+        unknown = sorted((set(requested) | set(omitted)) - set(available))
+        if unknown:
+            raise ValidationError({
+                'error': f"Unknown field(s): {', '.join(unknown)}. "
+                         f"Available: {', '.join(available)}"
+            })
+
+        selected = [name for name in available if not requested or name in requested]
+        return serializer_class, [name for name in selected if name not in omitted]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class, selected = self.get_sparse_fields()
+        kwargs.setdefault('context', self.get_serializer_context())
+        serializer = serializer_class(*args, **kwargs)
+        if selected is not None:
+            fields = serializer.child.fields if isinstance(serializer, serializers.ListSerializer) else serializer.fields
+            for name in list(fields):
+                if name not in selected:
+                    fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class, selected = self.get_sparse_fields()
+        if selected is None:
+            return queryset
+
+        model = queryset.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        fields = serializer_class().fields
+        columns = {model._meta.pk.name}
+        for name in selected:
+            if name in self.sparse_field_sources:
+                columns.update(self.sparse_field_sources[name])
+                continue
+            source = fields[name].source
+            root = source.split('.', 1)[0]
+            if source == '*' or root not in concrete:
+                return queryset  # can't tell which columns it needs; load everything
+            columns.add(root)
+        return queryset.only(*sorted(columns))
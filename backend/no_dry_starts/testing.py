@@ -0,0 +1,68 @@
+"""Helpers shared by the apps' tests."""
+
+import logging
+import os
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from docs.models import Document
+from docs.storage import ContentAddressedStorage
+from inquiries.models import ArchivedPartition, ExportJob, RFQSubmission
+
+
+class TemporaryStorageMixin:
+    """
+    Keep every file the tests write in a temporary directory. File fields
+    hold the storage resolved at import, so their storages are replaced
+    directly as well as MEDIA_ROOT.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.storage_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.storage_root)
+        cls.media_override.enable()
+        cls.file_storages = {}
+        for model, name, storage in [
+            (Document, 'file', ContentAddressedStorage()),
+            (RFQSubmission, 'attachment', ContentAddressedStorage()),
+            (ExportJob, 'file', FileSystemStorage(location=os.path.join(cls.storage_root, 'exports'))),
+            (ArchivedPartition, 'file', FileSystemStorage(location=os.path.join(cls.storage_root, 'archives'))),
+        ]:
+            field = model._meta.get_field(name)
+            cls.file_storages[field] = field.storage
+            field.storage = storage
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for field, storage in cls.file_storages.items():
+            field.storage = storage
+        cls.media_override.disable()
+        shutil.rmtree(cls.storage_root, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """
+    The default runner, keeping the JSON log lines (one per request, plus the
+    warnings tests provoke on purpose) out of the output. ``-v 2`` or more
+    shows them.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.log_levels = {}
+        if self.verbosity < 2:
+            for handler in logging.getLogger().handlers:
+                self.log_levels[handler] = handler.level
+                handler.setLevel(logging.CRITICAL)
+
+    def teardown_test_environment(self, **kwargs):
+        for handler, level in self.log_levels.items():
+            handler.setLevel(level)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,730 @@
+"""
+Query and response time budgets for every route, checked against seeded
+data. Budgets live in ``query_budgets.QUERY_BUDGETS``; a case over its query
+budget fails with the SQL it ran, a slow one logs a warning (or fails, with
+ENFORCE_TIME_BUDGETS=1). Also batch requests, nginx cache path tracking,
+bulk imports, search and estimated counts, sparse fieldsets, UUIDv7 keys and
+the sampling of request log lines.
+"""
+
+import json
+import logging
+import time
+import uuid
+from unittest import mock
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib import admin
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import Group, User
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from cms.models import ContentBlock
+from docs.models import Document
+from inquiries.abuse import abuse_filter, issue_form_token
+from inquiries.models import Contact, DailyStat, ExportJob, InvestorDownloadToken, Lead, RFQSubmission
+from inquiries.serializers import EXPORT_DOWNLOAD_SALT
+from manufacturers.models import Manufacturer, PostalCentroid
+
+from .bulk_import import insert_rows
+from .ids import rekey_to_uuid7, uuid7
+from .log import SamplingFilter
+from .models import CachedPath
+from .query_budgets import ENFORCE_TIME_BUDGETS, QUERY_BUDGETS, TIME_BUDGET_MARGIN
+from .search import EstimatedCountPaginator, estimated_count
+from .testing import TemporaryStorageMixin
+
+# Rows of each kind seeded, so a per-row query shows up as a blown budget
+SEED_ROWS = 5
+PASSWORD = 'budget-password'
+
+# Named routes not exercised, with the reason
+UNBUDGETED = {
+    'submission-events': "server-sent event stream that never completes",
+    'admin:autocomplete': "no admin uses autocomplete_fields",
+    'admin:view_on_site': "no model defines get_absolute_url",
+}
+
+
+def case(method, name, who='anonymous', kwargs=None, data=None, content_type=None, status=200,
+         setup=None, variant='', headers=None):
+    """
+    One request against a named route. ``kwargs``, ``data`` and ``headers``
+    may be callables of the test; ``setup(test)`` runs before each request,
+    outside the measurement.
+    """
+    return {
+        'key': f'{method} {name}{f"[{variant}]" if variant else ""} ({who})',
+        'setup': setup,
+        'method': method.lower(),
+        'name': name,
+        'who': who,
+        'kwargs': kwargs,
+        'data': data,
+        'content_type': content_type,
+        'headers': headers,
+        'status': status,
+    }
+
+
+def form_token(test):
+    """X-Form-Token of a public form rendered a minute ago"""
+    return {'HTTP_X_FORM_TOKEN': issue_form_token(time.time() - 60)}
+
+
+def csv_body(header, rows):
+    return '\n'.join([header] + rows).encode()
+
+
+API_CASES = [
+    case('GET', 'api-root'),
+    case('POST', 'token_obtain_pair', data={'username': 'staff', 'password': PASSWORD}),
+    case('POST', 'token_refresh', data=lambda t: {'refresh': str(RefreshToken.for_user(t.staff))}),
+    case('GET', 'schema'),
+    case('GET', 'swagger-ui'),
+    case('POST', 'batch', data={'requests': [
+        {'path': '/api/manufacturers/'}, {'path': '/api/documents/'}, {'path': '/api/content/'},
+    ]}, content_type='application/json'),
+
+    case('GET', 'manufacturer-list'),
+    case('GET', 'manufacturer-list', 'staff'),
+    case('POST', 'manufacturer-list', 'staff', data={
+        'name': 'New', 'description': 'd', 'address': 'a', 'phone': '1', 'email': 'new@example.com',
+    }, status=201),
+    case('GET', 'manufacturer-detail', kwargs=lambda t: {'pk': t.manufacturers[0].pk}),
+    case('GET', 'manufacturer-nearest', data={'postal_code': '10001', 'limit': SEED_ROWS}),
+    case('PATCH', 'manufacturer-detail', 'staff', kwargs=lambda t: {'pk': t.manufacturers[0].pk},
+         data={'phone': '2'}),
+    case('POST', 'manufacturer-bulk-import', 'staff', data=csv_body(
+        'name,description,address,phone,email',
+        [f'Imported {i},d,a,1,imported{i}@example.com' for i in range(SEED_ROWS)],
+    ), content_type='text/csv'),
+
+    case('GET', 'document-list'),
+    case('GET', 'document-list', 'staff'),
+    case('POST', 'document-list', 'staff', data=lambda t: {
+        'file_name': 'New', 'category': 'other',
+        'file': SimpleUploadedFile('new.txt', b'new document', content_type='text/plain'),
+    }, content_type='multipart', status=201),
+    case('GET', 'document-detail', kwargs=lambda t: {'pk': t.documents[0].pk}),
+    case('PATCH', 'document-detail', 'staff', kwargs=lambda t: {'pk': t.documents[0].pk},
+         data={'description': 'Updated'}),
+    case('POST', 'document-bulk-import', 'staff', data=csv_body(
+        'file_name,file,category',
+        [f'Imported {i},legacy/imported{i}.pdf,other' for i in range(SEED_ROWS)],
+    ), content_type='text/csv'),
+
+    case('POST', 'investor-request-download', data={'email': 'investor@example.com', 'name': 'Investor'},
+         headers=form_token, status=201),
+    case('GET', 'form-token'),
+    case('POST', 'events-ticket', 'staff'),
+    case('GET', 'investor-download', kwargs=lambda t: {'token': t.token.token},
+         setup=lambda t: InvestorDownloadToken.objects.filter(pk=t.token.pk).update(download_count=0)),
+    case('GET', 'stats', 'staff'),
+
+    case('GET', 'lead-list', 'staff'),
+    case('POST', 'lead-list', data={
+        'full_name': 'New Lead', 'email': 'lead@example.com', 'message': 'Hello', 'inquiry_type': 'contact',
+    }, headers=form_token, status=201),
+    case('GET', 'lead-detail', 'staff', kwargs=lambda t: {'pk': t.leads[0].pk}),
+    case('GET', 'lead-export-csv', 'staff'),
+    case('POST', 'lead-bulk-import', 'staff', data=csv_body(
+        'full_name,email,message,inquiry_type',
+        [f'Imported {i},imported{i}@example.com,Hello,contact' for i in range(SEED_ROWS)],
+    ), content_type='text/csv'),
+
+    case('GET', 'rfq-list', 'staff'),
+    case('POST', 'rfq-list', data={
+        'full_name': 'New RFQ', 'email': 'rfq@example.com', 'phone': '1', 'message': 'Quote please',
+    }, headers=form_token, status=201),
+    case('GET', 'rfq-detail', 'staff', kwargs=lambda t: {'pk': t.rfqs[0].pk}),
+    case('GET', 'rfq-export-csv', 'staff'),
+
+    case('GET', 'export-list', 'staff'),
+    case('POST', 'export-list', 'staff', data={'resource': 'leads', 'format': 'csv'}, status=201,
+         setup=lambda t: ExportJob.objects.filter(status__in=ExportJob.ACTIVE_STATUSES).delete()),
+    case('GET', 'export-detail', 'staff', kwargs=lambda t: {'pk': t.export.pk}),
+    case('GET', 'export-download', kwargs=lambda t: {
+        'signature': signing.TimestampSigner(salt=EXPORT_DOWNLOAD_SALT).sign(str(t.export.pk)),
+    }),
+
+    case('GET', 'content-list'),
+    case('GET', 'content-list', 'staff'),
+    case('POST', 'content-list', 'staff', data={
+        'slug': 'new-block', 'title': 'New', 'html_content': '<p>New</p>', 'page': 'home',
+    }, status=201, setup=lambda t: ContentBlock.objects.filter(slug='new-block').delete()),
+    case('GET', 'content-detail', kwargs=lambda t: {'slug': t.blocks[0].slug}),
+    case('PATCH', 'content-detail', 'staff', kwargs=lambda t: {'slug': t.blocks[0].slug},
+         data={'html_content': '<p>Changed</p>'}),
+    case('GET', 'content-html', kwargs=lambda t: {'slug': t.blocks[0].slug}),
+    case('POST', 'content-reorder', 'staff', data=lambda t: {
+        'blocks': [{'slug': block.slug, 'order': index} for index, block in enumerate(reversed(t.blocks))],
+    }),
+]
+
+
+def admin_cases():
+    cases = [
+        case('GET', 'admin:index', 'admin'),
+        case('GET', 'admin:login'),
+        case('POST', 'admin:logout', 'admin'),
+        case('GET', 'admin:password_change', 'admin'),
+        case('GET', 'admin:password_change_done', 'admin'),
+        case('GET', 'admin:jsi18n', 'admin'),
+        case('GET', 'admin:auth_user_password_change', 'admin', kwargs=lambda t: {'id': t.staff.pk}),
+    ]
+    app_labels = sorted({model._meta.app_label for model in admin.site._registry})
+    for app_label in app_labels:
+        cases.append(case('GET', 'admin:app_list', 'admin', kwargs={'app_label': app_label}, variant=app_label))
+    for model in sorted(admin.site._registry, key=lambda m: m._meta.label):
+        prefix = f'admin:{model._meta.app_label}_{model._meta.model_name}'
+        object_id = (lambda m: lambda t: {'object_id': t.admin_objects[m].pk})(model)
+        cases += [
+            case('GET', f'{prefix}_changelist', 'admin'),
+            case('GET', f'{prefix}_add', 'admin'),
+            case('GET', f'{prefix}_change', 'admin', kwargs=object_id),
+            case('GET', f'{prefix}_history', 'admin', kwargs=object_id),
+            case('GET', f'{prefix}_delete', 'admin', kwargs=object_id),
+        ]
+    return cases
+
+
+def route_names(resolver=None, namespace=''):
+    names = set()
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if isinstance(pattern, URLResolver):
+            inner = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names |= route_names(pattern, inner)
+        elif pattern.name:
+            names.add(f'{namespace}{pattern.name}')
+    return names
+
+
+# Slow routes are reported here; shown with -v 2
+budget_logger = logging.getLogger('no_dry_starts.budgets')
+
+
+@override_settings(
+    RESEND_API_KEY='',
+    EXPORT_JOBS_IN_PROCESS=False,
+    NGINX_CACHE_URL='',
+    CMS_PRECOMPRESS_HTML=True,
+)
+class RouteBudgetTests(TemporaryStorageMixin, TestCase):
+    """Every route stays within its declared query count, and is timed against its response time."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('staff', 'staff@example.com', PASSWORD)
+        cls.group = Group.objects.create(name='Editors')
+        cls.centroids = [
+            PostalCentroid.objects.create(
+                country='US', postal_code=f'1000{i + 1}', latitude=40.75 + i / 100, longitude=-73.99,
+            )
+            for i in range(SEED_ROWS)
+        ]
+        cls.manufacturers = [
+            Manufacturer.objects.create(
+                name=f'Partner {i}', description='d', address='a', phone='1',
+                email=f'partner{i}@example.com', postal_code=f'1000{i + 1}',
+            )
+            for i in range(SEED_ROWS)
+        ]
+        cls.documents = [
+            Document.objects.create(
+                file_name=f'Document {i}',
+                category='investor' if i == 0 else 'patent',
+                file=ContentFile(f'document {i} '.encode() * 100, name=f'document{i}.txt'),
+            )
+            for i in range(SEED_ROWS)
+        ]
+        cls.leads = [
+            Lead.objects.create(
+                full_name=f'Lead {i}', email=f'lead{i}@example.com', message='Hello', inquiry_type='contact',
+            )
+            for i in range(SEED_ROWS)
+        ]
+        cls.rfqs = [
+            RFQSubmission.objects.create(
+                full_name=f'RFQ {i}', email=f'rfq{i}@example.com', phone='1', message='Quote',
+            )
+            for i in range(SEED_ROWS)
+        ]
+        cls.blocks = [
+            ContentBlock.objects.create(
+                slug=f'block-{i}', title=f'Block {i}', html_content=f'<p>Block {i}</p>', order=i,
+            )
+            for i in range(SEED_ROWS)
+        ]
+        cls.token = InvestorDownloadToken.objects.create(email='investor@example.com')
+        cls.export = ExportJob.objects.create(
+            resource='leads', format='csv', fingerprint='seeded', status='completed', row_count=1,
+        )
+        cls.export.file.save('seeded.csv', ContentFile(b'ID\n1\n'))
+        cls.admin_objects = {
+            User: cls.staff,
+            Group: cls.group,
+            Manufacturer: cls.manufacturers[0],
+            PostalCentroid: cls.centroids[0],
+            Document: cls.documents[0],
+            Lead: cls.leads[0],
+            RFQSubmission: cls.rfqs[0],
+            ContentBlock: cls.blocks[0],
+            Contact: Contact.objects.first(),
+        }
+
+    def setUp(self):
+        self.cases = API_CASES + admin_cases()
+
+    def client_for(self, who):
+        client = APIClient()
+        if who == 'staff':
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.staff)}')
+        elif who == 'admin':
+            client.force_login(self.staff)
+        return client
+
+    def perform(self, spec):
+        kwargs = spec['kwargs'](self) if callable(spec['kwargs']) else spec['kwargs']
+        data = spec['data'](self) if callable(spec['data']) else spec['data']
+        url = reverse(spec['name'], kwargs=kwargs)
+        client = self.client_for(spec['who'])
+        options = spec['headers'](self) if callable(spec['headers']) else dict(spec['headers'] or {})
+        if spec['content_type'] == 'multipart':
+            options['format'] = 'multipart'
+        elif spec['content_type']:
+            options['content_type'] = spec['content_type']
+        elif data is not None:
+            options['format'] = 'json'
+        if spec['setup']:
+            spec['setup'](self)
+        # Rate limits and batch item caching would otherwise carry over
+        cache.clear()
+        abuse_filter.reset()
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, spec['method'])(url, data, **options)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if hasattr(response, 'close'):
+            response.close()
+        return response, queries.captured_queries, elapsed_ms
+
+    def test_every_route_has_a_budget(self):
+        exercised = {spec['name'] for spec in self.cases}
+        missing = route_names() - exercised - set(UNBUDGETED)
+        self.assertFalse(missing, f"Routes without a budgeted case: {sorted(missing)}")
+
+        keys = {spec['key'] for spec in self.cases}
+        self.assertFalse(keys - set(QUERY_BUDGETS), f"Cases missing from QUERY_BUDGETS: {sorted(keys - set(QUERY_BUDGETS))}")
+        self.assertFalse(set(QUERY_BUDGETS) - keys, f"Stale QUERY_BUDGETS entries: {sorted(set(QUERY_BUDGETS) - keys)}")
+
+    def test_routes_within_budget(self):
+        for spec in self.cases:
+            if spec['key'] not in QUERY_BUDGETS:
+                continue
+            max_queries, max_ms = QUERY_BUDGETS[spec['key']]
+            with self.subTest(spec['key']):
+                # The first call warms imports and per-process caches
+                self.perform(spec)
+                response, queries, elapsed_ms = self.perform(spec)
+                self.assertEqual(
+                    response.status_code, spec['status'],
+                    f"{spec['key']} returned {response.status_code}",
+                )
+                if len(queries) > max_queries:
+                    statements = '\n'.join(
+                        f"  {number}. {query['sql']}" for number, query in enumerate(queries, start=1)
+                    )
+                    self.fail(
+                        f"{spec['key']} ran {len(queries)} queries, budget {max_queries}:\n{statements}"
+                    )
+                if elapsed_ms > max_ms:
+                    message = f"{spec['key']} took {elapsed_ms:.0f} ms, budget {max_ms} ms"
+                    if ENFORCE_TIME_BUDGETS and elapsed_ms > max_ms * TIME_BUDGET_MARGIN:
+                        self.fail(f"{message} (x{TIME_BUDGET_MARGIN:g} allowed)")
+                    budget_logger.warning(message)
+
+
+@override_settings(BATCH_ITEM_CACHE_TTL=30)
+class BatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password=PASSWORD, is_staff=True)
+        Lead.objects.create(full_name='Private', email='private@example.com', message='Hi', inquiry_type='investor')
+
+    def setUp(self):
+        cache.clear()
+
+    def batch(self, *items, token=None):
+        client = APIClient()
+        if token:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.post('/api/batch/', {'requests': list(items)}, format='json')
+        return [item['status'] for item in response.json()['responses']]
+
+    def test_item_credentials_are_ignored(self):
+        token = AccessToken.for_user(self.staff)
+        statuses = self.batch(
+            {'path': '/api/leads/', 'headers': {'Authorization': f'Bearer {token}'}},
+            {'path': '/api/leads/'},
+        )
+        self.assertEqual(statuses, [401, 401])
+
+    def test_staff_responses_are_not_served_to_anonymous_callers(self):
+        self.assertEqual(self.batch({'path': '/api/leads/'}, token=AccessToken.for_user(self.staff)), [200])
+        self.assertEqual(self.batch({'path': '/api/leads/'}), [401])
+
+    def test_item_headers_do_not_change_cached_responses(self):
+        ContentBlock.objects.create(slug='hero', title='Hero', html_content='<p>Hi</p>')
+        response = APIClient().post('/api/batch/', {'requests': [
+            {'path': '/api/content/hero/html/', 'headers': {'Accept-Encoding': 'gzip'}},
+            {'path': '/api/content/', 'headers': {'Accept': 'text/html'}},
+        ]}, format='json', HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip')
+        html, listing = response.json()['responses']
+        self.assertEqual(html['body'], '<p>Hi</p>')
+        self.assertIn('json', listing['headers']['Content-Type'])
+        # Served from the cache to the next anonymous caller unchanged
+        response = APIClient().post('/api/batch/', {'requests': [{'path': '/api/content/hero/html/'}]}, format='json')
+        self.assertEqual(response.json()['responses'][0]['body'], '<p>Hi</p>')
+
+    def test_anonymous_responses_are_cached(self):
+        self.assertEqual(self.batch({'path': '/api/content/'}), [200])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.batch({'path': '/api/content/'}), [200])
+
+
+@override_settings(NGINX_CACHE_URL='http://nginx:8080', PUBLIC_CACHE_MAX_PATHS=2, PUBLIC_CACHE_MAX_AGE=300)
+class CachedPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ContentBlock.objects.create(slug='hero', title='Hero', html_content='<p>Welcome</p>')
+
+    def get(self, path):
+        response = APIClient().get(path)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Accel-Expires']
+
+    def test_paths_are_recorded_per_key(self):
+        self.assertEqual(self.get('/api/content/hero/'), '300')
+        self.assertEqual(self.get('/api/content/hero/'), '300')
+        self.assertEqual(
+            sorted(CachedPath.objects.values_list('key', 'path')),
+            [('content', '/api/content/hero/'), ('content:hero', '/api/content/hero/')],
+        )
+
+    def test_paths_over_the_limit_are_not_cached(self):
+        self.assertEqual(self.get('/api/content/?a=1'), '300')
+        self.assertEqual(self.get('/api/content/?a=2'), '300')
+        self.assertEqual(self.get('/api/content/?a=3'), '0')
+        self.assertEqual(self.get('/api/content/?a=1'), '300')
+        self.assertEqual(CachedPath.objects.count(), 2)
+
+    def test_expired_paths_make_room(self):
+        self.get('/api/content/?a=1')
+        self.get('/api/content/?a=2')
+        CachedPath.objects.filter(path='/api/content/?a=1').update(last_seen=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.get('/api/content/?a=3'), '300')
+        self.assertEqual(
+            sorted(CachedPath.objects.values_list('path', flat=True)),
+            ['/api/content/?a=2', '/api/content/?a=3'],
+        )
+
+    def test_long_paths_are_not_cached(self):
+        self.assertEqual(self.get('/api/content/?q=' + 'x' * 500), '0')
+        self.assertFalse(CachedPath.objects.exists())
+
+
+MANUFACTURER_COLUMNS = 'name,description,address,postal_code,country,phone,email,website,active'
+
+
+def manufacturer_row(n, **values):
+    row = {
+        'name': f'Shop {n}', 'description': 'd', 'address': 'a', 'postal_code': '10001', 'country': 'us',
+        'phone': '1', 'email': f'shop{n}@example.com', 'website': '', 'active': 'true',
+    }
+    row.update(values)
+    return ','.join(row[column] for column in MANUFACTURER_COLUMNS.split(','))
+
+
+@override_settings(BULK_IMPORT_BATCH_SIZE=2, BULK_IMPORT_MAX_ERRORS=2)
+class BulkImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password=PASSWORD, is_staff=True)
+        PostalCentroid.objects.create(country='US', postal_code='10001', latitude=40.75, longitude=-73.99)
+
+    def post(self, resource, body, content_type='text/csv', **extra):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        return client.post(f'/api/{resource}/import/', body, content_type=content_type, **extra)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        response = self.post('manufacturers', csv_body(MANUFACTURER_COLUMNS, [
+            manufacturer_row(1),
+            manufacturer_row(2, email='not-an-email'),
+            manufacturer_row(3, name=''),
+            manufacturer_row(4, active='maybe'),
+            manufacturer_row(5, country='gb', postal_code=''),
+        ]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['failed'], 3)
+        # Only the first BULK_IMPORT_MAX_ERRORS are listed
+        self.assertEqual(response.data['errors'], [
+            {'row': 2, 'errors': {'email': ['Enter a valid email address.']}},
+            {'row': 3, 'errors': {'name': ['This field cannot be blank.']}},
+        ])
+        shop = Manufacturer.objects.get(name='Shop 1')
+        self.assertEqual((shop.country, shop.latitude, shop.active), ('US', 40.75, True))
+        self.assertEqual(Manufacturer.objects.get(name='Shop 5').latitude, None)
+
+    def test_rows_are_inserted_in_chunks(self):
+        body = csv_body(MANUFACTURER_COLUMNS, [manufacturer_row(n) for n in range(5)])
+        with mock.patch('no_dry_starts.bulk_import.insert_rows', wraps=insert_rows) as insert, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.post('manufacturers', body)
+        self.assertEqual(response.data, {'created': 5, 'failed': 0, 'errors': []})
+        self.assertEqual([len(call.args[1]) for call in insert.call_args_list], [2, 2, 1])
+        # Postal codes are located once per chunk
+        locates = [q['sql'] for q in queries if 'manufacturers_postalcentroid' in q['sql']]
+        self.assertEqual(len(locates), 3)
+        self.assertEqual(Manufacturer.objects.filter(latitude=40.75).count(), 5)
+
+    def test_ndjson_lines_are_reported_in_place(self):
+        lines = [
+            json.dumps({'full_name': 'Ann', 'email': 'ann@example.com', 'message': 'Hi', 'inquiry_type': 'contact',
+                        'created_at': '2024-03-01T10:00:00Z'}),
+            '{not json',
+            '',
+            '["a list"]',
+            json.dumps({'full_name': 'Bob', 'email': 'ANN@example.com', 'message': 'Hi', 'inquiry_type': 'investor'}),
+        ]
+        response = self.post('leads', '\n'.join(lines), content_type='application/x-ndjson')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'], [
+            {'row': 2, 'errors': {'non_field_errors': ['Invalid JSON']}},
+            {'row': 3, 'errors': {'non_field_errors': ['Expected a JSON object']}},
+        ])
+        ann = Lead.objects.get(full_name='Ann')
+        self.assertEqual(ann.created_at.year, 2024)
+        self.assertLess(ann.pk, Lead.objects.get(full_name='Bob').pk)
+        self.assertEqual(Contact.objects.get().leads.count(), 2)
+        self.assertEqual(DailyStat.objects.filter(metric='lead').count(), 2)
+
+    def test_multipart_upload(self):
+        upload = SimpleUploadedFile(
+            'docs.csv', csv_body('file_name,file,category', ['Deck,documents/deck.pdf,investor', 'Blob,blobs/x,other']),
+            content_type='application/octet-stream',
+        )
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.post('/api/documents/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(list(response.data['errors'][0]['errors']), ['file'])
+        self.assertEqual(Document.objects.get().file.name, 'documents/deck.pdf')
+
+    def test_unreadable_input_keeps_earlier_rows(self):
+        body = csv_body(MANUFACTURER_COLUMNS, [manufacturer_row(n) for n in range(3)]) + b'\n\xff\xfe,broken'
+        response = self.post('manufacturers', body)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 3)
+        self.assertIn('Unreadable input after row 3', response.data['error'])
+        self.assertEqual(Manufacturer.objects.count(), 3)
+
+    def test_unsupported_media_type(self):
+        response = self.post('manufacturers', '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 415)
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=1000)
+class SearchTests(TemporaryStorageMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password=PASSWORD, is_staff=True)
+        for name, description in [('Patent.pdf', 'Filed in March'), ('Deck.pdf', 'Series A PATENTS'), ('Plan.pdf', '')]:
+            Document.objects.create(
+                file_name=name, description=description, category='other',
+                file=ContentFile(name.encode(), name),
+            )
+        for name, email in [('Ann Lee', 'ann@example.com'), ('Bob Stone', 'bob@lee.example')]:
+            Lead.objects.create(full_name=name, email=email, message='Hi', inquiry_type='contact')
+
+    def search(self, path, who=None):
+        client = APIClient()
+        if who:
+            client.force_authenticate(who)
+        response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_search_matches_any_field_ignoring_case(self):
+        data = self.search('/api/documents/?search=patent')
+        self.assertEqual(sorted(item['file_name'] for item in data['results']), ['Deck.pdf', 'Patent.pdf'])
+        self.assertEqual(data['count'], 2)
+        data = self.search('/api/leads/?search=LEE', self.staff)
+        self.assertEqual(sorted(item['full_name'] for item in data['results']), ['Ann Lee', 'Bob Stone'])
+        self.assertEqual(self.search('/api/leads/?search=ann%20lee', self.staff)['count'], 1)
+
+    def test_exact_counts_below_the_threshold(self):
+        queryset = Document.objects.order_by('file_name')
+        with mock.patch('no_dry_starts.search.estimated_count', return_value=999):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+
+    def test_large_lists_use_the_estimate(self):
+        queryset = Document.objects.order_by('file_name')
+        with mock.patch('no_dry_starts.search.estimated_count', return_value=5000) as estimate:
+            paginator = EstimatedCountPaginator(queryset, 2)
+            with self.assertNumQueries(0):
+                self.assertEqual(paginator.count, 5000)
+            self.assertEqual(paginator.num_pages, 2500)
+            self.assertEqual(len(paginator.page(1).object_list), 2)
+        estimate.assert_called_once()
+        with mock.patch('no_dry_starts.search.estimated_count', return_value=5000):
+            self.assertEqual(self.search('/api/documents/')['count'], 5000)
+
+    def test_no_estimate_off_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.assertIsInstance(estimated_count(Document.objects.all()), int)
+        else:
+            self.assertIsNone(estimated_count(Document.objects.all()))
+        self.assertEqual(EstimatedCountPaginator([1, 2, 3], 2).count, 3)
+
+
+class SparseFieldsTests(TemporaryStorageMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ContentBlock.objects.create(slug='hero', title='Hero', html_content='<p>Welcome</p>')
+        Document.objects.create(
+            file_name='Deck', category='investor', file=ContentFile(b'%PDF-1.4 deck', 'deck.pdf'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        return response, selects[-1].split(' FROM ')[0]
+
+    def test_fields_selects_fields_and_columns(self):
+        response, sql = self.get('/api/content/?fields=slug,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'slug': 'hero', 'title': 'Hero'}])
+        self.assertNotIn('rendered_html', sql)
+        self.assertNotIn('order', sql)
+
+    def test_omit_drops_fields(self):
+        response, sql = self.get('/api/content/?omit=html_content,created_at')
+        block = response.data['results'][0]
+        self.assertNotIn('html_content', block)
+        self.assertNotIn('created_at', block)
+        self.assertEqual(block['slug'], 'hero')
+        self.assertNotIn('rendered_html', sql)
+
+    def test_method_fields_load_their_sources(self):
+        response, sql = self.get('/api/documents/?fields=file_name,file_url')
+        document = response.data['results'][0]
+        self.assertEqual(set(document), {'file_name', 'file_url'})
+        self.assertTrue(document['file_url'].endswith('.pdf'))
+        self.assertNotIn('description', sql)
+
+    def test_list_expands_to_detail_fields(self):
+        response, _ = self.get('/api/documents/?fields=id,sha256')
+        document = response.data['results'][0]
+        self.assertEqual(set(document), {'id', 'sha256'})
+        self.assertEqual(len(document['sha256']), 64)
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ('fields=slug,secret', 'omit=secret'):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/content/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('secret', response.data['error'])
+
+    def test_writes_ignore_sparse_fields(self):
+        staff = User.objects.create_user('editor', password=PASSWORD, is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.post(
+            '/api/content/?fields=slug',
+            {'slug': 'about', 'title': 'About', 'html_content': '<p>About</p>'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['title'], 'About')
+
+
+class UUIDKeyTests(TestCase):
+    def test_keys_increase(self):
+        keys = [uuid7() for _ in range(10_000)]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual({key.version for key in keys}, {7})
+
+    def test_rekey_keeps_admin_history(self):
+        staff = User.objects.create_user('staff', password=PASSWORD, is_staff=True)
+        leads = [
+            Lead.objects.create(
+                id=uuid.uuid4(), full_name=f'Lead {n}', email='lead@example.com', message='Hi', inquiry_type='contact',
+            )
+            for n in range(5)
+        ]
+        # Older than New by more than a millisecond, so their v7 keys sort below it
+        Lead.objects.update(created_at=timezone.now() - timedelta(days=1))
+        Lead.objects.filter(pk=leads[0].pk).update(created_at=timezone.now() - timedelta(days=30))
+        newest = Lead.objects.create(full_name='New', email='new@example.com', message='Hi', inquiry_type='contact')
+        entry = LogEntry.objects.log_actions(
+            staff.pk, [leads[0]], CHANGE, change_message='Edited', single_object=True,
+        )
+
+        self.assertEqual(rekey_to_uuid7(apps, 'inquiries', 'Lead', batch_size=2), 5)
+        self.assertEqual(rekey_to_uuid7(apps, 'inquiries', 'Lead', batch_size=2), 0)
+
+        self.assertEqual({lead.pk.version for lead in Lead.objects.all()}, {7})
+        self.assertFalse(Lead.objects.filter(pk__in=[lead.pk for lead in leads]).exists())
+        ordered = list(Lead.objects.order_by('-id').values_list('full_name', flat=True))
+        self.assertEqual((ordered[0], ordered[-1]), ('New', 'Lead 0'))
+        self.assertEqual(Lead.objects.get(pk=newest.pk).full_name, 'New')
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.content_type, ContentType.objects.get_for_model(Lead))
+        self.assertEqual(Lead.objects.get(pk=entry.object_id).full_name, 'Lead 0')
+
+
+class RequestLogSamplingTests(TestCase):
+    def record(self, level=logging.INFO, **fields):
+        record = logging.LogRecord('no_dry_starts.requests', level, __file__, 0, 'GET / %s', (200,), None)
+        record.__dict__.update(fields)
+        return record
+
+    def test_errors_and_slow_requests_are_always_kept(self):
+        never = SamplingFilter(rate=0, slow_ms=1000)
+        self.assertFalse(never.filter(self.record(status=200, duration_ms=12)))
+        for record in (
+            self.record(status=404, duration_ms=3),
+            self.record(status=503, duration_ms=3),
+            self.record(status=200, duration_ms=1500),
+            self.record(logging.WARNING),
+        ):
+            with self.subTest(status=getattr(record, 'status', None), duration_ms=getattr(record, 'duration_ms', None)):
+                self.assertTrue(never.filter(record))
+
+    def test_other_lines_are_sampled(self):
+        half = SamplingFilter(rate=0.5, slow_ms=1000)
+        kept = sum(half.filter(self.record(status=200, duration_ms=5)) for _ in range(2000))
+        self.assertTrue(800 < kept < 1200, kept)
@@ -1,11 +1,12 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import Link from 'next/link';
 import { Navigation } from '@/components/Navigation';
 import { Footer } from '@/components/Footer';
 import apiClient from '@/lib/api-client';
 import { Button } from '@/components/Button';
+import { HoneypotField, honeypotValue } from '@/components/HoneypotField';
 
 export default function ContactPage() {
   const [formData, setFormData] = useState({
@@ -18,13 +19,19 @@ export default function ContactPage() {
   const [status, setStatus] = useState<'idle' | 'loading' | 'success' | 'error'>('idle');
   const [errorMessage, setErrorMessage] = useState('');
 
-  const handleSubmit = async (e: React.FormEvent) => {
+  // The form token must be older than a few seconds when the form is sent
+  useEffect(() => {
+    apiClient.prepareForm().catch(() => {});
+  }, []);
+
+  const handleSubmit = async (e: React.FormEvent<HTMLFormElement>) => {
     e.preventDefault();
+    const honeypot = honeypotValue(e.currentTarget);
     setStatus('loading');
     setErrorMessage('');
 
     try {
-      await apiClient.createLead(formData);
+      await apiClient.createLead(formData, honeypot);
       setStatus('success');
       setFormData({
         full_name: '',
@@ -110,7 +117,8 @@ export default function ContactPage() {
             </div>
           ) : null}
 
-          <form onSubmit={handleSubmit} className="bg-[var(--color-graphite-900)] border border-[var(--color-graphite-800)] rounded-lg p-8 space-y-6">
+          <form onSubmit={handleSubmit} className="relative bg-[var(--color-graphite-900)] border border-[var(--color-graphite-800)] rounded-lg p-8 space-y-6">
+            <HoneypotField />
             <div>
               <label htmlFor="full_name" className="block text-sm font-medium text-[var(--color-white-200)] mb-2">
                 Full Name *
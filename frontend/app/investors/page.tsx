@@ -6,6 +6,7 @@ import { Button } from '@/components/Button';
 import { Navigation } from '@/components/Navigation';
 import apiClient, { Document } from '@/lib/api-client';
 import { Footer } from '@/components/Footer';
+import { HoneypotField, honeypotValue } from '@/components/HoneypotField';
 import { CheckCircle, FileText, Mail, Download, AlertCircle } from 'lucide-react';
 
 export default function InvestorsPage() {
@@ -33,6 +34,8 @@ export default function InvestorsPage() {
     };
 
     fetchDocs();
+    // The form token must be older than a few seconds when the form is sent
+    apiClient.prepareForm().catch(() => {});
   }, []);
 
   // Check if there's a download token in URL
@@ -46,13 +49,14 @@ export default function InvestorsPage() {
     }
   }, []);
 
-  const handleEmailSubmit = async (e: React.FormEvent) => {
+  const handleEmailSubmit = async (e: React.FormEvent<HTMLFormElement>) => {
     e.preventDefault();
+    const honeypot = honeypotValue(e.currentTarget);
     setDownloadStatus('loading');
     setErrorMessage('');
 
     try {
-      const response = await apiClient.requestInvestorDownload(emailFormData.email, emailFormData.name);
+      const response = await apiClient.requestInvestorDownload(emailFormData.email, emailFormData.name, honeypot);
       setDownloadStatus('success');
       setEmailFormVisible(false);
     } catch (error) {
@@ -239,7 +243,8 @@ export default function InvestorsPage() {
                 </div>
               )}
 
-              <form onSubmit={handleEmailSubmit} className="space-y-4">
+              <form onSubmit={handleEmailSubmit} className="relative space-y-4">
+                <HoneypotField />
                 <div>
                   <label htmlFor="name" className="block text-sm font-medium text-[var(--color-white-200)] mb-2">
                     Name (Optional)
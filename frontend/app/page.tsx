@@ -15,7 +15,7 @@ export default function Home() {
   useEffect(() => {
     const fetchContentBlocks = async () => {
       try {
-        const blocks = await apiClient.getContentBlocks();
+        const blocks = await apiClient.getContentBlocks(['slug', 'html_content', 'page', 'order']);
         // Filter for homepage blocks and sort by order
         const homeBlocks = blocks
           .filter(block => block.page === 'home')
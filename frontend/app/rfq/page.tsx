@@ -1,11 +1,12 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import Link from 'next/link';
 import { Navigation } from '@/components/Navigation';
 import { Footer } from '@/components/Footer';
 import apiClient from '@/lib/api-client';
 import { Button } from '@/components/Button';
+import { HoneypotField, honeypotValue } from '@/components/HoneypotField';
 import { FileText, Upload, CheckCircle } from 'lucide-react';
 
 export default function RFQPage() {
@@ -20,6 +21,11 @@ export default function RFQPage() {
   const [status, setStatus] = useState<'idle' | 'loading' | 'success' | 'error'>('idle');
   const [errorMessage, setErrorMessage] = useState('');
 
+  // The form token must be older than a few seconds when the form is sent
+  useEffect(() => {
+    apiClient.prepareForm().catch(() => {});
+  }, []);
+
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     const file = e.target.files?.[0];
     if (file) {
@@ -33,8 +39,9 @@ export default function RFQPage() {
     }
   };
 
-  const handleSubmit = async (e: React.FormEvent) => {
+  const handleSubmit = async (e: React.FormEvent<HTMLFormElement>) => {
     e.preventDefault();
+    const honeypot = honeypotValue(e.currentTarget);
     setStatus('loading');
     setErrorMessage('');
 
@@ -42,7 +49,7 @@ export default function RFQPage() {
       await apiClient.createRFQ({
         ...formData,
         attachment: attachment || undefined,
-      });
+      }, honeypot);
       setStatus('success');
       setFormData({
         full_name: '',
@@ -99,7 +106,8 @@ export default function RFQPage() {
             </div>
           ) : null}
 
-          <form onSubmit={handleSubmit} className="bg-[var(--color-graphite-900)] border border-[var(--color-graphite-800)] rounded-lg p-8 space-y-6">
+          <form onSubmit={handleSubmit} className="relative bg-[var(--color-graphite-900)] border border-[var(--color-graphite-800)] rounded-lg p-8 space-y-6">
+            <HoneypotField />
             <div className="grid md:grid-cols-2 gap-6">
               <div>
                 <label htmlFor="full_name" className="block text-sm font-medium text-[var(--color-white-200)] mb-2">
@@ -184,7 +192,7 @@ export default function RFQPage() {
                   id="attachment"
                   onChange={handleFileChange}
                   className="hidden"
-                  accept=".pdf,.doc,.docx,.dwg,.dxf,.cad,.step,.stp"
+                  accept=".pdf,.doc,.docx,.dwg,.dxf,.step,.stp,.png,.jpg,.jpeg"
                 />
                 <label
                   htmlFor="attachment"
@@ -195,7 +203,7 @@ export default function RFQPage() {
                     {attachment ? attachment.name : 'Click to upload or drag and drop'}
                   </span>
                   <span className="text-sm text-[var(--color-white-400)]">
-                    PDF, DOC, CAD files (MAX. 10MB)
+                    PDF, DOC, CAD or image files (MAX. 10MB)
                   </span>
                 </label>
               </div>
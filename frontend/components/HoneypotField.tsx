@@ -0,0 +1,15 @@
+import React from 'react';
+
+// Hidden from people (and screen readers) but filled in by form-filling bots;
+// the API rejects submissions where it has a value.
+export const HONEYPOT_FIELD = 'website';
+
+export const HoneypotField: React.FC = () => (
+  <div aria-hidden="true" style={{ position: 'absolute', left: '-10000px', width: 1, height: 1, overflow: 'hidden' }}>
+    <label htmlFor={HONEYPOT_FIELD}>Website</label>
+    <input type="text" id={HONEYPOT_FIELD} name={HONEYPOT_FIELD} tabIndex={-1} autoComplete="off" defaultValue="" />
+  </div>
+);
+
+export const honeypotValue = (form: HTMLFormElement) =>
+  String(new FormData(form).get(HONEYPOT_FIELD) || '');
@@ -49,6 +49,13 @@ export interface RFQSubmission {
   created_at?: string;
 }
 
+export interface BatchResponse<T = unknown> {
+  id: string;
+  status: number;
+  headers: Record<string, string>;
+  body: T;
+}
+
 export interface ContentBlock {
   id: string;
   slug: string;
@@ -63,6 +70,7 @@ export interface ContentBlock {
 class ApiClient {
   private baseUrl: string;
   private token: string | null = null;
+  private formToken: Promise<string> | null = null;
 
   constructor(baseUrl: string) {
     this.baseUrl = baseUrl;
@@ -111,6 +119,63 @@ class ApiClient {
     return response.json();
   }
 
+  // Public forms: call when the form is shown. The server rejects a
+  // submission without a form token, or one sent within seconds of it.
+  prepareForm() {
+    if (!this.formToken) {
+      this.formToken = this.request<{ token: string }>('/forms/token/')
+        .then((data) => data.token)
+        .catch((error) => {
+          this.formToken = null;
+          throw error;
+        });
+    }
+    return this.formToken;
+  }
+
+  // Public form submissions: one Idempotency-Key per submission, reused on
+  // retry, so a request that reached the server but lost its response is
+  // answered from the stored result instead of being processed twice.
+  private async submit<T>(endpoint: string, init: RequestInit, attempts = 3): Promise<T> {
+    const idempotencyKey = crypto.randomUUID();
+    const formToken = await this.prepareForm();
+
+    for (let attempt = 1; ; attempt++) {
+      let response: Response;
+      try {
+        response = await fetch(`${this.baseUrl}${endpoint}`, {
+          ...init,
+          method: 'POST',
+          headers: {
+            ...(init.headers as Record<string, string> || {}),
+            'Idempotency-Key': idempotencyKey,
+            'X-Form-Token': formToken,
+          },
+        });
+      } catch (error) {
+        // Network failure: the request may or may not have arrived
+        if (attempt >= attempts) throw error;
+        await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** (attempt - 1)));
+        continue;
+      }
+
+      // 409: the first attempt is still being processed
+      if (response.status === 409 && attempt < attempts) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        continue;
+      }
+
+      if (!response.ok) {
+        const error = await response.json().catch(() => ({ detail: 'An error occurred' }));
+        throw new Error(error.detail || error.error || `HTTP error! status: ${response.status}`);
+      }
+
+      // A new form render gets a new token
+      this.formToken = null;
+      return response.json();
+    }
+  }
+
   // Authentication
   async login(username: string, password: string) {
     const data = await this.request<{ access: string; refresh: string }>('/token/', {
@@ -196,11 +261,12 @@ class ApiClient {
     });
   }
 
-  // Leads
-  async createLead(data: Lead): Promise<Lead> {
-    return this.request('/leads/', {
-      method: 'POST',
-      body: JSON.stringify(data),
+  // Leads. ``honeypot`` is the value of the form's hidden "website" field,
+  // empty for people.
+  async createLead(data: Lead, honeypot = ''): Promise<Lead> {
+    return this.submit('/leads/', {
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(honeypot ? { ...data, website: honeypot } : data),
     });
   }
 
@@ -209,35 +275,45 @@ class ApiClient {
   }
 
   // RFQ Submissions
-  async createRFQ(data: Omit<RFQSubmission, 'id' | 'attachment_url' | 'created_at'>): Promise<RFQSubmission> {
+  async createRFQ(
+    data: Omit<RFQSubmission, 'id' | 'attachment_url' | 'created_at'>,
+    honeypot = ''
+  ): Promise<RFQSubmission> {
     const formData = new FormData();
     formData.append('full_name', data.full_name);
     formData.append('email', data.email);
     formData.append('phone', data.phone);
     if (data.company) formData.append('company', data.company);
     formData.append('message', data.message);
+    if (honeypot) formData.append('website', honeypot);
     if (data.attachment) formData.append('attachment', data.attachment);
 
-    const response = await fetch(`${this.baseUrl}/rfq/`, {
-      method: 'POST',
-      body: formData,
-    });
-
-    if (!response.ok) {
-      const error = await response.json().catch(() => ({ detail: 'An error occurred' }));
-      throw new Error(error.detail || `HTTP error! status: ${response.status}`);
-    }
-
-    return response.json();
+    return this.submit('/rfq/', { body: formData });
   }
 
   async getRFQSubmissions(): Promise<RFQSubmission[]> {
     return this.request('/rfq/');
   }
 
+  // Batch: several read-only GETs (paths relative to /api) in one round trip.
+  // Each item may pass its own headers, e.g. If-None-Match with a previous ETag.
+  async batch(
+    requests: { id: string; path: string; headers?: Record<string, string> }[]
+  ): Promise<Record<string, BatchResponse>> {
+    const data = await this.request<{ responses: BatchResponse[] }>('/batch/', {
+      method: 'POST',
+      body: JSON.stringify({
+        requests: requests.map((item) => ({ ...item, path: `/api${item.path}` })),
+      }),
+    });
+    return Object.fromEntries(data.responses.map((item) => [item.id, item]));
+  }
+
   // Content Blocks
-  async getContentBlocks(): Promise<ContentBlock[]> {
-    const data = await this.request<{ results: ContentBlock[] } | ContentBlock[]>('/content/');
+  async getContentBlocks(fields?: (keyof ContentBlock)[]): Promise<ContentBlock[]> {
+    // ?fields= limits the response (and the query) to what the page renders
+    const query = fields ? `?fields=${fields.join(',')}` : '';
+    const data = await this.request<{ results: ContentBlock[] } | ContentBlock[]>(`/content/${query}`);
     // Handle both paginated and non-paginated responses
     if (Array.isArray(data)) {
       return data;
@@ -250,10 +326,14 @@ class ApiClient {
   }
 
   // Investor Downloads
-  async requestInvestorDownload(email: string, name?: string): Promise<{ message: string; expires_at: string }> {
-    return this.request('/investor/request-download/', {
-      method: 'POST',
-      body: JSON.stringify({ email, name }),
+  async requestInvestorDownload(
+    email: string,
+    name?: string,
+    honeypot = ''
+  ): Promise<{ message: string; expires_at: string }> {
+    return this.submit('/investor/request-download/', {
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(honeypot ? { email, name, website: honeypot } : { email, name }),
     });
   }
 